@@ -0,0 +1,310 @@
+# Benchmark for the bot's hot paths at synthetic club scale.
+# Builds a fake workbook (sheets/fake_backend.py) with a roster of N
+# members, Audit_Logs, Wordle claim history, quest catalogs and an event
+# sheet, then times the real sheets.actions functions against it.
+#
+# Every size runs in its own process (fresh roster.db, journal and ledger
+# in a temp directory). For each operation it reports wall time per call,
+# the fake Sheets API calls it issued and the peak memory allocated by one
+# call (tracemalloc, measured in a separate pass so it doesn't skew timings).
+# Quota waits are turned off so the numbers measure the bot, not the bucket.
+#
+# Run from the repository root:
+#   python -m bench.bench_hot_paths
+#   python -m bench.bench_hot_paths --sizes 1000,10000,100000 --latency 0.05
+#   python -m bench.bench_hot_paths --compare bench/results/hot_paths-abc1234.json
+#
+# Results are written as JSON to bench/results/hot_paths-<commit>.json.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SIZES = [1000, 10000]
+SHEET_ID = "bench-master"
+RESULTS_DIR = os.path.join("bench", "results")
+
+# Operation name -> timed iterations at each size
+ITERATIONS = {
+    "update_master_cache": 3,
+    "load_audit_ledger": 1,
+    "load_wordle_claims": 1,
+    "get_leaderboard": 200,
+    "leaderboard_embed": 50,
+    "get_xp": 500,
+    "award_quest_xp": 200,
+    "wordle_claim_exists": 1000,
+    "process_event_data": 5,
+    "get_random_quest": 100,
+    "flush_writes": 3,
+    "check_if_board_member": 2
+}
+
+WORDLE_PUZZLES = 60
+EVENT_ATTENDEES = 200
+QUESTS = {"Daily_Quests": 60, "Weekly_Quests": 20}
+
+
+# --- Synthetic data ---
+
+def make_workbook(members, rng, ranks):
+    # {worksheet title: rows} for a club of `members` people
+    roster = [["Name", "Email", "Year", "Discord_ID", "Total_XP", "Rank", "Board_Member"]]
+    board = [["Name", "Email"]]
+    for i in range(members):
+        # Most members have a little XP, a few have a lot
+        xp = int(rng.paretovariate(1.5) * 10) - 10
+        is_board = i % 50 == 0
+        roster.append([
+            f"Member {i}", f"member{i}@ufl.edu", str(rng.randint(1, 4)), discord_id(i),
+            str(xp), ranks.rank_for(xp), "Y" if is_board else "N"
+        ])
+        if is_board:
+            board.append([f"Member {i}", f"member{i}@ufl.edu"])
+
+    audit = [["Message_ID", "Timestamp", "Officer_ID", "Recipient_ID", "XP_Amount", "Reason"]]
+    for i in range(members * 2):
+        audit.append([
+            str(9 * 10**17 + i), "2025-01-01 12:00:00", discord_id(0),
+            discord_id(rng.randrange(members)), "4", "Daily Quest Approval"
+        ])
+
+    wordle = [["Puzzle", "Discord_ID", "Timestamp"]]
+    claims_per_puzzle = min(members // 10, 2000)
+    for puzzle in range(1000, 1000 + WORDLE_PUZZLES):
+        for i in rng.sample(range(members), claims_per_puzzle):
+            wordle.append([str(puzzle), discord_id(i), "2025-01-01 12:00:00"])
+
+    workbook = {
+        "Master_Roster": roster,
+        "Attendance_Logs": [["Event_ID", "Timestamp", "XP_Amount"]],
+        "Audit_Logs": audit,
+        "Wordle_Claims": wordle,
+        "Board_Roster": board
+    }
+    for sheet_name, count in QUESTS.items():
+        workbook[sheet_name] = [["Quest Name", "Description", "Objective", "Verification Method", "Last_Used"]] + [
+            [f"{sheet_name} {i}", "Description", "Objective", "Screenshot", f"2025-01-{i % 28 + 1:02d} 08:00:00"]
+            for i in range(count)
+        ]
+    return workbook
+
+
+def make_event(members, rng, number):
+    # An attendance sheet: mostly existing members, some new people
+    rows = [["Name", "Email"]]
+    for i in rng.sample(range(members), min(EVENT_ATTENDEES, members)):
+        rows.append([f"Member {i}", f"member{i}@ufl.edu"])
+    for i in range(EVENT_ATTENDEES // 10):
+        rows.append([f"Guest {number}-{i}", f"guest{number}-{i}@ufl.edu"])
+    return {"Sheet1": rows}
+
+
+def discord_id(i):
+    return str(10**17 + i)
+
+
+# --- Measuring ---
+
+def measure(name, func, client, iterations):
+    # Times `iterations` calls of func(i), then one more under tracemalloc
+    before = client.stats()
+    durations = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        durations.append(time.perf_counter() - start)
+    after = client.stats()
+
+    tracemalloc.start()
+    func(iterations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        "operation": name,
+        "iterations": iterations,
+        "total_seconds": sum(durations),
+        "mean_ms": statistics.mean(durations) * 1e3,
+        "p50_ms": durations[len(durations) // 2] * 1e3,
+        "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1e3,
+        "api_reads_per_call": (after.get("reads", 0) - before.get("reads", 0)) / iterations,
+        "api_writes_per_call": (after.get("writes", 0) - before.get("writes", 0)) / iterations,
+        "peak_kib": peak / 1024
+    }
+
+
+def run_size(members, latency, seed):
+    # Runs in the child process: isolates the local stores, then imports actions
+    os.environ.setdefault("GUILD_NUM", "0")
+    import config
+    workdir = tempfile.mkdtemp(prefix="bench-hot-paths-")
+    config.SHEET_ID = SHEET_ID
+    config.ROSTER_DB_PATH = os.path.join(workdir, "roster.db")
+    config.JOURNAL_DIR = os.path.join(workdir, "journal")
+    config.LEDGER_DB_PATH = os.path.join(workdir, "ledger.db")
+    config.QUEST_PLAN_PATH = os.path.join(workdir, "quest_plan.json")
+    config.SHEETS_READS_PER_MINUTE = config.SHEETS_WRITES_PER_MINUTE = 10**9
+    config.SHEETS_QUOTA_BURST = 10**9
+
+    from sheets import actions, ranks
+    from sheets.client import manager
+    from sheets.fake_backend import FakeClient
+
+    rng = random.Random(seed)
+    client = FakeClient({SHEET_ID: make_workbook(members, rng, ranks)}, latency=latency)
+    manager.use_client(client)
+    ops = ITERATIONS
+    results = []
+
+    def add(name, func):
+        results.append(measure(name, func, client, ops[name]))
+        print(f"  {members:>7} {name:<22} {results[-1]['mean_ms']:10.3f}ms", file=sys.stderr)
+
+    add("update_master_cache", lambda i: actions.update_master_cache(client, SHEET_ID, force=True))
+
+    def load_audit_ledger(i):
+        # Forces a full read of Audit_Logs every time
+        actions.ledger.loaded = False
+        actions.load_audit_ledger(client, SHEET_ID)
+    add("load_audit_ledger", load_audit_ledger)
+
+    def load_wordle_claims(i):
+        actions.wordle_claims.loaded = False
+        actions.load_wordle_claims(client, SHEET_ID)
+    add("load_wordle_claims", load_wordle_claims)
+
+    add("get_leaderboard", lambda i: actions.get_leaderboard(client, SHEET_ID, 10, mode=("regular", "board", "all")[i % 3]))
+
+    def leaderboard_embed(i):
+        actions.responses.clear()
+        actions.get_leaderboard_pages(client, SHEET_ID, 100, mode="all")
+    add("leaderboard_embed", leaderboard_embed)
+
+    def get_xp(i):
+        actions.responses.clear()
+        actions.get_xp(client, SHEET_ID, discord_id(rng.randrange(members)))
+    add("get_xp", get_xp)
+
+    add("award_quest_xp", lambda i: actions.award_quest_xp(
+        client, SHEET_ID, discord_id(rng.randrange(members)), 4,
+        officer_id=discord_id(0), message_id=str(8 * 10**17 + i), reason="Daily Quest Approval"
+    ))
+    add("wordle_claim_exists", lambda i: actions.wordle_claim_exists(
+        client, SHEET_ID, 1000 + rng.randrange(WORDLE_PUZZLES), discord_id(rng.randrange(members))
+    ))
+
+    def process_event(i):
+        key = f"bench-event-{i:04d}"
+        client.add_spreadsheet(key, make_event(members, rng, i))
+        actions.process_event_data(client, SHEET_ID, f"https://docs.google.com/spreadsheets/d/{key}/edit", 5)
+    add("process_event_data", process_event)
+
+    add("get_random_quest", lambda i: actions.get_random_quest(client, SHEET_ID, "Daily_Quests"))
+
+    def flush(i):
+        # Gives every flush something to send
+        for n in range(50):
+            actions.award_quest_xp(client, SHEET_ID, discord_id(rng.randrange(members)), 1)
+        actions.flush_writes(client, SHEET_ID)
+    add("flush_writes", flush)
+    add("check_if_board_member", lambda i: actions.check_if_board_member(client, SHEET_ID))
+
+    actions.journal.close()
+    return {"members": members, "results": results}
+
+
+# --- Reporting ---
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    # Mean time change per operation and size against an earlier results file
+    old = {(run["members"], r["operation"]): r for run in previous["runs"] for r in run["results"]}
+    print(f"\nCompared with {previous.get('commit')}:")
+    for run in current["runs"]:
+        for result in run["results"]:
+            before = old.get((run["members"], result["operation"]))
+            if before is None or not before["mean_ms"]:
+                continue
+            change = (result["mean_ms"] - before["mean_ms"]) / before["mean_ms"] * 100
+            print(f"{run['members']:>8} {result['operation']:<22} {before['mean_ms']:10.3f}ms -> {result['mean_ms']:10.3f}ms ({change:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the bot's hot paths against a synthetic fake workbook")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated roster sizes")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake Sheets call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="results file (default bench/results/hot_paths-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # The bot's own log lines are dropped so stdout is only the JSON result
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_size(args.child, args.latency, args.seed)
+        json.dump(result, sys.stdout)
+        return
+
+    commit = git_commit()
+    runs = []
+    for members in [int(size) for size in args.sizes.split(",")]:
+        output = subprocess.run(
+            [sys.executable, "-m", "bench.bench_hot_paths", "--child", str(members),
+             "--latency", str(args.latency), "--seed", str(args.seed)],
+            capture_output=True, text=True
+        )
+        sys.stderr.write(output.stderr)
+        if output.returncode != 0:
+            raise SystemExit(f"Benchmark for {members} members failed")
+        runs.append(json.loads(output.stdout))
+
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "latency": args.latency,
+        "seed": args.seed,
+        "runs": runs
+    }
+
+    print(f"{'members':>8} {'operation':<22} {'mean':>10} {'p95':>10} {'reads':>7} {'writes':>7} {'peak KiB':>10}")
+    for run in runs:
+        for r in run["results"]:
+            print(
+                f"{run['members']:>8} {r['operation']:<22} {r['mean_ms']:8.3f}ms {r['p95_ms']:8.3f}ms "
+                f"{r['api_reads_per_call']:7.2f} {r['api_writes_per_call']:7.2f} {r['peak_kib']:10.1f}"
+            )
+
+    out = args.out or os.path.join(RESULTS_DIR, f"hot_paths-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"\nWrote {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
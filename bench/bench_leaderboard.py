@@ -0,0 +1,101 @@
+# Benchmark for the /leaderboard renderer.
+# Compares the old recursive tie expansion from bot.py with
+# embeds.leaderboard_embed.render_pages on boards with long tie chains.
+#
+# Run from the repository root:
+#   python -m bench.bench_leaderboard
+
+import sys
+import time
+
+from embeds import leaderboard_embed
+
+SIZES = [10, 50, 100, 500, 2000]
+REPEATS = 20
+
+
+def make_entries(count, tie_length=25):
+    # A board where every `tie_length` members share the same XP
+    entries = []
+    for index in range(count):
+        xp = 10000 - (index // tie_length) * 10
+        place = (index // tie_length) * tie_length + 1
+        entries.append((place, f"Member {index}", xp, "Daiyo's Friend", index % 7 == 0))
+    return entries
+
+
+def legacy_render(entries, top, mode):
+    # The pre-rewrite algorithm from bot.py, kept here only for comparison
+    result = [(name, xp, rank_name, is_board) for place, name, xp, rank_name, is_board in entries]
+    place = 0
+    shown = 0
+    leaderboardentries = ""
+    lastxp = -1
+
+    def makeentry(name, xp, rank_name, isboard, place, type):
+        return leaderboard_embed.format_entry(place, name, xp, rank_name, isboard, type)
+
+    def checkNextIndexes(currentxp, currentstring, currentindex, maxindex, place):
+        recursiveentry = result[currentindex]
+        recursivexp = recursiveentry[1]
+        newstring = makeentry(recursiveentry[0], recursivexp, recursiveentry[2], recursiveentry[3], place, mode)
+        if len(currentstring + newstring) > 4000:
+            return ""
+        if currentindex == maxindex - 1:
+            return newstring
+        if currentxp != recursivexp:
+            return ""
+        return newstring + checkNextIndexes(recursivexp, currentstring + newstring, currentindex + 1, maxindex, place)
+
+    for index, (name, xp, rank_name, is_board) in enumerate(result):
+        if xp != lastxp:
+            place = index + 1
+            lastxp = xp
+        thismessage = makeentry(name, xp, rank_name, is_board, place, mode)
+        if len(leaderboardentries + thismessage) > 4000:
+            break
+        if shown >= top:
+            leaderboardentries += checkNextIndexes(xp, leaderboardentries + thismessage, index, len(result), place)
+            break
+        leaderboardentries += thismessage
+        shown += 1
+    return leaderboardentries
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(*args)
+    return (time.perf_counter() - start) / REPEATS
+
+
+def main():
+    # The legacy renderer stops at one embed, so it also reports how many
+    # entries it actually managed to show
+    print(f"{'top':>6} {'entries':>8} {'pages':>6} {'render_pages':>14} {'per entry':>11} {'legacy':>12} {'shown':>6}")
+    for top in SIZES:
+        entries = make_entries(top)
+        pages = leaderboard_embed.render_pages(entries, "all")
+        seconds = time_call(leaderboard_embed.render_pages, entries, "all")
+        try:
+            legacy = f"{time_call(legacy_render, entries, top, 'all') * 1e3:10.3f}ms"
+            shown = legacy_render(entries, top, "all").count(" XP ★")
+        except RecursionError:
+            legacy, shown = "RecursionError", 0
+        print(
+            f"{top:>6} {len(entries):>8} {len(pages):>6} {seconds * 1e3:12.3f}ms "
+            f"{seconds / len(entries) * 1e6:9.2f}us {legacy:>12} {shown:>6}"
+        )
+
+    # A single tie longer than the recursion limit
+    entries = [(1, f"Member {i}", 100, "Newcomer", False) for i in range(sys.getrecursionlimit() + 100)]
+    seconds = time_call(leaderboard_embed.render_pages, entries, "regular")
+    pages = leaderboard_embed.render_pages(entries, "regular")
+    shown = legacy_render(entries, 1, "regular").count(" XP ★")
+    print(
+        f"\n{len(entries)}-way tie: render_pages {seconds * 1e3:.3f}ms over {len(pages)} pages, "
+        f"legacy showed {shown} of {len(entries)}"
+    )
+
+if __name__ == "__main__":
+    main()
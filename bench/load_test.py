@@ -0,0 +1,435 @@
+# Load test for the bot's slash commands and quest approvals.
+# Imports bot.py without logging in and calls the real command callbacks
+# (/claim_wordle, /xp, /leaderboard, /join) and the reaction handler for
+# quest approvals with fake Interaction and payload objects. The Sheets
+# side is the in-process fake (sheets/fake_backend.py) with a synthetic
+# roster and per-call latency, behind the real quota scheduler.
+#
+# Interactions arrive as a Poisson stream at --rate per second (or all at
+# once with --rate 0), with at most --concurrency handled at once; a queued
+# interaction's clock starts when it arrives, like Discord's does. For each
+# kind it reports p50/p95/p99 time-to-defer (the first interaction.response
+# call) and time-to-followup (the first followup, or the channel reply for
+# approvals), and lists every interaction that missed the 3 second ack window.
+#
+# Run from the repository root:
+#   python -m bench.load_test
+#   python -m bench.load_test --requests 2000 --rate 50 --concurrency 32 --latency 0.3
+#   python -m bench.load_test --mix xp=5,claim_wordle=3,approve=2 --quota-error-rate 0.05
+#
+# Results are written as JSON to bench/results/load_test-<commit>.json.
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from bench.bench_hot_paths import SHEET_ID, WORDLE_PUZZLES, RESULTS_DIR, make_workbook, discord_id, git_commit
+
+# Discord fails an interaction that isn't acknowledged within 3 seconds
+ACK_WINDOW_SECONDS = 3.0
+MIX = "claim_wordle=3,xp=4,leaderboard=2,join=1,approve=2"
+KINDS = ["claim_wordle", "xp", "leaderboard", "join", "approve"]
+# Late interactions listed in the report (all of them go in the JSON)
+SHOW_LATE = 20
+
+
+# --- Fake Discord objects ---
+
+class Timeline:
+    # When one interaction arrived, was acknowledged and got its first followup
+
+    def __init__(self, kind, number, arrived):
+        self.kind = kind
+        self.number = number
+        self.arrived = arrived
+        self.started = None
+        self.deferred = None
+        self.followed_up = None
+        self.finished = None
+        self.error = None
+
+    def mark_deferred(self):
+        if self.deferred is not None:
+            raise RuntimeError("This interaction has already been responded to before")
+        self.deferred = time.perf_counter()
+
+    def mark_followup(self):
+        if self.followed_up is None:
+            self.followed_up = time.perf_counter()
+
+    def since_arrival(self, moment):
+        return None if moment is None else moment - self.arrived
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "number": self.number,
+            "queued_seconds": self.since_arrival(self.started),
+            "defer_seconds": self.since_arrival(self.deferred),
+            "followup_seconds": self.since_arrival(self.followed_up),
+            "total_seconds": self.since_arrival(self.finished),
+            "error": self.error
+        }
+
+
+class FakeMessage:
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+
+    async def edit(self, **kwargs):
+        self.timeline.mark_followup()
+
+
+class FakeResponse:
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+
+    def is_done(self):
+        return self.timeline.deferred is not None
+
+    async def defer(self, ephemeral=False, thinking=False):
+        self.timeline.mark_deferred()
+
+    async def send_message(self, content=None, **kwargs):
+        self.timeline.mark_deferred()
+
+    async def edit_message(self, **kwargs):
+        self.timeline.mark_deferred()
+
+
+class FakeFollowup:
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+
+    async def send(self, content=None, wait=False, **kwargs):
+        if self.timeline.deferred is None:
+            raise RuntimeError("Followup sent before the interaction was acknowledged")
+        self.timeline.mark_followup()
+        return FakeMessage(self.timeline)
+
+
+class FakeInteraction:
+    # The parts of discord.Interaction the command callbacks use
+
+    def __init__(self, timeline, user, guild):
+        self.user = user
+        self.guild = guild
+        self.response = FakeResponse(timeline)
+        self.followup = FakeFollowup(timeline)
+
+
+class FakeChannel:
+    # Quest submission channel; its send() is the approval's followup.
+    # Each approval gets its own channel object so replies land on the
+    # right timeline.
+
+    def __init__(self, channel_id, timeline):
+        self.id = channel_id
+        self.timeline = timeline
+
+    async def send(self, content=None, **kwargs):
+        self.timeline.mark_followup()
+        return FakeMessage(self.timeline)
+
+
+def fake_member(user_id, roles=()):
+    return SimpleNamespace(id=user_id, name=f"user{user_id}", bot=False, roles=list(roles))
+
+
+# --- Workload ---
+
+class Workload:
+    # Builds the arguments for each kind of interaction
+
+    def __init__(self, bot_module, config, members, rng):
+        self.bot = bot_module
+        self.config = config
+        self.members = members
+        self.rng = rng
+        self.officer = fake_member(int(discord_id(0)), [SimpleNamespace(id=config.OFFICER_ROLE_ID)])
+        self.guild = SimpleNamespace(id=config.GUILD_ID, get_member=lambda user_id: None)
+        self.next_message_id = 7 * 10**17
+        self.joined = 0
+        self._channel = None  # FakeChannel of the approval being handled
+        # The handlers look these up on the Client, which never connects here
+        bot_module.bot.get_guild = lambda guild_id: self.guild
+        bot_module.bot.get_channel = lambda channel_id: self._channel
+
+    def random_member(self):
+        return int(discord_id(self.rng.randrange(self.members)))
+
+    async def run(self, kind, timeline):
+        if kind == "approve":
+            await self.approve(timeline)
+            return
+        user = fake_member(self.random_member())
+        interaction = FakeInteraction(timeline, user, self.guild)
+        if kind == "claim_wordle":
+            # Mostly existing puzzles (some already claimed), some today's
+            puzzle = 1000 + self.rng.randrange(WORDLE_PUZZLES + 5)
+            share_text = f"Wordle {puzzle:,} {self.rng.randint(1, 6)}/6\n\n🟩🟩🟩🟩🟩"
+            await self.bot.claim_wordle.callback(interaction, share_text)
+        elif kind == "xp":
+            await self.bot.xp.callback(interaction)
+        elif kind == "leaderboard":
+            mode = self.rng.choice(["regular", "regular", "board", "all"])
+            await self.bot.leaderboard.callback(interaction, type=mode, top=10)
+        elif kind == "join":
+            # New sign-ups with a fresh Discord account
+            self.joined += 1
+            user.id = int(discord_id(self.members + self.joined))
+            await self.bot.join.callback(interaction, f"newcomer{self.joined}@ufl.edu")
+
+    async def approve(self, timeline):
+        # An officer reacting to a freshly posted daily submission
+        self.next_message_id += 1
+        message_id = self.next_message_id
+        self.bot.recent_submissions[message_id] = self.random_member()
+        payload = SimpleNamespace(
+            message_id=message_id,
+            channel_id=self.config.DAILY_SUBMISSION_ID,
+            guild_id=self.config.GUILD_ID,
+            user_id=self.officer.id,
+            member=self.officer,
+            emoji=self.config.APPROVE_EMOJI,
+            message_author_id=None
+        )
+        # The handler calls get_channel before its first await, so no other
+        # approval can swap the channel in between
+        self._channel = FakeChannel(payload.channel_id, timeline)
+        timeline.mark_deferred()  # reactions have no ack; only the reply counts
+        await self.bot.on_raw_reaction_add(payload)
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in KINDS:
+            raise SystemExit(f"Unknown interaction kind {name!r} (choose from {', '.join(KINDS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def drive(workload, weights, requests, rate, concurrency, rng):
+    # Sends `requests` interactions; returns their timelines
+    kinds = list(weights)
+    limit = asyncio.Semaphore(concurrency)
+    timelines = []
+    tasks = []
+
+    async def handle(timeline):
+        async with limit:
+            timeline.started = time.perf_counter()
+            try:
+                await workload.run(timeline.kind, timeline)
+            except Exception as e:
+                timeline.error = f"{type(e).__name__}: {e}"
+            timeline.finished = time.perf_counter()
+
+    next_arrival = time.perf_counter()
+    for number in range(requests):
+        if rate > 0:
+            next_arrival += rng.expovariate(rate)
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        kind = rng.choices(kinds, weights=[weights[k] for k in kinds])[0]
+        timeline = Timeline(kind, number, time.perf_counter())
+        timelines.append(timeline)
+        tasks.append(asyncio.create_task(handle(timeline)))
+    await asyncio.gather(*tasks)
+    return timelines
+
+
+async def run_load(args):
+    os.environ.setdefault("GUILD_NUM", "0")
+    import config
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    config.SHEET_ID = SHEET_ID
+    config.ROSTER_DB_PATH = os.path.join(workdir, "roster.db")
+    config.JOURNAL_DIR = os.path.join(workdir, "journal")
+    config.LEDGER_DB_PATH = os.path.join(workdir, "ledger.db")
+    config.QUEST_PLAN_PATH = os.path.join(workdir, "quest_plan.json")
+    config.ROLE_CHECKPOINT_PATH = os.path.join(workdir, "role_checkpoint.json")
+    if args.no_quota:
+        config.SHEETS_READS_PER_MINUTE = config.SHEETS_WRITES_PER_MINUTE = 10**9
+        config.SHEETS_QUOTA_BURST = 10**9
+
+    import bot
+    from sheets import actions, async_actions, ranks
+    from sheets.client import manager, scheduler
+    from sheets.fake_backend import FakeClient
+
+    rng = random.Random(args.seed)
+    client = FakeClient(
+        {SHEET_ID: make_workbook(args.members, rng, ranks)},
+        latency=args.latency,
+        quota_error_rate=args.quota_error_rate,
+        seed=args.seed
+    )
+    manager.use_client(client)
+
+    # What on_ready does before the first command comes in
+    await async_actions.update_master_cache(force=True)
+    await async_actions.load_audit_ledger()
+    async_actions.start_write_queue()
+    api_before = client.stats()
+
+    workload = Workload(bot, config, args.members, rng)
+    start = time.perf_counter()
+    timelines = await drive(workload, parse_mix(args.mix), args.requests, args.rate, args.concurrency, rng)
+    elapsed = time.perf_counter() - start
+
+    # Let background approvals and queued writes finish before reading the counters
+    while async_actions.queued_awards():
+        await asyncio.sleep(0.05)
+    await async_actions.flush_writes()
+    actions.write_queue.stop()
+    api_after = client.stats()
+    actions.journal.close()
+
+    return {
+        "elapsed_seconds": elapsed,
+        "timelines": [timeline.to_dict() for timeline in timelines],
+        "api_calls": {key: api_after.get(key, 0) - api_before.get(key, 0) for key in api_after},
+        "scheduler": scheduler.stats()
+    }
+
+
+# --- Reporting ---
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of sorted values
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(records):
+    # Per-kind (and overall) latency percentiles in milliseconds
+    summary = {}
+    for kind in KINDS + ["all"]:
+        rows = [r for r in records if kind in ("all", r["kind"])]
+        if not rows:
+            continue
+        entry = {
+            "count": len(rows),
+            "errors": sum(1 for r in rows if r["error"]),
+            "late_acks": sum(1 for r in rows if r["kind"] != "approve" and is_late(r))
+        }
+        for field in ("defer", "followup"):
+            values = sorted(r[f"{field}_seconds"] for r in rows if r[f"{field}_seconds"] is not None)
+            for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+                value = percentile(values, fraction)
+                entry[f"{field}_{name}_ms"] = None if value is None else value * 1e3
+        summary[kind] = entry
+    return summary
+
+
+def is_late(record):
+    # Never acknowledged, or acknowledged after the window closed
+    return record["defer_seconds"] is None or record["defer_seconds"] > ACK_WINDOW_SECONDS
+
+
+def ms(value):
+    return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+
+def print_report(report):
+    print(
+        f"{report['requests']} interactions in {report['elapsed_seconds']:.1f}s "
+        f"(rate {report['rate'] or 'unlimited'}/s, concurrency {report['concurrency']}, "
+        f"latency {report['latency']}s, {report['members']} members)\n"
+    )
+    print(
+        f"{'kind':<13} {'count':>6} {'errors':>6} {'late':>5} "
+        f"{'defer p50':>9} {'p95':>8} {'p99':>8}   {'followup p50':>12} {'p95':>8} {'p99':>8}  (ms)"
+    )
+    for kind, s in report["summary"].items():
+        print(
+            f"{kind:<13} {s['count']:>6} {s['errors']:>6} {s['late_acks']:>5} "
+            f"{ms(s['defer_p50_ms']):>9} {ms(s['defer_p95_ms'])} {ms(s['defer_p99_ms'])}   "
+            f"{ms(s['followup_p50_ms']):>12} {ms(s['followup_p95_ms'])} {ms(s['followup_p99_ms'])}"
+        )
+
+    late = report["late"]
+    if late:
+        print(f"\n⚠️ {len(late)} interactions missed the {ACK_WINDOW_SECONDS:.0f}s ack window:")
+        for r in late[:SHOW_LATE]:
+            defer = "never" if r["defer_seconds"] is None else f"{r['defer_seconds']:.2f}s"
+            print(f"  #{r['number']:<6} {r['kind']:<13} ack {defer:>7}, queued {r['queued_seconds'] or 0:.2f}s")
+        if len(late) > SHOW_LATE:
+            print(f"  ... and {len(late) - SHOW_LATE} more")
+    else:
+        print(f"\n✅ Every interaction was acknowledged within {ACK_WINDOW_SECONDS:.0f}s.")
+
+    errors = [r for r in report["timelines"] if r["error"]]
+    for r in errors[:SHOW_LATE]:
+        print(f"❌ #{r['number']} {r['kind']}: {r['error']}")
+
+    calls = report["api_calls"]
+    print(f"\nFake Sheets calls: {calls.get('reads', 0)} reads, {calls.get('writes', 0)} writes, {calls.get('quota_errors', 0)} quota errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the bot's commands with fake interactions and measure ack latency")
+    parser.add_argument("--requests", type=int, default=500, help="interactions to send")
+    parser.add_argument("--rate", type=float, default=20.0, help="arrivals per second (0 sends them all at once)")
+    parser.add_argument("--concurrency", type=int, default=16, help="interactions handled at once")
+    parser.add_argument("--mix", default=MIX, help=f"kind=weight list from {', '.join(KINDS)}")
+    parser.add_argument("--members", type=int, default=1000, help="synthetic roster size")
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds per fake Sheets call")
+    parser.add_argument("--quota-error-rate", type=float, default=0.0, help="fraction of fake Sheets calls that return 429")
+    parser.add_argument("--no-quota", action="store_true", help="turn off the Sheets quota buckets")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="results file (default bench/results/load_test-<commit>.json)")
+    args = parser.parse_args()
+
+    # The bot's own log lines would bury the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(run_load(args))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "members": args.members,
+        "latency": args.latency,
+        "quota_error_rate": args.quota_error_rate,
+        "quota": not args.no_quota,
+        "seed": args.seed,
+        "summary": summarize(result["timelines"]),
+        "late": [r for r in result["timelines"] if r["kind"] != "approve" and is_late(r)],
+        **result
+    }
+    print_report(report)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"load_test-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"\nWrote {out}")
+    if report["late"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
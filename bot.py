@@ -3,28 +3,65 @@ from discord.ext import commands
 from discord.ext import tasks
 from discord import app_commands
 import logging
+import asyncio
 import config 
-from sheets.client import get_client
-from sheets import actions
+import metrics
+from sheets import async_actions
 from wordle import wordle_actions
+from embeds import leaderboard_embed, stats_embed
+from roles.role_actions import RoleAssigner, progress_text
 import datetime
+import time
+from collections import OrderedDict
 from zoneinfo import ZoneInfo
 # 1. Setup Intents 
 intents = discord.Intents.default()
 intents.message_content = True # Allows bot to read commands
 
+# Times every app command for metrics.py: started when the tree lets the
+# interaction through, finished by on_app_command_completion or the error handler
+class MetricsTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction):
+        name = interaction.command.qualified_name if interaction.command else "unknown"
+        interaction.extras["metrics"] = (name, metrics.registry.start("command", name))
+        return True
+
+def finish_command_metrics(interaction, error=None):
+    timing = interaction.extras.pop("metrics", None)
+    if timing is not None:
+        metrics.registry.finish("command", timing[0], timing[1], error)
+
 # 2. Startup Event
 class Client(commands.Bot):
     async def on_ready(self):
         print(f'Logged in as {self.user}')
         print('Bot is ready to process sheets!')
         
+        # Finish any sheet writes a crash left half done, before anything new is written
+        try:
+            await async_actions.replay_journal()
+        except Exception as e:
+            print(f"Warning: Could not replay the write journal: {e}")
+
         # Start the quest loops
         if not daily_quest_loop.is_running():
             daily_quest_loop.start()
             print("Daily quest loop started.")
         if not update_master_cache.is_running():
             update_master_cache.start()
+        async_actions.start_write_queue()
+        # Seed the duplicate-approval ledger so reactions can be checked from memory
+        try:
+            await async_actions.load_audit_ledger()
+        except Exception as e:
+            print(f"Warning: Could not load Audit_Logs: {e}")
+        # Local Prometheus endpoint (METRICS_PORT = 0 turns it off)
+        metrics.registry.serve(config.METRICS_HOST, config.METRICS_PORT)
+        # Make sure the next quest posts are already picked
+        try:
+            await async_actions.plan_quests()
+        except Exception as e:
+            print(f"Warning: Could not plan upcoming quests: {e}")
         try:
             # Syncing commands to the specific guild for instant updates
             guild = discord.Object(id=config.GUILD_ID) 
@@ -33,40 +70,141 @@ class Client(commands.Bot):
         except Exception as e:
             print(f"Errors syncing commands: {e}")
 
-bot = Client(command_prefix="!", intents=intents)
+    async def close(self):
+        # Send any queued sheet writes before shutting down
+        try:
+            await async_actions.flush_writes()
+        except Exception as e:
+            print(f"Warning: Could not flush sheet writes on shutdown: {e}")
+        await super().close()
+
+bot = Client(command_prefix="!", intents=intents, tree_cls=MetricsTree)
 GUILD_ID = discord.Object(id = config.GUILD_ID)
+# Every Battle Pass role grant (bulk, reaction and join) shares this
+role_assigner = RoleAssigner(
+    config.ROLE_ASSIGN_CONCURRENCY,
+    config.ROLE_CHECKPOINT_PATH,
+    config.ROLE_ASSIGN_RETRIES,
+    config.ROLE_PROGRESS_SECONDS
+)
+metrics.registry.add_collector(lambda: [
+    ("jsa_role_grants_pending", "gauge", "Battle Pass role grants waiting to run", {}, role_assigner.pending())
+])
 # 3. Commands:
 
+# Dry-run previews: Apply/Cancel buttons under the diff of an event run
+class EventPlanConfirm(discord.ui.View):
+    def __init__(self, plan_id, owner_id):
+        super().__init__(timeout=config.EVENT_PLAN_TTL_SECONDS)
+        self.plan_id = plan_id
+        self.owner_id = owner_id
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Only the officer who ran the dry run can apply it
+        return interaction.user.id == self.owner_id
+
+    @discord.ui.button(label="Apply", style=discord.ButtonStyle.green)
+    async def apply(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="🔄 Applying the previewed changes...", view=None)
+        result = await async_actions.confirm_event_plan(self.plan_id)
+        await interaction.followup.send(result)
+        self.stop()
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.gray)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="❎ Dry run discarded, nothing was written.", view=None)
+        self.stop()
+
+async def send_event_preview(interaction, urls, xp_amount):
+    plan_id, report = await async_actions.preview_events(urls, xp_amount)
+    if plan_id is None:
+        await interaction.followup.send(report)
+        return
+    await interaction.followup.send(report, view=EventPlanConfirm(plan_id, interaction.user.id))
+
 # Processing Events
 @bot.tree.command(name="process_event", description="Adds attendance sheet url for certain event (only officers)", guild=GUILD_ID)
+@app_commands.describe(dry_run="Preview the changes and API cost first, then confirm")
 @app_commands.default_permissions()
 @app_commands.checks.has_role(config.OFFICER_ROLE_ID)
-async def process_event(interaction: discord.Interaction, sheet_url: str, xp_amount: int):
+async def process_event(interaction: discord.Interaction, sheet_url: str, xp_amount: int, dry_run: bool = False):
 
     await interaction.response.send_message(f"🔄 Processing event sheet... this might take a moment.")
 
-    # Get the google sheet client
-    client = get_client()
+    if dry_run:
+        await send_event_preview(interaction, [sheet_url], xp_amount)
+        return
 
-    # Run the logic from actions.py using SHEET_ID from config.py
-    result_message = actions.process_event_data(
-        client = client,
-        master_sheet_id = config.SHEET_ID,
+    # Run the logic from actions.py (off the event loop) using SHEET_ID from config.py
+    result_message = await async_actions.process_event_data(
         event_sheet_url = sheet_url,
         xp_amount = xp_amount
     )
 
     await interaction.followup.send(result_message)
 
+# Processing several events at once (e.g. after a weekend)
+@bot.tree.command(name="process_events", description="Adds several attendance sheet urls at once (only officers)", guild=GUILD_ID)
+@app_commands.describe(
+    sheet_urls="Attendance sheet urls separated by spaces or commas",
+    xp_amount="XP per event attended",
+    dry_run="Preview the changes and API cost first, then confirm"
+)
+@app_commands.default_permissions()
+@app_commands.checks.has_role(config.OFFICER_ROLE_ID)
+async def process_events(interaction: discord.Interaction, sheet_urls: str, xp_amount: int, dry_run: bool = False):
+    urls = sheet_urls.replace(",", " ").split()
+    if not urls:
+        await interaction.response.send_message("❌ Please paste at least one sheet url.", ephemeral=True)
+        return
+
+    await interaction.response.send_message(f"🔄 Processing {len(urls)} event sheets... this might take a moment.")
+
+    if dry_run:
+        await send_event_preview(interaction, urls, xp_amount)
+        return
+
+    result_message = await async_actions.process_events(urls, xp_amount)
+
+    await interaction.followup.send(result_message)
+
 # Join
 @bot.tree.command(name="join", description="Joins the JSA Battle Pass!", guild=GUILD_ID)
 async def join(interaction: discord.Interaction, email: str):
+    await interaction.response.defer()
+
+    result = await async_actions.get_join(email, str(interaction.user.id))
+
+    await interaction.followup.send(result)
 
-    client = get_client()
+# Leaderboard pages: prev/next buttons for boards too long for one embed
+class LeaderboardPages(discord.ui.View):
+    def __init__(self, embeds, owner_id):
+        super().__init__(timeout=180)
+        self.embeds = embeds
+        self.owner_id = owner_id
+        self.page = 0
+        self.update_buttons()
 
-    result = actions.get_join(client, config.SHEET_ID, email, str(interaction.user.id))
+    def update_buttons(self):
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page == len(self.embeds) - 1
 
-    await interaction.response.send_message(result)
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Only whoever ran /leaderboard can flip its pages
+        return interaction.user.id == self.owner_id
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.gray)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.embeds[self.page], view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.gray)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.embeds[self.page], view=self)
 
 # Leaderboard
 @bot.tree.command(name="leaderboard", description="Prints out the leaderboard", guild=GUILD_ID)
@@ -79,84 +217,23 @@ async def join(interaction: discord.Interaction, email: str):
 async def leaderboard(interaction: discord.Interaction, type: str = "regular", top: int = 10):
     await interaction.response.defer()
 
-    client = get_client()
-
-    result = actions.get_leaderboard(client, config.SHEET_ID, top, mode=type)
-    place = 0
-    shown = 0
-    leaderboardentries = ""
-    lastxp = -1
-    s = "\u3164"
-    def makeentry(name,xp,rank_name,isboard,place,type):
-        placement_text = ""
-        nametext = name
-        if(type == "all" and isboard == True):
-            nametext = "**[Board]** " + nametext
-        #placement_text += f"{name} — {xp} ({rank_name})\n"
-        medal = "🥇" if place == 1 else "🥈" if place == 2 else "🥉" if place == 3 else "⭐"
-        suffix = "st" if place == 1 else "nd" if place == 2 else "rd" if place == 3 else ")"
-
-        if place <= 3:
-            placement_text += f"{s*6} {medal} {place}{suffix} | {nametext}\n"
-            placement_text += f"{s*8} ★ {xp} XP ★\n"
-            placement_text += f"{s*6} {rank_name} (ง•̀o•́)ง \n\n"
-        else:
-            placement_text += f"{s*2} {medal} {place}) {nametext} ★ {xp} XP ★\n"
-        return placement_text
-    def checkNextIndexes(currentxp, currentstring, currentindex,maxindex,place):
-            recursiveentry = result[currentindex]
-            recursivename = recursiveentry[0]
-            recursivexp = recursiveentry[1]
-            recursiverank = recursiveentry[2]
-            recursiveboard = recursiveentry[3]
-            newstring = makeentry(recursivename,recursivexp,recursiverank,recursiveboard,place,type)
-
-            #96 free characters to not hit the limit might be excessive but needing 4000 characters in the first place is excessive
-            if(len(currentstring+newstring)>4000):
-                recursivenextentry = result[currentindex+1]
-                recursivenextxp = recursivenextentry[1]
-                if(recursivenextxp == recursivexp):
-                    return f"\n{s*3} ... and more tied with {xp} XP ...\n"
-                else:
-                    return ""
-            if(currentindex == maxindex):
-                return newstring
-            if(currentxp != recursivexp):
-                return ""
-            return newstring + checkNextIndexes(recursivexp,currentstring+newstring,currentindex+1,maxindex,place)
-    for index, (name, xp, rank_name,is_board) in enumerate(result):
-        if xp != lastxp:
-            place = index + 1
-            lastxp = xp
-        entry = result[index]
-        name = entry[0]
-        xp = entry[1]
-        rank = entry[2]
-        isboard = entry[3]
-
-        thismessage = makeentry(name,xp,rank,isboard,place,type)
-        #this is an immediate check to see if we've somehow already hit that limit without going into tie strings which might somehow potentially be a problem later on if someone searches for like top 100
-        if(len(leaderboardentries+thismessage)>4000):
-            break
-        #this is the recursive check to see how many we can do next after we've already hit a huge string of ties
-        if shown >= top:
-            leaderboardentries += checkNextIndexes(xp,leaderboardentries+thismessage,index,len(result),place)
-            break
-        leaderboardentries += thismessage
-        shown +=1
-    leaderboardentries += f"\n**╰━━━━━━ {s*7} 🏯 {s*7} ━━━━━━╯**"
-    leaderboard_embed = discord.Embed(title=f"╭━━━ {s*2} ⚔️ **JSA LEADERBOARD** ⚔️ {s*2} ━━━╮\n\n",description=leaderboardentries)
-    await interaction.followup.send(embed=leaderboard_embed)
+    pages = await async_actions.get_leaderboard_pages(top, mode=type)
+    embeds = [discord.Embed(title=leaderboard_embed.TITLE, description=page) for page in pages]
+    if len(embeds) == 1:
+        await interaction.followup.send(embed=embeds[0])
+        return
+    for number, embed in enumerate(embeds, start=1):
+        embed.set_footer(text=f"Page {number}/{len(embeds)}")
+    await interaction.followup.send(embed=embeds[0], view=LeaderboardPages(embeds, interaction.user.id))
 
 # XP
 @bot.tree.command(name="xp", description="Prints out your total XP!", guild=GUILD_ID)
 async def xp(interaction: discord.Interaction):
+    await interaction.response.defer()
 
-    client = get_client()
-
-    result = actions.get_xp(client, config.SHEET_ID, str(interaction.user.id))
+    result = await async_actions.get_xp(str(interaction.user.id))
 
-    await interaction.response.send_message(result)
+    await interaction.followup.send(result)
 
 # Quests
 # Helper function to format the Quest into a nice Discord Embed
@@ -176,26 +253,49 @@ def format_quest_embed(quest, category_name):
     return embed
 
 # Task for Daily Quests (Runs every 24 hours)
-@tasks.loop(time=datetime.time(hour=8, minute=0, tzinfo=ZoneInfo('America/New_York')))
+# Posts the quests planned ahead of time straight from the local plan; the
+# sheet is only touched afterwards (Last_Used and topping up the plan)
+@tasks.loop(time=datetime.time(hour=8, minute=0, tzinfo=ZoneInfo(config.QUEST_TIMEZONE)))
 async def daily_quest_loop():
     channel = bot.get_channel(config.QUEST_CHANNEL_ID)
     if channel:
-        client = get_client()
-        quest = actions.get_random_quest(client, config.SHEET_ID, "Daily_Quests")
-        if quest:
-            await channel.send("☀️ **Today's Daily Quest is live!**", embed=format_quest_embed(quest, "Daily_Quests"))
-        #after the daily we check weekly
-        day_of_week = datetime.datetime.weekday(datetime.date.today())
-        #days are 0(monday)-6(sunday)
-        if(day_of_week == 0):
-            quest = actions.get_random_quest(client, config.SHEET_ID, "Weekly_Quests")
+        posts = [("Daily_Quests", "☀️ **Today's Daily Quest is live!**")]
+        #days are 0(monday)-6(sunday), weekly quests go out on mondays
+        if async_actions.quest_today().weekday() == 0:
+            posts.append(("Weekly_Quests", "🔥 **A new Weekly Quest has appeared!**"))
+        planned = []
+        for sheet_name, announcement_text in posts:
+            quest = async_actions.get_planned_quest(sheet_name)
+            if quest:
+                planned.append(sheet_name)
+            else:
+                # Nothing planned (e.g. the sheet was unreachable), pick one now
+                quest = await async_actions.get_random_quest(sheet_name)
             if quest:
-                await channel.send("🔥 **A new Weekly Quest has appeared!**", embed=format_quest_embed(quest, "Weekly_Quests"))
-#Task for updating master cache (Runs every 5 mins)
-@tasks.loop(minutes=5)
+                await channel.send(announcement_text, embed=format_quest_embed(quest, sheet_name))
+        if planned:
+            try:
+                await async_actions.use_planned_quests(planned)
+            except Exception as e:
+                print(f"Warning: Could not update the quest plan after posting: {e}")
+#Task for updating master cache (every ROSTER_REFRESH_SECONDS, adapted to how often the sheet changes)
+@tasks.loop(seconds=config.ROSTER_REFRESH_SECONDS)
 async def update_master_cache():
-    client = get_client()
-    actions.update_master_cache(client,config.SHEET_ID)
+    try:
+        status = await async_actions.update_master_cache()
+    except asyncio.TimeoutError:
+        print("Warning: Master_Roster cache refresh timed out")
+        return
+
+    seconds = update_master_cache.seconds
+    if status in ("patched", "reloaded"):
+        seconds = max(config.ROSTER_REFRESH_MIN_SECONDS, seconds / 2)
+    elif status == "unchanged":
+        seconds = min(config.ROSTER_REFRESH_MAX_SECONDS, seconds * 1.5)
+    else:
+        print(f"Warning: Master_Roster cache refresh failed: {status}")
+    if seconds != update_master_cache.seconds:
+        update_master_cache.change_interval(seconds=seconds)
 
 # The /test_quest command
 @bot.tree.command(name="test_quest", description="Test a quest announcement", guild=GUILD_ID)
@@ -207,8 +307,7 @@ async def update_master_cache():
 @app_commands.checks.has_role(config.OFFICER_ROLE_ID)
 async def test_quest(interaction: discord.Interaction, type: str):
     await interaction.response.defer(ephemeral=True)
-    client = get_client()
-    quest = actions.get_random_quest(client, config.SHEET_ID, type) #
+    quest = await async_actions.get_random_quest(type)
 
     if quest:
         embed = format_quest_embed(quest, type)
@@ -231,8 +330,7 @@ async def test_quest(interaction: discord.Interaction, type: str):
 @app_commands.checks.has_role(config.OFFICER_ROLE_ID)
 async def refresh_quest(interaction: discord.Interaction, type: str):
     await interaction.response.defer(ephemeral=True)
-    client = get_client()
-    quest = actions.get_random_quest(client, config.SHEET_ID, type) #
+    quest = await async_actions.get_random_quest(type)
 
     if quest:
         channel = bot.get_channel(config.QUEST_CHANNEL_ID)
@@ -254,8 +352,7 @@ async def refresh_quest(interaction: discord.Interaction, type: str):
 async def post_specific_quest(interaction: discord.Interaction, type: str, name: str):
     await interaction.response.defer(ephemeral=True)
 
-    client = get_client()
-    quest = actions.get_specific_quest(client, config.SHEET_ID, type, name)
+    quest = await async_actions.get_specific_quest(type, name)
 
     if quest:
         channel = bot.get_channel(config.QUEST_CHANNEL_ID)
@@ -271,8 +368,36 @@ async def post_specific_quest(interaction: discord.Interaction, type: str, name:
     else:
         await interaction.followup.send(f"❌ Error: Could not find a quest named '{name}' in the {type} sheet.")
 
+# The /quest_schedule command
+@bot.tree.command(name="quest_schedule", description="Preview the upcoming quest schedule", guild=GUILD_ID)
+@app_commands.describe(type="Choose Daily or Weekly")
+@app_commands.choices(type=[
+    app_commands.Choice(name="Daily", value="Daily_Quests"),
+    app_commands.Choice(name="Weekly", value="Weekly_Quests")
+])
+@app_commands.checks.has_role(config.OFFICER_ROLE_ID)
+async def quest_schedule(interaction: discord.Interaction, type: str):
+    await interaction.response.defer(ephemeral=True)
+    result = await async_actions.get_quest_schedule(type)
+    await interaction.followup.send(result)
+
+# The /schedule_quest command
+@bot.tree.command(name="schedule_quest", description="Set the quest for an upcoming date", guild=GUILD_ID)
+@app_commands.describe(type="Choose Daily or Weekly", date="Date to post on (YYYY-MM-DD)", name="Exactly match the Quest Name from the sheet")
+@app_commands.choices(type=[
+    app_commands.Choice(name="Daily", value="Daily_Quests"),
+    app_commands.Choice(name="Weekly", value="Weekly_Quests")
+])
+@app_commands.checks.has_role(config.OFFICER_ROLE_ID)
+async def schedule_quest(interaction: discord.Interaction, type: str, date: str, name: str):
+    await interaction.response.defer(ephemeral=True)
+    result = await async_actions.schedule_quest(type, date, name)
+    await interaction.followup.send(result)
+
 # Store the message ID for the access message
 ACCESS_MESSAGE_ID = 1465869081210261770 # Replace with your message ID after posting
+# {message ID: author ID} for the newest quest submissions (see remember_submission)
+recent_submissions = OrderedDict()
 
 @bot.event
 async def on_raw_reaction_add(payload):
@@ -284,14 +409,11 @@ async def on_raw_reaction_add(payload):
         if member and not member.bot:
             role = guild.get_role(config.BATTLE_PASS_ROLE_ID)
             if role and role not in member.roles:
-                try:
-                    await member.add_roles(role)
+                if await role_assigner.add_role(member, role):
                     try:
                         await member.send("🎉 You now have access to the JSA Battle Pass channels!")
                     except:
                         pass  # Can't DM, that's okay
-                except Exception as e:
-                    print(f"Error assigning role: {e}")
         return
 
     quest_channels = {
@@ -302,51 +424,84 @@ async def on_raw_reaction_add(payload):
     if payload.channel_id not in quest_channels or str(payload.emoji) != config.APPROVE_EMOJI:
         return
 
-    # Gets the member who reacted (the officer)
+    # Already approved? Answered from the local ledger before touching Discord
+    message_id = str(payload.message_id)
+    if async_actions.quest_already_approved(message_id):
+        return
+
+    # Gets the member who reacted (the officer); the gateway usually sends it along
     guild = bot.get_guild(payload.guild_id)
-    member = guild.get_member(payload.user_id)
+    member = payload.member or guild.get_member(payload.user_id)
     if member is None:
         member = await guild.fetch_member(payload.user_id)
 
     # Verifies the officer role
-    if not any(role.name == config.OFFICER_ROLE for role in member.roles):
+    if not any(role.id == config.OFFICER_ROLE_ID for role in member.roles):
         return # If not an officer, ignore reaction
 
-    # Process the Quest
+    # Finds who posted the submission without fetching the message if possible
     channel = bot.get_channel(payload.channel_id)
-    message = await channel.fetch_message(payload.message_id)
-
-    if message.author.bot:
-        return
+    author_id = recent_submissions.get(payload.message_id)
+    if author_id is None:
+        # Newer gateways send the author's ID too; the member cache says if it's a bot
+        author = guild.get_member(getattr(payload, "message_author_id", None) or 0)
+        if author is None:
+            author = (await channel.fetch_message(payload.message_id)).author
+        if author.bot:
+            return
+        author_id = author.id
 
     # Get quest type and XP amount
     reason, xp_to_give = quest_channels[payload.channel_id]
+    mention = f"<@{author_id}>"
 
-    # Awards XP with audit logging (prevents double-dipping)
-    client = get_client()
-    result = actions.award_quest_xp(
-        client=client,
-        master_sheet_id=config.SHEET_ID,
-        discord_id=str(message.author.id),
-        xp_amount=xp_to_give,
-        officer_id=str(payload.user_id),
-        message_id=str(payload.message_id),
-        reason=reason
-    )
-
-    # Check if this was a duplicate approval
-    if "Already Approved" in result:
-        # Silently ignore duplicate approvals (don't spam the channel)
+    status, preview = async_actions.check_quest_approval(str(author_id), message_id, xp_to_give)
+    if status == "duplicate":
         return
+    if status == "ready":
+        # Reply right away; the award itself is written in the background
+        async def report_failure(result):
+            await channel.send(f"{mention} ⚠️ Your quest XP could not be recorded: {result}")
+
+        if not async_actions.queue_quest_award(
+            str(author_id), xp_to_give, str(payload.user_id), message_id, reason, on_error=report_failure
+        ):
+            return # Another officer's approval is already queued
+        new_xp, new_rank = preview
+        result = f"Added {xp_to_give} XP! New Total: {new_xp} ({new_rank})"
+    else:
+        # Awards XP with audit logging (prevents double-dipping)
+        result = await async_actions.award_quest_xp(
+            discord_id=str(author_id),
+            xp_amount=xp_to_give,
+            officer_id=str(payload.user_id),
+            message_id=message_id,
+            reason=reason
+        )
+
+        # Check if this was a duplicate approval
+        if "Already Approved" in result:
+            # Silently ignore duplicate approvals (don't spam the channel)
+            return
 
     response_message = (
         f"⚔️ **Quest Accomplished!** 🏯\n"
-        f"Hello {message.author.mention}! An officer has verified your submission.\n"
+        f"Hello {mention}! An officer has verified your submission.\n"
         f"✨ **{result}**"
     )
 
     await channel.send(response_message)
 
+# Remembers who posted recent quest submissions, so approving one doesn't
+# have to fetch the message just to find its author
+@bot.listen("on_message")
+async def remember_submission(message):
+    if message.channel.id not in (config.DAILY_SUBMISSION_ID, config.WEEKLY_SUBMISSION_ID) or message.author.bot:
+        return
+    recent_submissions[message.id] = message.author.id
+    while len(recent_submissions) > config.SUBMISSION_CACHE_SIZE:
+        recent_submissions.popitem(last=False)
+
 # Automatically give new members access to JSA Battle Pass
 @bot.event
 async def on_member_join(member):
@@ -358,17 +513,26 @@ async def on_member_join(member):
     role = guild.get_role(config.BATTLE_PASS_ROLE_ID)
 
     if role:
-        try:
-            await member.add_roles(role)
-            print(f"Auto-assigned Battle Pass role to {member.name}")
-        except Exception as e:
-            print(f"Error auto-assigning role to {member.name}: {e}")
+        # Queued so a wave of joins after an event is spread out under the rate limit
+        role_assigner.enqueue(member, role)
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    finish_command_metrics(interaction)
 
 # Handles permission errors
 @bot.tree.error
 async def on_command_error(interaction: discord.Interaction, error):
+    finish_command_metrics(interaction, getattr(error, "original", error))
     if isinstance(error, commands.MissingRole):
         await interaction.response.send_message("❌ **Access Denied:** You do not have the 'Officer' role required to use this command.", ephemeral=True)
+    elif isinstance(getattr(error, "original", None), asyncio.TimeoutError):
+        # A Sheets operation ran past its timeout (see SHEETS_TIMEOUTS in config.py)
+        timeout_message = "⌛ Google Sheets is taking too long to respond. Please try again in a minute."
+        if interaction.response.is_done():
+            await interaction.followup.send(timeout_message, ephemeral=True)
+        else:
+            await interaction.response.send_message(timeout_message, ephemeral=True)
     else:
         # Log other errors to the terminal
         print(f"Error: {error}")
@@ -448,18 +612,16 @@ async def claim_wordle(interaction: discord.Interaction, share_text: str):
             await interaction.followup.send("Looks like this was X/6 (not completed). No XP rewarded.", ephemeral = True) 
             return
         
-        client = get_client()
-        
         # Prevents double claim error for the same puzzle
-        if actions.wordle_claim_exists(client, config.SHEET_ID, puzzle, interaction.user.id):
+        if await async_actions.wordle_claim_exists(puzzle, interaction.user.id):
             await interaction.followup.send("You already claimed this Wordle.", ephemeral=True)
             return
 
-        # Log first so we don't double award if an error occurs
-        actions.log_wordle_claim(client, config.SHEET_ID, puzzle, interaction.user.id)
-
-        # Reward the user with WORDLE_XP XP
-        result = actions.award_quest_xp(client, config.SHEET_ID, interaction.user.id, config.WORDLE_XP)
+        # Log the claim and reward the user with WORDLE_XP XP as one journaled change
+        result = await async_actions.claim_wordle(puzzle, interaction.user.id, config.WORDLE_XP)
+        if not result.startswith("Added"):
+            await interaction.followup.send(result, ephemeral=True)
+            return
         
         # Send the message that the XP has been rewarded
         await interaction.followup.send(f"✅ Wordle {puzzle} completed. +{config.WORDLE_XP} XP\n{result}")
@@ -476,20 +638,39 @@ async def claim_wordle(interaction: discord.Interaction, share_text: str):
 @app_commands.checks.has_role(config.OFFICER_ROLE_ID)
 async def award_xp(interaction: discord.Interaction, user_mention: str, xp_amount: int, reason: str):
     #print(user_id[2:-1])
-    client = get_client()
-    result = actions.grant_manual_xp(client,config.SHEET_ID,user_mention[2:-1],xp_amount,reason.title(),interaction.user.id)
-    await interaction.response.send_message(result)
+    await interaction.response.defer()
+    result = await async_actions.grant_manual_xp(user_mention[2:-1],xp_amount,reason.title(),interaction.user.id)
+    await interaction.followup.send(result)
 # command to add whether certain members are board members 
 @bot.tree.command(name="sync_board_members", description = "Sync the board member bool on master roster", guild=GUILD_ID)
 @app_commands.checks.has_role(config.OFFICER_ROLE_ID)
 async def sync_board_members(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
 
-    client = get_client()
-    actions.check_if_board_member(client, config.SHEET_ID)
+    await async_actions.check_if_board_member()
 
     await interaction.followup.send("🔄 Board member statuses synced.")
 
+# command to recompute every member's rank from their XP
+@bot.tree.command(name="recompute_ranks", description = "Recompute every member's rank from their XP (officer only)", guild=GUILD_ID)
+@app_commands.checks.has_role(config.OFFICER_ROLE_ID)
+async def recompute_ranks(interaction: discord.Interaction):
+    await interaction.response.defer(ephemeral=True)
+
+    result = await async_actions.recompute_ranks()
+
+    await interaction.followup.send(result)
+
+# Where time is going: per-command, per-action and per-request latency plus cache and queue numbers
+@bot.tree.command(name="bot_stats", description="Shows command latency, Sheets usage and cache stats (officer only)", guild=GUILD_ID)
+@app_commands.checks.has_role(config.OFFICER_ROLE_ID)
+async def bot_stats(interaction: discord.Interaction):
+    uptime = datetime.timedelta(seconds=int(time.time() - metrics.registry.started))
+    embed = discord.Embed(title=stats_embed.TITLE, description=f"Since startup ({uptime} ago)")
+    for name, value in stats_embed.build_fields(metrics.registry, async_actions.runtime_stats(), role_assigner.pending()):
+        embed.add_field(name=name, value=value, inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # Grant Battle Pass access to all members (one-time use)
 @bot.tree.command(name="grant_access_all", description="Grant Battle Pass access to all existing members (officer only)", guild=GUILD_ID)
 @app_commands.checks.has_role(config.OFFICER_ROLE_ID)
@@ -503,27 +684,16 @@ async def grant_access_all(interaction: discord.Interaction):
         await interaction.followup.send("❌ Error: Battle Pass role not found. Check BATTLE_PASS_ROLE_ID in config.py", ephemeral=True)
         return
     
-    count = 0
-    errors = 0
-    
-    for member in guild.members:
-        # Skip bots and members who already have the role
-        if member.bot or role in member.roles:
-            continue
-        
-        try:
-            await member.add_roles(role)
-            count += 1
-        except Exception as e:
-            errors += 1
-            print(f"Error assigning role to {member.name}: {e}")
-    
-    await interaction.followup.send(
-        f"✅ **Access Granted!**\n"
-        f"Successfully granted access to **{count}** members.\n"
-        f"{f'⚠️ {errors} errors occurred.' if errors > 0 else ''}",
-        ephemeral=True
-    )
+    # One followup message, edited as the run goes
+    message = await interaction.followup.send(f"🔄 Granting {role.name}...", ephemeral=True, wait=True)
+
+    async def show_progress(progress):
+        await message.edit(content=progress_text(role, progress))
+
+    progress = await role_assigner.grant_all(guild, role, on_progress=show_progress)
+    print(f"grant_access_all finished: {progress}")
 
 # 4. Run the Bot
-bot.run(config.DISCORD_TOKEN)
\ No newline at end of file
+# (Only when started directly, so bench/load_test.py can import the commands)
+if __name__ == "__main__":
+    bot.run(config.DISCORD_TOKEN)
\ No newline at end of file
@@ -18,11 +18,32 @@ WORDLE_XP = 1
 
 DAILY_QUEST_COOLDOWN = 7
 WEEKLY_QUEST_COOLDOWN = 4
+# How long the cached Daily_Quests / Weekly_Quests catalogs are used before
+# they're read from the sheet again (picks in between don't read the sheet)
+QUEST_CATALOG_TTL_SECONDS = 600
+# Quests are chosen this far ahead and kept in QUEST_PLAN_PATH, so the
+# 08:00 post (QUEST_TIMEZONE) doesn't have to wait on the sheet
+QUEST_PLAN_PATH = "quest_plan.json"
+QUEST_PLAN_DAYS = 14
+QUEST_PLAN_WEEKS = 4
+QUEST_TIMEZONE = "America/New_York"
 
 OFFICER_ROLE = "Officer"
 OFFICER_ROLE_ID = 1465439193261150230 # JSLAY ID: 1465439193261150230
 BATTLE_PASS_ROLE_ID = 963918779249737748 # JSLAY ID: 963918779249737748
 APPROVE_EMOJI = "✅"
+# Recent quest submissions whose author is remembered for fast approvals
+SUBMISSION_CACHE_SIZE = 1000
+
+# --- ROLE ASSIGNMENT ---
+# Battle Pass role grants running at once (bulk runs and joins share the limit)
+ROLE_ASSIGN_CONCURRENCY = 4
+# Retries for a grant that hit a server error or rate limit
+ROLE_ASSIGN_RETRIES = 3
+# Where /grant_access_all records its progress so an interrupted run can resume
+ROLE_CHECKPOINT_PATH = "role_checkpoint.json"
+# How often the /grant_access_all progress message is edited (seconds)
+ROLE_PROGRESS_SECONDS = 5
 
 INSTAGRAM = "https://www.instagram.com/uf_jsa/"
 LINKTREE = "https://linktr.ee/uf.jsa?utm_source=ig&utm_medium=social&utm_content=link_in_bio"
@@ -37,4 +58,94 @@ RANK_THRESHOLDS = {
     500: "JSA Regular",
     750: "JSA Otaku",
     1050: "Honorary JSA Board"
-}
\ No newline at end of file
+}
+
+
+# --- SHEETS I/O ---
+# Sheets calls run on a small thread pool so they never block the event loop
+SHEETS_MAX_WORKERS = 4
+# Seconds a command waits on a Sheets operation before giving up
+SHEETS_TIMEOUT = 20
+# Per-operation overrides (keyed by the sheets.actions function name)
+SHEETS_TIMEOUTS = {
+    "process_event_data": 120,
+    "process_events": 300,
+    "preview_events": 300,
+    "check_if_board_member": 60,
+    "update_master_cache": 60
+}
+
+# --- SHEETS BACKEND ---
+# "google" for the real spreadsheet, "fake" for the in-process stand-in in
+# sheets/fake_backend.py (no credentials.json needed; GOOGLE_SHEET_ID can be any key)
+SHEETS_BACKEND = os.getenv("SHEETS_BACKEND", "google")
+# JSON file the fake workbooks are loaded from and saved to (None keeps them in memory)
+FAKE_SHEETS_PATH = None
+# Seconds every fake API call takes
+FAKE_SHEETS_LATENCY_SECONDS = 0.15
+# Share of fake calls that fail with a 429 quota error, and optional hard
+# per-minute limits (None for no limit); FAKE_SHEETS_SEED makes failures repeatable
+FAKE_SHEETS_QUOTA_ERROR_RATE = 0.0
+FAKE_SHEETS_READS_PER_MINUTE = None
+FAKE_SHEETS_WRITES_PER_MINUTE = None
+FAKE_SHEETS_SEED = 0
+
+# --- SHEETS QUOTA ---
+# Every Sheets request waits for a token from the read or write bucket,
+# which refill at these per-minute rates (the per-user Sheets quota) and
+# hold up to SHEETS_QUOTA_BURST tokens. Quota (429) and server errors are
+# retried up to SHEETS_RETRIES times with exponential backoff plus jitter.
+SHEETS_READS_PER_MINUTE = 60
+SHEETS_WRITES_PER_MINUTE = 60
+SHEETS_QUOTA_BURST = 20
+SHEETS_RETRIES = 5
+SHEETS_BACKOFF_BASE_SECONDS = 1
+SHEETS_BACKOFF_MAX_SECONDS = 32
+
+# --- LOCAL ROSTER ---
+# SQLite copy of Master_Roster that serves reads and takes writes first
+ROSTER_DB_PATH = "roster.db"
+# Master_Roster refresh polling. The interval shrinks toward the minimum
+# while the sheet keeps changing and grows toward the maximum while it doesn't
+ROSTER_REFRESH_SECONDS = 300
+ROSTER_REFRESH_MIN_SECONDS = 60
+ROSTER_REFRESH_MAX_SECONDS = 900
+# More changed rows than this triggers a full reload instead of a patch
+ROSTER_PATCH_LIMIT = 200
+# Ranges sent per batch_update when writing roster changes back to the sheet
+ROSTER_WRITE_CHUNK_RANGES = 500
+# Rows read per request when streaming an event attendance sheet
+EVENT_READ_CHUNK_ROWS = 500
+# Event sheets read at the same time by /process_events
+EVENT_FETCH_WORKERS = 4
+# How long a dry-run preview of an event can still be confirmed (seconds)
+EVENT_PLAN_TTL_SECONDS = 900
+
+# --- WRITE-BEHIND QUEUE ---
+# Roster changes and log rows (Audit_Logs, Wordle_Claims, Attendance_Logs)
+# are sent to the sheet every WRITE_FLUSH_SECONDS, or as soon as
+# WRITE_FLUSH_MAX_PENDING log rows are waiting
+WRITE_FLUSH_SECONDS = 5
+WRITE_FLUSH_MAX_PENDING = 50
+
+# --- WRITE JOURNAL ---
+# Every sheet change is fsync'd here before it is applied and replayed on
+# startup if the bot died before it reached the sheet
+JOURNAL_DIR = "journal"
+JOURNAL_SEGMENT_BYTES = 1_000_000
+
+# --- RESPONSE CACHE ---
+# How many rendered /leaderboard and /xp responses to keep (least recently used are dropped)
+RESPONSE_CACHE_SIZE = 512
+
+# --- DUPLICATE-CHECK LEDGER ---
+# Local index of Audit_Logs and Wordle_Claims used for duplicate checks
+LEDGER_DB_PATH = "ledger.db"
+# How many of the newest Wordle puzzles keep their claim bitsets in memory
+WORDLE_HOT_PUZZLES = 14
+
+# --- METRICS ---
+# Prometheus-format /metrics endpoint (see metrics.py); local only by default,
+# METRICS_PORT = 0 turns it off. /bot_stats shows the same numbers in Discord.
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
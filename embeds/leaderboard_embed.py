@@ -0,0 +1,49 @@
+# Builds the /leaderboard embed text.
+# Entries are rendered one line block at a time into a list, with a running
+# length so a page is closed as soon as the next entry would pass the embed
+# description limit. Nothing is ever re-concatenated, so the cost is linear
+# in the number of entries, and long boards spill onto more pages instead of
+# being cut off.
+
+# Discord's limit is 4096 characters; leave some room to spare
+PAGE_BUDGET = 4000
+SPACER = "\u3164"
+
+TITLE = f"╭━━━ {SPACER*2} ⚔️ **JSA LEADERBOARD** ⚔️ {SPACER*2} ━━━╮\n\n"
+FOOTER = f"\n**╰━━━━━━ {SPACER*7} 🏯 {SPACER*7} ━━━━━━╯**"
+
+
+def format_entry(place, name, xp, rank_name, is_board, mode):
+    nametext = name
+    if mode == "all" and is_board:
+        nametext = "**[Board]** " + nametext
+    medal = "🥇" if place == 1 else "🥈" if place == 2 else "🥉" if place == 3 else "⭐"
+    suffix = "st" if place == 1 else "nd" if place == 2 else "rd" if place == 3 else ")"
+
+    if place <= 3:
+        return (
+            f"{SPACER*6} {medal} {place}{suffix} | {nametext}\n"
+            f"{SPACER*8} ★ {xp} XP ★\n"
+            f"{SPACER*6} {rank_name} (ง•̀o•́)ง \n\n"
+        )
+    return f"{SPACER*2} {medal} {place}) {nametext} ★ {xp} XP ★\n"
+
+
+def render_pages(entries, mode, budget=PAGE_BUDGET):
+    # entries: [(place, name, xp, rank_name, is_board)] from get_leaderboard,
+    # already including anyone tied at the cutoff.
+    # Returns the description text of each page, in order.
+    budget -= len(FOOTER)
+    pages = []
+    lines = []
+    length = 0
+    for place, name, xp, rank_name, is_board in entries:
+        line = format_entry(place, name, xp, rank_name, is_board, mode)
+        if lines and length + len(line) > budget:
+            pages.append("".join(lines) + FOOTER)
+            lines = []
+            length = 0
+        lines.append(line)
+        length += len(line)
+    pages.append("".join(lines) + FOOTER)
+    return pages
@@ -0,0 +1,67 @@
+# Builds the /bot_stats embed text from metrics.registry and the runtime
+# numbers in async_actions.runtime_stats(). Each layer lists its busiest
+# entries by total time, so the top line is where time went.
+
+# Rows shown per layer (the metrics endpoint has all of them)
+TOP_ROWS = 8
+TITLE = "📊 Bot Stats"
+
+
+def ms(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1e3:.0f}ms" if seconds < 10 else f"{seconds:.1f}s"
+
+
+def percent(ratio):
+    return "-" if ratio is None else f"{ratio * 100:.0f}%"
+
+
+def layer_lines(rows, prefix="", top=TOP_ROWS):
+    # rows from metrics.registry.layer_summary(), already sorted by total time
+    if not rows:
+        return "Nothing recorded yet."
+    lines = []
+    for row in rows[:top]:
+        line = (
+            f"`{prefix}{row['name']}` {row['calls']}× · p50 {ms(row['p50'])} · "
+            f"p95 {ms(row['p95'])} · p99 {ms(row['p99'])} · total {ms(row['total_seconds'])}"
+        )
+        if row["errors"]:
+            line += f" · ⚠️ {row['errors']} errors"
+        if row["in_flight"]:
+            line += f" · {row['in_flight']} running"
+        lines.append(line)
+    if len(rows) > top:
+        lines.append(f"...and {len(rows) - top} more")
+    return "\n".join(lines)
+
+
+def runtime_lines(stats, role_grants_pending):
+    quota = stats["sheets_quota"]
+    queue = stats["write_queue"]
+    refreshes = stats["roster_refreshes"]
+    return "\n".join([
+        f"Roster cache: {stats['roster_members']} members · {percent(stats['roster_hit_ratio'])} of refreshes needed no re-read "
+        f"({refreshes['unchanged']} unchanged, {refreshes['patched']} patched, {refreshes['reloaded']} reloaded, {refreshes['error']} failed)",
+        f"Response cache: {percent(stats['response_hit_ratio'])} hits ({stats['responses']['entries']} entries)",
+        "Sheets quota: " + " · ".join(
+            f"{kind} {q['requests']} sent, {q['queue_depth']} waiting, avg wait {ms(q['avg_wait_seconds'])}, "
+            f"{q['quota_errors']} 429s, {q['failed']} failed"
+            for kind, q in quota.items()
+        ),
+        f"Write queue: {queue['pending_rows']} rows and {queue['pending_cells']} cells pending · "
+        f"{queue['flushes']} flushes ({queue['failed_flushes']} failed)",
+        f"Queued quest awards: {stats['queued_awards']} · Role grants pending: {role_grants_pending}"
+    ])
+
+
+def build_fields(registry, stats, role_grants_pending):
+    # [(field name, value)] for the embed; values are cut to Discord's 1024 characters
+    fields = [
+        ("Commands", layer_lines(registry.layer_summary("command"), prefix="/")),
+        ("Sheet actions", layer_lines(registry.layer_summary("action"))),
+        ("Sheets API requests", layer_lines(registry.layer_summary("sheets"))),
+        ("Caches and queues", runtime_lines(stats, role_grants_pending))
+    ]
+    return [(name, value if len(value) <= 1024 else value[:1020].rsplit("\n", 1)[0] + "\n...") for name, value in fields]
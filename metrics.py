@@ -0,0 +1,283 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# In-process metrics for the bot, shown by /bot_stats and served in the
+# Prometheus text format on a local HTTP port (METRICS_HOST/METRICS_PORT).
+#
+# Three layers are timed with track(layer, name):
+#   command - every app command, from the tree's interaction check to
+#             completion or error (labelled by command name)
+#   action  - every sheets.actions function the bot runs (labelled by function)
+#   sheets  - every HTTP request gspread sends, per attempt and not counting
+#             the wait for a quota token (labelled by operation, e.g. values:append)
+# Each gets a latency histogram, an error counter and an in-flight gauge.
+# Numbers other modules already keep (scheduler, write queue, caches) are
+# read when scraped through collectors instead of being copied in here.
+#
+# No prometheus_client dependency: the text format is simple enough and the
+# bot only needs counters, gauges and fixed-bucket histograms.
+
+# Latency buckets in seconds (Discord's 3s ack window sits between 2.5 and 5)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Metric name and label name for each tracked layer
+LAYERS = {
+    "command": ("jsa_command", "command"),
+    "action": ("jsa_action", "action"),
+    "sheets": ("jsa_sheets_request", "op")
+}
+
+
+def error_label(error):
+    # HTTP status for API errors (discord's .status, gspread's .code or response), else the class name
+    status = getattr(error, "status", None)
+    if not isinstance(status, int):
+        status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return str(status) if isinstance(status, int) else type(error).__name__
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction):
+        # Estimate from the buckets (linear within the bucket), like
+        # Prometheus' histogram_quantile, but never above the largest value seen
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            if count and seen + count >= target:
+                if bound == math.inf:
+                    return self.max
+                return min(self.max, lower + (bound - lower) * (target - seen) / count)
+            seen += count
+            lower = bound
+        return self.max
+
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}        # {name: (type, help)}
+        self._values = {}      # {(name, labels): number} for counters and gauges
+        self._histograms = {}  # {(name, labels): Histogram}
+        self._collectors = []
+        self._server = None
+        self.started = time.time()
+
+    def describe(self, name, kind, help_text):
+        self._meta.setdefault(name, (kind, help_text))
+
+    # --- Recording ---
+
+    def inc(self, name, labels=None, amount=1):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, value, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, value, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def value(self, name, labels=None):
+        with self._lock:
+            return self._values.get((name, tuple(sorted((labels or {}).items()))), 0)
+
+    def start(self, layer, name):
+        # For calls that start and finish in different callbacks (app
+        # commands); returns the start time to pass to finish()
+        prefix, label = LAYERS[layer]
+        self.inc(f"{prefix}_in_flight", {label: name})
+        return time.perf_counter()
+
+    def finish(self, layer, name, started, error=None):
+        prefix, label = LAYERS[layer]
+        labels = {label: name}
+        self.inc(f"{prefix}_in_flight", labels, -1)
+        self.observe(f"{prefix}_duration_seconds", time.perf_counter() - started, labels)
+        if error is not None:
+            self.inc(f"{prefix}_errors_total", {label: name, "error": error_label(error)})
+
+    @contextmanager
+    def track(self, layer, name):
+        started = self.start(layer, name)
+        try:
+            yield
+        except BaseException as e:
+            self.finish(layer, name, started, e)
+            raise
+        self.finish(layer, name, started)
+
+    # --- Reading ---
+
+    def add_collector(self, collect):
+        # collect() returns [(name, type, help, labels, value)] read at scrape time
+        self._collectors.append(collect)
+
+    def _collected(self):
+        samples = []
+        for collect in self._collectors:
+            try:
+                samples.extend(collect())
+            except Exception as e:
+                print(f"Warning: Metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+        return samples
+
+    def layer_summary(self, layer):
+        # [{name, calls, errors, in_flight, total_seconds, p50, p95, p99}] for one layer
+        prefix, label = LAYERS[layer]
+        rows = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                if name != f"{prefix}_duration_seconds":
+                    continue
+                key = dict(labels)[label]
+                rows[key] = {
+                    "name": key,
+                    "calls": histogram.count,
+                    "errors": 0,
+                    "in_flight": 0,
+                    "total_seconds": histogram.sum,
+                    "p50": histogram.quantile(0.50),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99)
+                }
+            for (name, labels), value in self._values.items():
+                labels = dict(labels)
+                row = rows.get(labels.get(label))
+                if row is None:
+                    continue
+                if name == f"{prefix}_errors_total":
+                    row["errors"] += value
+                elif name == f"{prefix}_in_flight":
+                    row["in_flight"] = value
+        return sorted(rows.values(), key=lambda row: row["total_seconds"], reverse=True)
+
+    def render(self):
+        # Everything in the Prometheus text exposition format
+        collected = self._collected()
+        families = {}  # {name: [(labels, value)]}, histograms expanded
+        with self._lock:
+            meta = dict(self._meta)
+            for (name, labels), value in self._values.items():
+                families.setdefault(name, []).append((labels, value))
+            for (name, labels), histogram in self._histograms.items():
+                samples = families.setdefault(name, [])
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                    cumulative += count
+                    samples.append((labels + (("le", format_value(bound)),), cumulative, "_bucket"))
+                samples.append((labels, histogram.sum, "_sum"))
+                samples.append((labels, histogram.count, "_count"))
+        for name, kind, help_text, labels, value in collected:
+            meta.setdefault(name, (kind, help_text))
+            families.setdefault(name, []).append((tuple(sorted(labels.items())), value))
+
+        lines = []
+        for name in sorted(families):
+            kind, help_text = meta.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in families[name]:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ""
+                lines.append(f"{name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    # --- HTTP endpoint ---
+
+    def serve(self, host, port):
+        # Serves /metrics from a daemon thread; a port of 0 or None turns it off
+        if not port or self._server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the log
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"Warning: Could not start the metrics endpoint on {host}:{port}: {e}")
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        print(f"Metrics endpoint on http://{host}:{port}/metrics")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+registry = Metrics()
+for layer, (prefix, label) in LAYERS.items():
+    registry.describe(f"{prefix}_duration_seconds", "histogram", f"Time per {layer} call in seconds, by {label}")
+    registry.describe(f"{prefix}_errors_total", "counter", f"{layer.capitalize()} calls that raised, by {label} and error")
+    registry.describe(f"{prefix}_in_flight", "gauge", f"{layer.capitalize()} calls running right now, by {label}")
+registry.describe("jsa_sheets_quota_wait_seconds", "histogram", "Time Sheets requests waited for a quota token, by kind")
+registry.describe("jsa_sheets_pool_wait_seconds", "histogram", "Time actions waited for a free Sheets worker thread")
+registry.describe("jsa_roster_refresh_total", "counter", "Roster cache refreshes by result (unchanged means the cached roster was still current)")
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import time
+
+import discord
+
+# Role assignment shared by /grant_access_all, the access-message reaction
+# and on_member_join.
+#
+# Every add_roles call goes through one semaphore, so a bulk run and a burst
+# of joins together never have more than `concurrency` requests in flight.
+# discord.py already waits out each rate-limit bucket (and retries 429s)
+# internally; keeping the number of parallel calls small means we sit in
+# that bucket instead of queueing hundreds of requests behind it. Server
+# errors and 429s that still come through are retried with backoff.
+#
+# Bulk runs checkpoint the IDs they've finished to `checkpoint_path`, so a
+# run cut off by a restart picks up where it stopped the next time it's
+# started for the same guild and role.
+
+# Finished members between checkpoint writes during a bulk run
+CHECKPOINT_EVERY = 25
+
+
+class RoleAssigner:
+
+    def __init__(self, concurrency, checkpoint_path, retries, progress_seconds):
+        self.concurrency = concurrency
+        self.checkpoint_path = checkpoint_path
+        self.retries = retries
+        self.progress_seconds = progress_seconds
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks = set()  # enqueue() tasks still running
+
+    async def add_role(self, member, role, reason=None):
+        # Gives one member the role. Returns True on success (or if they
+        # already had it), False if Discord refused.
+        if role in member.roles:
+            return True
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    await member.add_roles(role, reason=reason)
+                return True
+            except (discord.Forbidden, discord.NotFound) as e:
+                print(f"Error assigning role to {member.name}: {e}")
+                return False
+            except discord.HTTPException as e:
+                if (e.status != 429 and e.status < 500) or attempt == self.retries:
+                    print(f"Error assigning role to {member.name}: {e}")
+                    return False
+                await asyncio.sleep(2 ** attempt)
+        return False
+
+    def enqueue(self, member, role, reason=None):
+        # Fire-and-forget add_role for event handlers (a burst of joins after
+        # an event queues up on the semaphore instead of hitting Discord at once)
+        task = asyncio.create_task(self._add_logged(member, role, reason))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _add_logged(self, member, role, reason):
+        if await self.add_role(member, role, reason):
+            print(f"Auto-assigned {role.name} role to {member.name}")
+
+    def pending(self):
+        return len(self._tasks)
+
+    # --- Bulk runs ---
+
+    def _load_checkpoint(self, guild_id, role_id):
+        # IDs already handled by an interrupted run for this guild and role
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if checkpoint.get("guild_id") != guild_id or checkpoint.get("role_id") != role_id:
+            return set()
+        return set(checkpoint.get("done", []))
+
+    def _save_checkpoint(self, guild_id, role_id, done):
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"guild_id": guild_id, "role_id": role_id, "done": sorted(done)}, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    async def grant_all(self, guild, role, on_progress=None, reason=None):
+        # Gives the role to every non-bot member of the guild who doesn't
+        # have it. on_progress(progress) is awaited at most every
+        # progress_seconds and once at the end, with the same dict that is
+        # returned: granted, failed, total (this run), resumed (members a
+        # previous run already did) and finished.
+        done = self._load_checkpoint(guild.id, role.id)
+        todo = [
+            member for member in guild.members
+            if not member.bot and role not in member.roles and member.id not in done
+        ]
+        progress = {"granted": 0, "failed": 0, "total": len(todo), "resumed": len(done), "finished": False}
+        if done:
+            print(f"Resuming role assignment for {role.name}: {len(done)} members already done")
+        members = iter(todo)
+        last_report = time.monotonic()
+        since_checkpoint = 0
+
+        async def report(force=False):
+            nonlocal last_report
+            if on_progress is None:
+                return
+            if force or time.monotonic() - last_report >= self.progress_seconds:
+                last_report = time.monotonic()
+                try:
+                    await on_progress(dict(progress))
+                except discord.HTTPException as e:
+                    print(f"Warning: Could not update role assignment progress: {e}")
+
+        async def worker():
+            nonlocal since_checkpoint
+            for member in members:
+                if await self.add_role(member, role, reason):
+                    progress["granted"] += 1
+                    done.add(member.id)
+                else:
+                    progress["failed"] += 1
+                since_checkpoint += 1
+                if since_checkpoint >= CHECKPOINT_EVERY:
+                    since_checkpoint = 0
+                    self._save_checkpoint(guild.id, role.id, done)
+                await report()
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(todo)) or 1)))
+        # Failed members are left out of the checkpoint's done list, so a
+        # rerun tries them again; a clean run leaves nothing to resume
+        if progress["failed"]:
+            self._save_checkpoint(guild.id, role.id, done)
+        else:
+            self._clear_checkpoint()
+        progress["finished"] = True
+        await report(force=True)
+        return progress
+
+
+def progress_text(role, progress):
+    # Followup text for a bulk run, edited in place as it goes
+    finished = progress["finished"]
+    handled = progress["granted"] + progress["failed"]
+    header = "✅ **Access Granted!**" if finished else f"🔄 Granting {role.name}..."
+    lines = [header, f"Granted to **{progress['granted']}** of {progress['total']} members ({handled} handled)."]
+    if progress["resumed"]:
+        lines.append(f"Picked up from an earlier run ({progress['resumed']} members were already done).")
+    if progress["failed"]:
+        lines.append(f"⚠️ {progress['failed']} errors occurred." + (" Run the command again to retry them." if finished else ""))
+    return "\n".join(lines)
@@ -1,30 +1,305 @@
 import re 
 import gspread 
-import random
 import math
 import config
+import metrics
+import threading
+import time
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from zoneinfo import ZoneInfo
+from sheets.client import open_worksheet, get_modified_time, scheduler
+from sheets.roster_store import (
+    RosterStore, normalize_email, parse_xp, first_row_of_range, sheet_values,
+    DIRTY_DISCORD_ID, DIRTY_TOTAL_XP, DIRTY_RANK
+)
+from sheets.write_queue import WriteQueue
+from sheets.journal import Journal
+from sheets.ledger import AuditLedger
+from sheets.leaderboard import Leaderboard
+from sheets.response_cache import ResponseCache
+from sheets.quests import QuestCatalog
+from sheets.quest_plan import QuestPlan, daily_dates, weekly_dates, parse_date
+from sheets import ranks
+from embeds import leaderboard_embed
+from wordle.claim_index import WordleClaimIndex
 
-master_cache = [""]
 # --- HEADER CONFIGURATION ---
 MASTER_HEADERS = ['Name', 'Email', 'Year', 'Discord_ID', 'Total_XP', 'Rank']
 AUDIT_HEADERS = ['Message_ID','Timestamp','Officer_ID','Recipient_ID','XP_Amount','Reason']
+HEADER_ROWS = 1
+
+def sheet_row(index):
+    # Converts a 0-based index from get_all_records() into the sheet's row number
+    # (1-indexed, and the header takes up the first row)
+    return index + HEADER_ROWS + 1
+
+def index_member(member, by_id, by_discord, by_email):
+    # Adds a member to the id, Discord ID and email indexes (the first
+    # member with a given Discord ID or email keeps it)
+    by_id[member["id"]] = member
+    discord_id = str(member["Discord_ID"]).strip()
+    if discord_id:
+        by_discord.setdefault(discord_id, member)
+    email = normalize_email(member["Email"])
+    if email:
+        by_email.setdefault(email, member)
+
+class Roster:
+    # In-memory view of Master_Roster with hash indexes by Discord ID and by
+    # normalized email. Built once per cache refresh from the local store and
+    # updated in place on every write, so lookups never scan the roster.
+    # Each member is a dict shaped like a get_all_records() row plus its
+    # store id and sheet row_num. The pre-sorted leaderboard views are kept
+    # up to date alongside the indexes.
+    # `version` goes up on every change and member_version(id) tells when one
+    # member last changed; cached responses are checked against them.
+
+    def __init__(self, store):
+        self.store = store
+        # Drive modifiedTime of the spreadsheet as of the last refresh
+        self.modified_time = None
+        # modifiedTime at which every member's row_num was last checked
+        # against the sheet (by a refresh or by remap_rows)
+        self.rows_checked_time = None
+        self._lock = threading.RLock()
+        self._members = {}     # {member_id: member}
+        self._by_discord = {}  # {discord_id: member}
+        self._by_email = {}    # {normalized email: member}
+        self.leaderboard = Leaderboard()
+        self.version = 0
+        self._reloaded_version = 0
+        self._member_versions = {}  # {member_id: version of its last change}
+
+    def get(self, member_id):
+        return self._members.get(member_id)
+
+    def resolve(self, member):
+        # The roster's current entry for a member looked up earlier, or None
+        # if they're no longer on it. A full reload gives members new ids, so
+        # an id only counts if it still has the same email and Discord ID;
+        # otherwise the member is found again by email, then by Discord ID.
+        with self._lock:
+            email = normalize_email(member["Email"])
+            discord_id = str(member["Discord_ID"]).strip()
+            current = self._members.get(member["id"])
+            if (current is not None and normalize_email(current["Email"]) == email
+                    and str(current["Discord_ID"]).strip() == discord_id):
+                return current
+            if email:
+                return self.get_by_email(email)
+            return self.get_by_discord_id(discord_id) if discord_id else None
+
+    @contextmanager
+    def locked(self):
+        # Keeps refreshes and other writers out while a caller resolves
+        # members and then writes to them
+        with self._lock:
+            yield
+
+    def member_version(self, member_id):
+        return max(self._member_versions.get(member_id, 0), self._reloaded_version)
+
+    def _touch(self, member_id):
+        self.version += 1
+        self._member_versions[member_id] = self.version
+
+    @contextmanager
+    def batch(self, op_id=None):
+        # Applies a group of writes as one store transaction (see RosterStore.batch)
+        with self._lock:
+            try:
+                with self.store.batch(op_id):
+                    yield
+            except Exception:
+                # The transaction rolled back, so drop any in-place edits too
+                self.refresh()
+                raise
+
+    def refresh(self):
+        # Rebuilds the indexes from the store. Lookups don't take the lock,
+        # so the new indexes are built on the side and swapped in at once;
+        # a reader sees the old roster or the new one, never a half-built one.
+        with self._lock:
+            members = self.store.all_members()
+            by_id, by_discord, by_email = {}, {}, {}
+            for member in members:
+                index_member(member, by_id, by_discord, by_email)
+            self.leaderboard.rebuild(members)
+            self._members, self._by_discord, self._by_email = by_id, by_discord, by_email
+            self.version += 1
+            self._reloaded_version = self.version
+            self._member_versions = {}
+
+    def load(self, records):
+        # Replaces the roster with a fresh get_all_records() read of the sheet
+        with self._lock:
+            dropped = self.store.load([(sheet_row(i), row) for i, row in enumerate(records)])
+            self.refresh()
+        report_dropped(dropped)
+
+    def remap_rows(self, keys):
+        # Moves members to the rows that hold them on the sheet now (see RosterStore.remap_rows)
+        with self._lock:
+            moved, dropped = self.store.remap_rows(keys)
+            self.refresh()
+        report_dropped(dropped)
+        return moved
+
+    def changed_rows(self, records):
+        # Compares a fresh get_all_records() read with the roster.
+        # Returns the (row_num, record) pairs that differ, or None when rows
+        # were removed or too much changed, meaning a full load() is simpler.
+        by_row = {m["row_num"]: m for m in self._members.values() if m["row_num"] is not None}
+        if len(records) < len(by_row):
+            return None
+        changed = []
+        for i, row in enumerate(records):
+            row_num = sheet_row(i)
+            member = by_row.get(row_num)
+            if member is None or sheet_values(member) != sheet_values(row):
+                if member is not None and normalize_email(member["Email"]) != normalize_email(row.get("Email")):
+                    # Someone else is on this row now (rows were deleted,
+                    # inserted or sorted), so patching by row would mix members up
+                    return None
+                changed.append((row_num, row))
+                if len(changed) > config.ROSTER_PATCH_LIMIT:
+                    return None
+        return changed
+
+    def patch(self, rows):
+        # Applies just the changed sheet rows and re-indexes those members
+        with self._lock:
+            for member_id in self.store.patch(rows):
+                old = self._members.get(member_id)
+                if old is not None:
+                    self._unindex(old)
+                self._index(self.store.get(member_id))
+                self._touch(member_id)
+
+    def _index(self, member):
+        index_member(member, self._members, self._by_discord, self._by_email)
+        self.leaderboard.update(member)
+
+    def _unindex(self, member):
+        self._members.pop(member["id"], None)
+        self.leaderboard.remove(member["id"])
+        discord_id = str(member["Discord_ID"]).strip()
+        if self._by_discord.get(discord_id) is member:
+            del self._by_discord[discord_id]
+        email = normalize_email(member["Email"])
+        if self._by_email.get(email) is member:
+            del self._by_email[email]
+
+    # --- Lookups ---
+
+    def get_by_discord_id(self, discord_id):
+        return self._by_discord.get(str(discord_id).strip())
+
+    def get_by_email(self, email):
+        return self._by_email.get(normalize_email(email))
+
+    def members(self):
+        return list(self._members.values())
+
+    def __len__(self):
+        return len(self._members)
+
+    # --- Writes (store first, then the in-memory row) ---
+
+    def add_xp(self, member, xp_amount):
+        with self._lock:
+            new_xp, new_rank = self.store.add_xp(member["id"], xp_amount, calculate_rank)
+            if new_xp is not None:
+                member["Total_XP"] = new_xp
+                member["Rank"] = new_rank
+                self.leaderboard.update(member)
+                self._touch(member["id"])
+            return new_xp, new_rank
+
+    def link_discord(self, member, discord_id):
+        with self._lock:
+            discord_id = str(discord_id).strip()
+            self.store.link_discord(member["id"], discord_id)
+            member["Discord_ID"] = discord_id
+            self._by_discord.setdefault(discord_id, member)
+            self._touch(member["id"])
+
+    def add_member(self, name, email, year, discord_id, total_xp, rank):
+        with self._lock:
+            member_id = self.store.add_member(name, email, year, discord_id, total_xp, rank)
+            member = self.store.get(member_id)
+            self._index(member)
+            self._touch(member_id)
+            return member
+
+    def set_ranks(self, ranks):
+        with self._lock:
+            self.store.set_ranks(ranks)
+            for member_id, rank in ranks.items():
+                if member_id in self._members:
+                    self._members[member_id]["Rank"] = rank
+                    self._touch(member_id)
+
+    def set_board_flags(self, flags):
+        with self._lock:
+            self.store.set_board_flags(flags)
+            for member_id, flag in flags.items():
+                if member_id in self._members:
+                    self._members[member_id]["Board_Member"] = flag
+                    self.leaderboard.update(self._members[member_id])
+                    self._touch(member_id)
+
+    def mark_synced(self, records, first_new_row=None):
+        with self._lock:
+            assigned = self.store.mark_synced(records, first_new_row)
+            for member_id, row_num in assigned.items():
+                if member_id in self._members:
+                    self._members[member_id]["row_num"] = row_num
+
+# Local copy of Master_Roster that serves every roster read and write
+store = RosterStore(config.ROSTER_DB_PATH)
+roster = Roster(store)
+# Serve whatever the last run saved until the first refresh from the sheet
+roster.refresh()
+
+# Buffers log rows and batches roster writes (see flush_writes)
+write_queue = WriteQueue(config.WRITE_FLUSH_SECONDS, config.WRITE_FLUSH_MAX_PENDING)
+# Only one thread may push roster rows at a time, or new members get appended
+# twice; reloads from the sheet hold it too (see update_master_cache)
+sync_lock = threading.Lock()
+# Every change is journaled before it's applied (see apply_change)
+journal = Journal(config.JOURNAL_DIR, config.JOURNAL_SEGMENT_BYTES)
+journal_replayed = False
+
+# Rendered /leaderboard and /xp responses, valid while the roster version matches
+responses = ResponseCache(config.RESPONSE_CACHE_SIZE)
+
+ledger = AuditLedger(config.LEDGER_DB_PATH)
+wordle_claims = WordleClaimIndex(config.LEDGER_DB_PATH, config.WORDLE_HOT_PUZZLES)
+# Held from a duplicate check (audit, Wordle or event) until the new row is indexed
+claim_lock = threading.Lock()
+# Event sheets applied since startup (their Attendance_Logs rows may not be read back yet)
+applied_events = set()
+# Dry-run plans waiting for an officer to confirm them: {plan_id: plan}
+event_plans = {}
+# Cached Daily_Quests / Weekly_Quests catalogs, {sheet name: QuestCatalog}
+quest_catalogs = {}
+quest_lock = threading.Lock()
+# Quests chosen ahead of time for the upcoming daily / weekly posts
+quest_plan = QuestPlan(config.QUEST_PLAN_PATH)
+plan_lock = threading.Lock()
 
 def calculate_rank(xp):
     # Calculates the rank name based on XP thresholds.
-    sorted_thresholds = sorted(config.RANK_THRESHOLDS.keys(), reverse=True)
-    for threshold in sorted_thresholds:
-        if xp >= threshold:
-            return config.RANK_THRESHOLDS[threshold]
-    return "Newcomer"
+    return ranks.rank_for(xp)
 
 def get_next_rank_info(xp):
     # Returns the next rank threshold and name, or None if at max rank
-    sorted_thresholds = sorted(config.RANK_THRESHOLDS.keys())
-    for threshold in sorted_thresholds:
-        if xp < threshold:
-            return threshold, config.RANK_THRESHOLDS[threshold]
-    return None, None  # Already at max rank
+    info = ranks.rank_info(xp)
+    return info.next_floor, info.next_rank
 
 def generate_progress_bar(current_xp, current_threshold, next_threshold):
     # Generates a 10-character ASCII progress bar
@@ -55,429 +330,840 @@ def get_id_from_url(url):
     except:
         return None
     
-def find_email_column(records):
-    # Scans the first row of data to find which key looks like an email 
-    if not records: 
-        return None
-    
-    # Gets the keys (headers) from the first row
-    headers = records[0].keys()
-
+def find_email_column(headers):
+    # Scans the header row to find which column looks like an email 
     for header in headers:
-        clean_header = header.lower().strip()
+        clean_header = str(header).lower().strip()
         # Looks for email, uf email, email address
         if "email" in clean_header:
             return header
     return None
 
-def find_name_column(records):
-    # Scans the first row of data to find which key looks like a name
-    if not records:
-        return None
-    
-    # Gets the keys (headers) from the first row
-    headers = records[0].keys()
-
+def find_name_column(headers):
+    # Scans the header row to find which column looks like a name
     for header in headers:
-        clean_header = header.lower().strip()
+        clean_header = str(header).lower().strip()
         # Looks for name, full name, first name, etc. but excludes username
         if "name" in clean_header and "user" not in clean_header:
             return header
     return None
 
+def column_letter(number):
+    # 1 -> "A", 26 -> "Z", 27 -> "AA"
+    letters = ""
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def iter_sheet_records(worksheet, headers, chunk_rows):
+    # Yields the data rows under `headers` as dicts, reading chunk_rows rows
+    # per request so a large sheet is never held in memory all at once.
+    # Stops at the end of the grid or at the first completely empty chunk.
+    last_column = column_letter(max(len(headers), 1))
+    last_row = worksheet.row_count
+    start = HEADER_ROWS + 1
+    while start <= last_row:
+        end = min(start + chunk_rows - 1, last_row)
+        values = worksheet.get(f"A{start}:{last_column}{end}")
+        if not values:
+            return
+        for row in values:
+            yield dict(zip(headers, list(row) + [""] * (len(headers) - len(row))))
+        start = end + 1
+
+def processed_event_ids(log_sheet):
+    # Event IDs in Column A of Attendance_Logs, still waiting in the write
+    # queue, or applied by this process already (one column read in total)
+    processed = set(applied_events)
+    processed.update(row[0] for row in write_queue.pending_rows("Attendance_Logs"))
+    try:
+        processed.update(log_sheet.col_values(1))
+    except Exception as e:
+        print(f"Warning: Could not read Attendance_Logs: {e}")
+    return processed
+
 def is_event_processed(log_sheet, event_id):
     # Checks if the event_id already exists in Column A of Attendance_Logs
-    try:
-        # Get all IDs from the first column
-        processed_ids = log_sheet.col_values(1) 
-        return event_id in processed_ids
-    except:
-        return False
+    return event_id in processed_event_ids(log_sheet)
     
-def log_event_completion(log_sheet, event_id, xp_amount):
-    # Writes the receipt to Attendance_Logs so we don't process it again 
+def attendance_row(event_id, xp_amount):
+    # The receipt for Attendance_Logs so we don't process the event again 
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_sheet.append_row([event_id, timestamp, xp_amount])
-
-def is_quest_processed(audit_sheet, message_id):
-    # Checks if the message_id already exists in Column A of Audit_Logs
-    # Prevents double-dipping when multiple officers react to the same submission
-    try:
-        processed_ids = audit_sheet.col_values(1)
-        return str(message_id) in processed_ids
-    except:
-        return False
-def is_manual_xp_given(audit_sheet,recipient_id, xp,reason,timestamp):
-    try:
-        records = audit_sheet.get_all_records(expected_headers=AUDIT_HEADERS)
-        for i, row in enumerate(records):
-            table_recipient_id = str(row.get("Recipient_ID", 0))
-            table_xp = int(row.get("XP_Amount",0))
-            table_reason = str(row.get("Reason",""))
-            table_timestamp = str(row.get("Timestamp","0000-00-00"))[:10]
-            if(table_recipient_id  == recipient_id and table_xp == xp and table_reason == reason and table_timestamp == timestamp):
-                return True
-        return False
-
-
-    except:
-        return False
+    return [event_id, timestamp, xp_amount]
 
+def load_audit_ledger(client, master_sheet_id):
+    # Seeds the audit ledger from Audit_Logs the first time it's needed.
+    # After that the ledger is kept up to date locally and the sheet isn't read again.
+    if not ledger.loaded:
+        audit_sheet = open_worksheet(client, master_sheet_id, "Audit_Logs")
+        ledger.load(audit_sheet.get_all_values()[1:])
 
+def is_quest_processed(message_id):
+    # Checks if the message_id was already logged to Audit_Logs (or queued for it)
+    # Prevents double-dipping when multiple officers react to the same submission
+    return ledger.has_message(message_id)
 
+def is_manual_xp_given(recipient_id, xp, reason, timestamp):
+    # Checks if the same manual award was already logged today
+    return ledger.has_award(recipient_id, xp, reason, timestamp)
 
-def log_quest_approval(audit_sheet, message_id, officer_id, recipient_id, xp_amount, reason):
-    # Logs the quest approval to Audit_Logs for transparency and tracking
+def audit_row(message_id, officer_id, recipient_id, xp_amount, reason):
+    # The Audit_Logs row for a quest approval or manual award, for transparency and tracking
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    audit_sheet.append_row([
+    return [
         str(message_id),
         timestamp,
         str(officer_id),
         str(recipient_id),
         xp_amount,
         reason
-    ])
-
-def process_event_data(client, master_sheet_id, event_sheet_url, xp_amount):
-    # Opens Event Sheet -> Opens Master Roster -> 
-    # Awards XP to exising members -> Auto-enrolls new members
-
-    # 1. Gets the Event ID
-    event_id = get_id_from_url(event_sheet_url)
-    if not event_id:
-        return "❌Error: Could not parse Sheet ID From that URL."
-    
-    # 2. Opens the Master Roster & Attendance Log
-    try: 
-        master_wb = client.open_by_key(master_sheet_id)
-        master_sheet = master_wb.worksheet("Master_Roster")
-        log_sheet = master_wb.worksheet("Attendance_Logs")
-    except Exception as e: 
-        return f"❌Error opening Master Roster: {e}"
-    
-    # 3. Checks if Event Sheet has been processed
-    if is_event_processed(log_sheet, event_id):
-        return "⚠️ STOP: This event sheet has already been processed! Check 'Attendance_Logs' for details."
+    ]
 
-    # 4. Opens the Event Sheet
+def apply_change(xp=(), enroll=(), appends=(), link=()):
+    # Journals a change and then applies it, so a crash can't leave it half done.
+    #   xp:      [(member, xp_amount)] awards to existing members
+    #   enroll:  [[name, email, year, discord_id, xp]] new members
+    #   appends: [(sheet_name, row)] log rows for the write queue
+    #   link:    [(member, discord_id)] Discord accounts linked to existing members
+    # Returns [(new_xp, new_rank)] for the xp awards, in order, or None if
+    # one of the xp or link members is no longer on the roster. Then the whole
+    # change is rejected, log rows included, and nothing is journaled.
+    with roster.locked():
+        members = [roster.resolve(member) for member, _ in xp]
+        linked = [roster.resolve(member) for member, _ in link]
+        if any(member is None for member in members + linked):
+            return None
+        entry = {
+            "xp": [[member["id"], xp_amount] for member, (_, xp_amount) in zip(members, xp)],
+            "enroll": [list(row) for row in enroll],
+            "appends": [[sheet_name, row] for sheet_name, row in appends],
+            "link": [[member["id"], str(discord_id)] for member, (_, discord_id) in zip(linked, link)]
+        }
+        seq = journal.record(entry)
+        results = _apply_locally(seq, entry)
+    _index_appends(entry["appends"])
+    _queue_appends(seq, entry["appends"])
+    return results
+
+def _apply_locally(seq, entry):
+    # Roster part of a journal entry, as one store transaction tagged with seq
+    results = []
+    with roster.batch(op_id=seq):
+        for member_id, xp_amount in entry["xp"]:
+            member = roster.get(member_id)
+            results.append(roster.add_xp(member, xp_amount) if member else (None, None))
+        # Entries journaled before links were added have no "link" key
+        for member_id, discord_id in entry.get("link", ()):
+            member = roster.get(member_id)
+            if member:
+                roster.link_discord(member, discord_id)
+        enroll_ranks = ranks.ranks_for([row[4] for row in entry["enroll"]])
+        for (name, email, year, discord_id, total_xp), rank in zip(entry["enroll"], enroll_ranks):
+            roster.add_member(name, email, year, discord_id, total_xp, rank)
+    return results
+
+def _index_appends(appends):
+    # Audit rows and Wordle claims are indexed as soon as they're queued
+    for sheet_name, row in appends:
+        if sheet_name == "Audit_Logs":
+            ledger.add(row)
+        elif sheet_name == "Wordle_Claims":
+            wordle_claims.add(row[0], row[1])
+
+def _queue_appends(seq, appends):
+    # The write queue acks seq once these rows are on the sheet
+    for sheet_name, row in appends:
+        write_queue.append(sheet_name, row, seq)
+    if not appends:
+        journal.ack([seq])
+
+def replay_journal(client, master_sheet_id):
+    # Finishes journal entries left unacknowledged by a crash (runs once, at startup).
+    # Roster changes are skipped if their transaction already committed, and
+    # log rows already on the sheet aren't appended again.
+    global journal_replayed
+    if journal_replayed:
+        return 0
+    journal_replayed = True
+
+    entries = journal.unacked()
+    on_sheet = {}  # {sheet_name: {row tuple}}
+    for entry in entries:
+        for sheet_name, row in entry["appends"]:
+            if sheet_name not in on_sheet:
+                values = open_worksheet(client, master_sheet_id, sheet_name).get_all_values()
+                on_sheet[sheet_name] = {_row_key(value) for value in values}
+
+    for entry in entries:
+        seq = entry["seq"]
+        if not store.is_applied(seq):
+            _apply_locally(seq, entry)
+        _index_appends(entry["appends"])
+        missing = [
+            (sheet_name, row) for sheet_name, row in entry["appends"]
+            if _row_key(row) not in on_sheet[sheet_name]
+        ]
+        _queue_appends(seq, missing)
+
+    store.forget_ops_before(journal.oldest_seq())
+    if entries:
+        print(f"Replayed {len(entries)} unfinished journal entries")
+    return len(entries)
+
+def _row_key(row):
+    # Compares rows the way the sheet returns them: strings, no trailing blanks
+    values = [str(value) for value in row]
+    while values and values[-1] == "":
+        values.pop()
+    return tuple(values)
+
+def read_event_attendees(client, event_id):
+    # Streams one event sheet in chunks and returns ([(email, name, year)], error, reads)
+    # where reads is how many read requests it actually sent (counted by the
+    # scheduler, so the metadata fetches and the empty last chunk are included).
+    with scheduler.counting() as sent:
+        attendees, error = _read_event_attendees(client, event_id)
+    return attendees, error, sent["read"]
+
+def _read_event_attendees(client, event_id):
+    # Each email is only counted once per event.
     try: 
         event_sheet = client.open_by_key(event_id).sheet1
-        event_records = event_sheet.get_all_records()
+        headers = event_sheet.row_values(1)
     except Exception as e: 
-        return f"❌Error opening Event Sheet: {e}"
+        return None, f"❌Error opening Event Sheet: {e}"
     
-    # 2. Opens the Master Roster
-    try: 
-        master_wb = client.open_by_key(master_sheet_id)
-        master_sheet = master_wb.worksheet("Master_Roster")
-        master_records = master_sheet.get_all_records(expected_headers=MASTER_HEADERS)
-    except Exception as e: 
-        return f"❌Error opening Master Roster: {e}"
-
-    # 3. Finds the Email Column in the Event Sheet
-    email_col_name = find_email_column(event_records)
+    # Finds the Email and Name Columns in the Event Sheet
+    email_col_name = find_email_column(headers)
     if not email_col_name: 
-        return "❌Error: Could not find a column name 'Email' in the event sheet. "
-    
-    # 4. Finds the Name Column in the Event Sheet
-    name_col_name = find_name_column(event_records)
-    
-        # 6. Creates a lookup directory for Master Roster with current XP
-    # Format: {'email@ufl.edu': {'row_num': int, 'current_xp': int}}
-    master_records = master_sheet.get_all_records()
-    master_map = {}
-    for i, row in enumerate(master_records):
-        email = str(row.get("Email", "")).strip().lower()
-        if email:
-            try:
-                current_xp = int(row.get("Total_XP", 0))
-            except:
-                current_xp = 0
-            discord_id = str(row.get("Discord_ID",0))
-            master_map[email] = {
-                'row_num': i + 2,  # Row number (1-indexed, row 1 is header)
-                'current_xp': current_xp,
-                'discord_id': discord_id
-            }
+        return None, "❌Error: Could not find a column name 'Email' in the event sheet. "
+    name_col_name = find_name_column(headers)
 
-    # 7. Collect all updates for batch processing
-    batch_updates = []  # List of {'range': 'E5:F5', 'values': [[xp, rank]]}
-    new_members = []    # List of [name, email, year, discord_id, xp, rank]
-    
-    new_members_count = 0
-    existing_members_count = 0
-
-    # Process Attendees - collect updates, don't execute yet
-    for row in event_records:
-        attendee_email = str(row[email_col_name]).strip().lower()
-        attendee_name = row.get(name_col_name, "Unknown") if name_col_name else "Unknown" 
-        attendee_year = row.get("Year", "")
-
-        # If email is empty, skip
-        if not attendee_email:
+    seen_emails = set()
+    attendees = []
+    try:
+        for row in iter_sheet_records(event_sheet, headers, config.EVENT_READ_CHUNK_ROWS):
+            attendee_email = str(row[email_col_name]).strip().lower()
+            attendee_name = row.get(name_col_name, "Unknown") if name_col_name else "Unknown" 
+            attendee_year = row.get("Year", "")
+
+            # If email is empty or was already counted for this event, skip
+            if not attendee_email or attendee_email in seen_emails:
+                continue
+            seen_emails.add(attendee_email)
+            attendees.append((attendee_email, attendee_name, attendee_year))
+    except Exception as e:
+        return None, f"❌Error reading Event Sheet: {e}"
+
+    if not attendees:
+        return None, "⚠️ No attendee emails found in the event sheet, so nothing was processed."
+    return attendees, None
+
+def plan_events(client, master_sheet_id, event_sheet_urls, xp_amount):
+    # Reads every event sheet (concurrently) and matches the attendees against
+    # the local roster without changing anything. Returns (plan, error).
+    # The plan merges XP per member across all the events:
+    #   events:    [{event_id, url, attendees, updated, enrolled, error}] per URL
+    #   awards:    {email: [member, xp]} for members already on the roster
+    #   enrollees: {email: [name, email, year, discord_id, xp]} for newcomers
+    #   reads:     read requests it sent (the apply step doesn't read anything)
+    with scheduler.counting() as sent:
+        try: 
+            log_sheet = open_worksheet(client, master_sheet_id, "Attendance_Logs")
+        except Exception as e: 
+            return None, f"❌Error opening Attendance Logs: {e}"
+        processed = processed_event_ids(log_sheet)
+
+    events = []
+    to_read = []
+    for url in event_sheet_urls:
+        event_id = get_id_from_url(url)
+        event = {"event_id": event_id, "url": url, "attendees": 0, "updated": 0, "enrolled": 0, "error": None}
+        events.append(event)
+        if not event_id:
+            event["error"] = "❌Error: Could not parse Sheet ID From that URL."
+        elif event_id in processed:
+            event["error"] = "⚠️ STOP: This event sheet has already been processed! Check 'Attendance_Logs' for details."
+        elif any(other["event_id"] == event_id for other in to_read):
+            event["error"] = "⚠️ This event sheet was listed twice, so it was only counted once."
+        else:
+            to_read.append(event)
+
+    workers = max(1, min(config.EVENT_FETCH_WORKERS, len(to_read)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="event-read") as pool:
+        results = list(pool.map(lambda event: read_event_attendees(client, event["event_id"]), to_read))
+
+    awards = {}
+    enrollees = {}
+    reads = sent["read"]  # Attendance_Logs (and its handle, unless cached)
+    for event, (attendees, error, event_reads) in zip(to_read, results):
+        reads += event_reads
+        if error:
+            event["error"] = error
             continue
+        event["attendees"] = len(attendees)
+        for email, name, year in attendees:
+            member = roster.get_by_email(email)
+            if member:
+                # Scenario A: The Regular (Update XP)
+                awards.setdefault(email, [member, 0])[1] += xp_amount
+                event["updated"] += 1
+            elif email in enrollees:
+                # A newcomer who was at an earlier event in this batch too
+                enrollees[email][4] += xp_amount
+                event["updated"] += 1
+            else:
+                # Scenario B: The Newcomer (Auto-Enroll)
+                enrollees[email] = [name, email, year, "", xp_amount]
+                event["enrolled"] += 1
+
+    plan = {"xp_amount": xp_amount, "events": events, "awards": awards, "enrollees": enrollees, "reads": reads}
+    return plan, None
+
+def apply_event_plan(plan):
+    # Applies a plan from plan_events() as one journaled change: every XP
+    # award and enrollment plus one Attendance_Logs row per event, so the
+    # write queue sends them as one roster sync and one append_rows.
+    # Returns an error message, or None once it's applied.
+    events = [event for event in plan["events"] if not event["error"]]
+    if not events:
+        return "⚠️ None of the event sheets could be processed."
+
+    with claim_lock:
+        pending = {row[0] for row in write_queue.pending_rows("Attendance_Logs")}
+        if any(event["event_id"] in applied_events or event["event_id"] in pending for event in events):
+            return "⚠️ STOP: This event sheet has already been processed! Check 'Attendance_Logs' for details."
+
+        # Members are looked up again by email since the roster may have been
+        # reloaded (or a newcomer may have joined) since the plan was made
+        # Members who left the roster since the preview are skipped and
+        # reported rather than enrolled again under a blank name
+        awards = {}
+        enrollees = []
+        plan["skipped"] = []
+        for email, (member, xp) in plan["awards"].items():
+            member = roster.get_by_email(email)
+            if member:
+                awards[member["id"]] = [member, xp]
+            else:
+                plan["skipped"].append(email)
+        for email, enrollee in plan["enrollees"].items():
+            member = roster.get_by_email(email)
+            if member:
+                awards.setdefault(member["id"], [member, 0])[1] += enrollee[4]
+            else:
+                enrollees.append(list(enrollee))
+
+        results = apply_change(
+            xp=[(member, xp) for member, xp in awards.values()],
+            enroll=enrollees,
+            appends=[("Attendance_Logs", attendance_row(event["event_id"], plan["xp_amount"])) for event in events]
+        )
+        if results is None:
+            return "⚠️ The roster changed while this was being applied, so nothing was written. Please run it again."
+        applied_events.update(event["event_id"] for event in events)
+
+    for (member, xp), (new_xp, _) in zip(awards.values(), results):
+        print(f"Updated {member['Email']}: {new_xp - xp} -> {new_xp}")
+    for enrollee in enrollees:
+        print(f"Added {enrollee[1]}!")
+    for email in plan["skipped"]:
+        print(f"Skipped {email}: no longer on Master_Roster")
+    return None
 
-        if attendee_email in master_map:
-            # Scenario A: The Regular (Update XP)
-            member_info = master_map[attendee_email]
-            row_num = member_info['row_num']
-            current_xp = member_info['current_xp']
-            discord_id = member_info['discord_id']
-            
-            new_xp = current_xp + xp_amount
-            new_rank = calculate_rank(new_xp)
-
-            # Add to batch update list (column A is 1, F is 6)
-            batch_updates.append({
-                'range': f'A{row_num}:F{row_num}',
-                'values': [[attendee_name,attendee_email,attendee_year,discord_id,new_xp, new_rank]]
-            })
-            
-            existing_members_count += 1
-            print(f"Updated {attendee_email}: {current_xp} -> {new_xp}")
-
+def process_event_data(client, master_sheet_id, event_sheet_url, xp_amount):
+    # Opens Event Sheet -> Matches against the local roster -> 
+    # Awards XP to exising members -> Auto-enrolls new members
+    plan, error = plan_events(client, master_sheet_id, [event_sheet_url], xp_amount)
+    if error:
+        return error
+    event = plan["events"][0]
+    if event["error"]:
+        return event["error"]
+
+    error = apply_event_plan(plan)
+    if error:
+        return error
+    updated = event["updated"] - len(plan["skipped"])
+    result = f"✅  Success! Processed Sheet ID {event['event_id'][:5]}... Updated {updated} and added {event['enrolled']}."
+    if plan["skipped"]:
+        result += f" Skipped {len(plan['skipped'])} members who left the roster."
+    return result
+
+def process_events(client, master_sheet_id, event_sheet_urls, xp_amount):
+    # Processes several attendance sheets at once: the sheets are read
+    # concurrently, XP is merged per member and everything is written as one
+    # change. Sheets that can't be processed are skipped and reported.
+    plan, error = plan_events(client, master_sheet_id, event_sheet_urls, xp_amount)
+    if error:
+        return error
+    error = apply_event_plan(plan)
+    return event_summary(plan, error)
+
+def event_summary(plan, error=None):
+    lines = []
+    for event in plan["events"]:
+        label = f"`{event['event_id'][:5]}...`" if event["event_id"] else f"`{event['url'][:30]}`"
+        if event["error"]:
+            lines.append(f"• {label} {event['error']}")
         else:
-            # Scenario B: The Newcomer (Auto-Enroll)
-            new_row = [attendee_name, attendee_email, attendee_year, "", xp_amount, "Newcomer"]
-            new_members.append(new_row)
-            new_members_count += 1
-            print(f"Added {attendee_email}!")
-
-    # 8. Execute batch operations
-    if batch_updates:
-        master_sheet.batch_update(batch_updates)
-        print(f"Batch updated {len(batch_updates)} existing members")
-    
-    if new_members:
-        master_sheet.append_rows(new_members)
-        print(f"Batch added {len(new_members)} new members")
+            lines.append(
+                f"• {label} ✅ {event['attendees']} attendees: "
+                f"updated {event['updated']}, added {event['enrolled']}"
+            )
+    if error:
+        lines.append(error)
+    else:
+        skipped = plan.get("skipped", [])
+        lines.append(
+            f"✅  Success! {len(plan['awards']) + len(plan['enrollees']) - len(skipped)} members received XP "
+            f"({len(plan['enrollees'])} newly added)."
+        )
+        if skipped:
+            lines.append(
+                f"⚠️ Skipped {len(skipped)} members who left the roster since the preview: "
+                + ", ".join(skipped[:10]) + (" ..." if len(skipped) > 10 else "")
+            )
+    return "\n".join(lines)
+
+def plan_diff(plan):
+    # What applying a plan would change, computed from the in-memory roster:
+    #   updated:   [(name or email, old_xp, new_xp, old_rank, new_rank)]
+    #   enrolled:  [(name, email, xp, rank)]
+    #   cost:      API calls and cells the apply step would write
+    updated = []
+    for email, (member, xp) in plan["awards"].items():
+        old_xp = parse_xp(member.get("Total_XP", 0))
+        old_rank = str(member.get("Rank", "")).strip()
+        updated.append((member.get("Name") or email, old_xp, old_xp + xp, old_rank, calculate_rank(old_xp + xp)))
+    enrolled = [
+        (name, email, xp, rank)
+        for (name, email, year, discord_id, xp), rank in zip(
+            plan["enrollees"].values(),
+            ranks.ranks_for([enrollee[4] for enrollee in plan["enrollees"].values()])
+        )
+    ]
 
-    # 9. Log the transaction so it doesn't happen again
-    log_event_completion(log_sheet, event_id, xp_amount)
+    # Existing rows get Total_XP (E) or Total_XP and Rank (E:F) written,
+    # new members one append_rows, and each event one Attendance_Logs row
+    ranges = len(updated)
+    cells = sum(2 if old_rank != new_rank else 1 for _, _, _, old_rank, new_rank in updated)
+    events = [event for event in plan["events"] if not event["error"]]
+    writes = math.ceil(ranges / config.ROSTER_WRITE_CHUNK_RANGES)
+    if enrolled:
+        writes += 1
+        cells += len(enrolled) * len(MASTER_HEADERS)
+    if events:
+        writes += 1
+        cells += len(events) * 3
+    cost = {"reads": plan["reads"], "writes": writes, "cells": cells}
+    return {"updated": updated, "enrolled": enrolled, "cost": cost}
+
+def describe_plan(plan, limit=10):
+    # Dry-run report of a plan: per-event summary, the diff and the API cost
+    diff = plan_diff(plan)
+    lines = ["🧪 **Dry run:** nothing has been written yet."]
+    for event in plan["events"]:
+        label = f"`{event['event_id'][:5]}...`" if event["event_id"] else f"`{event['url'][:30]}`"
+        if event["error"]:
+            lines.append(f"• {label} {event['error']}")
+        else:
+            lines.append(f"• {label} {event['attendees']} attendees")
+
+    rank_ups = [row for row in diff["updated"] if row[3] != row[4]]
+    lines.append(f"\n**{len(diff['updated'])} members updated**, {len(rank_ups)} ranking up:")
+    for name, old_xp, new_xp, old_rank, new_rank in rank_ups[:limit]:
+        lines.append(f"• {name}: {old_xp} → {new_xp} XP ({old_rank} → {new_rank})")
+    if len(rank_ups) > limit:
+        lines.append(f"• ... and {len(rank_ups) - limit} more rank ups")
+
+    lines.append(f"\n**{len(diff['enrolled'])} new members:**")
+    for name, email, xp, rank in diff["enrolled"][:limit]:
+        lines.append(f"• {name} ({email}): {xp} XP ({rank})")
+    if len(diff["enrolled"]) > limit:
+        lines.append(f"• ... and {len(diff['enrolled']) - limit} more")
+
+    cost = diff["cost"]
+    lines.append(
+        f"\n**Cost:** {cost['reads']} read calls for this preview; applying takes "
+        f"{cost['writes']} write calls ({cost['cells']} cells) and no further reads."
+    )
+    return "\n".join(lines)
+
+def save_plan(plan):
+    # Keeps a dry-run plan so it can be applied later without re-reading anything
+    now = time.monotonic()
+    with claim_lock:
+        for plan_id in [k for k, v in event_plans.items() if now - v["created"] > config.EVENT_PLAN_TTL_SECONDS]:
+            del event_plans[plan_id]
+        plan_id = secrets.token_hex(4)
+        event_plans[plan_id] = dict(plan, created=now)
+    return plan_id
+
+def preview_events(client, master_sheet_id, event_sheet_urls, xp_amount):
+    # Dry run of process_events: returns (plan_id, report). plan_id is None
+    # when there is nothing to apply.
+    plan, error = plan_events(client, master_sheet_id, event_sheet_urls, xp_amount)
+    if error:
+        return None, error
+    report = describe_plan(plan)
+    if all(event["error"] for event in plan["events"]):
+        return None, report
+    return save_plan(plan), report
+
+def confirm_event_plan(client, master_sheet_id, plan_id):
+    # Applies a plan saved by preview_events() exactly as it was previewed
+    with claim_lock:
+        plan = event_plans.pop(plan_id, None)
+    if plan is None or time.monotonic() - plan["created"] > config.EVENT_PLAN_TTL_SECONDS:
+        return "⌛ This preview was already applied or has expired. Please run the dry run again."
+    error = apply_event_plan(plan)
+    return event_summary(plan, error)
 
-    return f"✅  Success! Processed Sheet ID {event_id[:5]}... Updated {existing_members_count} and added {new_members_count}."
 def get_join(client, master_sheet_id, email, discord_id):
-    sheet = client.open_by_key(master_sheet_id)
-    master = sheet.worksheet("Master_Roster")
     email = email.strip().lower()
     discord_id = str(discord_id).strip()
 
-    records = master.get_all_records()
-    for i, row in enumerate(records):
-
-        row_discord_id = str(row.get("Discord_ID", "")).strip()
-        
+    # The lookups and the write happen under the same locks as awards, so
+    # two /join calls for the same email or Discord account can't both
+    # enroll, and a roster refresh can't land in between. The link or
+    # enrollment is journaled like any other change.
+    with claim_lock, roster.locked():
         # Case 1: Email and Discord account are already linked.
-        if row_discord_id == discord_id:
+        if roster.get_by_discord_id(discord_id):
             return "✨ **You're already in!** This Discord account is already registered in our system."
 
-        if row.get("Email", "").strip().lower() == email:
-            
+        member = roster.get_by_email(email)
+        if member:
             # Case 2: Email is in Master Roster but is not linked to a Discord account.
-            if row_discord_id == "":
-                row_number = i + 2
-                master.update_cell(row_number, 4, discord_id)
+            if str(member["Discord_ID"]).strip() == "":
+                apply_change(link=[(member, discord_id)])
                 return "🔗 **Account Linked!** We've successfully connected your Discord to your JSA records. Welcome!"
-            
+
             # Case 3: Email is linked to another Discord account.
             return "⚠️ **Oops!** That email is already connected to a different Discord account."
 
-    # Case 4: Email is not in Master Roster. 
-    new_row = [
-        "", # Name
-        email, # Email
-        "", # Year
-        discord_id, # Discord ID
-        0, # Total XP
-        "Newcomer" # Rank
-    ]
-    master.append_row(new_row)
+        # Case 4: Email is not in Master Roster. 
+        apply_change(enroll=[[
+            "", # Name
+            email, # Email
+            "", # Year
+            discord_id, # Discord ID
+            0 # Total XP (Newcomer rank)
+        ]])
     return "🎉 **Welcome aboard!** You've been successfully registered in the JSA XP system. Time to start earning! 🚀"
 
 def get_leaderboard(client, master_sheet_id, top=10, mode="regular"):
-    sheet = client.open_by_key(master_sheet_id)
-    #master = sheet.worksheet("Master_Roster")
-    #records = master_cache.get_all_records()
-    records = master_cache
-
+    # Reads the pre-sorted view instead of sorting the roster.
+    # Returns [(place, name, xp, rank_name, is_board)] for the top entries,
+    # including everyone tied with the last of them.
     leaderboard_data = []
-    for row in records:
+    for place, row in roster.leaderboard.top(top, mode):
         name = str(row.get("Name", "Unknown")).strip()
-        xp_val = row.get("Total_XP", 0)
+        xp = parse_xp(row.get("Total_XP", 0))
         rank_name = str(row.get("Rank", "Unknown")).strip()
         is_board = str(row.get("Board_Member", "N")).strip().upper() == "Y"
+        leaderboard_data.append((place, name, xp, rank_name, is_board))
 
-        # Filtering Logic
-        if mode == "regular" and is_board:
-            continue
-        if mode == "board" and not is_board:
-            continue
-
-        
-        try:
-            xp = int(xp_val)
-        except:
-            xp = 0
-        leaderboard_data.append((name, xp, rank_name,is_board))
-
-    leaderboard_data.sort(key=lambda x: x[1], reverse=True)
     return leaderboard_data
 
+def get_leaderboard_pages(client, master_sheet_id, top=10, mode="regular"):
+    # Rendered /leaderboard pages, reused until the roster changes
+    key = ("leaderboard", mode, top)
+    version = roster.version
+    pages = responses.get(key, version)
+    if pages is None:
+        pages = leaderboard_embed.render_pages(get_leaderboard(client, master_sheet_id, top, mode), mode)
+        responses.put(key, version, pages)
+    return pages
+
 def get_xp(client, master_sheet_id, discord_id):
     discord_id = str(discord_id).strip()
-    sheet = client.open_by_key(master_sheet_id)
-    #master = sheet.worksheet("Master_Roster")
-    #records = master_cache.get_all_records()
-    records = master_cache
-    for row in records:
-        row_discord_id = str(row.get("Discord_ID", "")).strip()
-        if row_discord_id == discord_id:
-            try:
-                xp = int(row.get("Total_XP", 0))
-            except:
-                xp = 0
-            
-            rank = row.get("Rank", "Unknown")
-            
-            # Calculate progress to next rank
-            sorted_thresholds = sorted(config.RANK_THRESHOLDS.keys())
-            current_threshold = 0
-            for threshold in sorted_thresholds:
-                if xp >= threshold:
-                    current_threshold = threshold
-                else:
-                    break
-            
-            next_threshold, next_rank_name = get_next_rank_info(xp)
-            
-            if next_threshold is None:
-                # At max rank
-                progress_bar = generate_progress_bar(xp, current_threshold, None)
-                return (
-                    f"Your rank is **{rank}** and you currently have **{xp} XP**!\n"
-                    f"Progress: {progress_bar}\n"
-                    f"🏆 **You've reached the maximum rank!**"
-                )
-            else:
-                xp_needed = next_threshold - xp
-                progress_bar = generate_progress_bar(xp, current_threshold, next_threshold)
-                return (
-                    f"Your rank is **{rank}** and you currently have **{xp} XP**!\n"
-                    f"Progress to **{next_rank_name}**: {progress_bar}\n"
-                    f"**{xp_needed} XP** needed to rank up!"
-                )
-        
+    row = roster.get_by_discord_id(discord_id)
+    if row:
+        # The rank/progress text only changes with this member's XP, so it's
+        # cached per member; the leaderboard place moves with everyone's XP
+        # and is a cheap lookup, so it's added fresh.
+        key = ("xp", row["id"])
+        version = roster.member_version(row["id"])
+        text = responses.get(key, version)
+        if text is None:
+            text = xp_progress_text(row)
+            responses.put(key, version, text)
+        place, out_of = roster.leaderboard.place(row["id"])
+        if place:
+            text += f"\nYou're **#{place}** of {out_of} on the leaderboard."
+        return text
+
     return "Your Discord account was not found in JSA's XP system.\nPlease register using the join command (Ex: !join email@ufl.edu)."
-def update_master_cache(client,master_sheet_id):
+
+def xp_progress_text(row):
+    try:
+        xp = int(row.get("Total_XP", 0))
+    except:
+        xp = 0
+    
+    rank = row.get("Rank", "Unknown")
+    
+    # Calculate progress to next rank
+    info = ranks.rank_info(xp)
+    current_threshold = info.floor
+    next_threshold, next_rank_name = info.next_floor, info.next_rank
+    
+    if next_threshold is None:
+        # At max rank
+        progress_bar = generate_progress_bar(xp, current_threshold, None)
+        return (
+            f"Your rank is **{rank}** and you currently have **{xp} XP**!\n"
+            f"Progress: {progress_bar}\n"
+            f"🏆 **You've reached the maximum rank!**"
+        )
+    else:
+        xp_needed = next_threshold - xp
+        progress_bar = generate_progress_bar(xp, current_threshold, next_threshold)
+        return (
+            f"Your rank is **{rank}** and you currently have **{xp} XP**!\n"
+            f"Progress to **{next_rank_name}**: {progress_bar}\n"
+            f"**{xp_needed} XP** needed to rank up!"
+        )
+
+def update_master_cache(client,master_sheet_id,force=False):
+    # Pushes pending local writes, then refreshes the roster from the sheet so
+    # edits officers made directly in the spreadsheet are picked up.
+    # The sheet is only re-read when its Drive modifiedTime moved, and when
+    # just a few rows changed only those rows are patched in.
+    # Returns "unchanged", "patched" or "reloaded".
     try:
-        sheet = client.open_by_key(master_sheet_id)
-        global master_cache
-        temp_cache = sheet.worksheet("Master_Roster")
-        master_cache = temp_cache.get_all_records(expected_headers=MASTER_HEADERS)
+        flush_writes(client, master_sheet_id)
+        modified_time = get_modified_time(client, master_sheet_id)
+        if not force and modified_time is not None and modified_time == roster.modified_time:
+            metrics.registry.inc("jsa_roster_refresh_total", {"result": "unchanged"})
+            return "unchanged"
+
+        master = open_worksheet(client, master_sheet_id, "Master_Roster")
+        # Held from the read to the load, so a background sync can't append
+        # rows (or assign their row numbers) in between and have the load
+        # hand those row numbers to someone else
+        with sync_lock:
+            records = master.get_all_records(expected_headers=MASTER_HEADERS)
+            changed = None if force or roster.modified_time is None else roster.changed_rows(records)
+            if changed is None:
+                roster.load(records)
+                status = "reloaded"
+            elif changed:
+                roster.patch(changed)
+                print(f"Patched {len(changed)} changed roster rows")
+                status = "patched"
+            else:
+                status = "unchanged"
+        roster.modified_time = modified_time
+        roster.rows_checked_time = modified_time
+        metrics.registry.inc("jsa_roster_refresh_total", {"result": status})
+        return status
     except Exception as e:
+        metrics.registry.inc("jsa_roster_refresh_total", {"result": "error"})
         return f"Error accessing sheet {e}"
 
-def award_quest_xp(client, master_sheet_id, discord_id, xp_amount, officer_id=None, message_id=None, reason=None):
-    # Finds a user by Discord ID and adds XP to Master Roster
-    # Optional audit logging when officer_id, message_id, and reason are provided
-    try: 
-        sheet = client.open_by_key(master_sheet_id)
-        master = sheet.worksheet("Master_Roster")
-        records = master.get_all_records(expected_headers=MASTER_HEADERS)
-        global master_cache
-        master_cache = records
-        # If message_id is provided, check for duplicate approval (prevents double-dipping)
-        if message_id is not None:
-            try:
-                audit_sheet = sheet.worksheet("Audit_Logs")
-                if is_quest_processed(audit_sheet, message_id):
-                    return "⚠️ Already Approved: This submission has already been verified by an officer."
-            except Exception as e:
-                # If Audit_Logs doesn't exist, continue without duplicate check
-                print(f"Warning: Could not access Audit_Logs: {e}")
-                audit_sheet = None
+# Columns the bot writes on existing Master_Roster rows, in sheet order
+WRITTEN_COLUMNS = [
+    ("D", DIRTY_DISCORD_ID, "Discord_ID"),
+    ("E", DIRTY_TOTAL_XP, "Total_XP"),
+    ("F", DIRTY_RANK, "Rank")
+]
+
+def changed_cell_ranges(row):
+    # batch_update ranges covering only the cells a pending row changed,
+    # with neighbouring columns merged (E and F become E:F)
+    ranges = []
+    run = []
+    for column, bit, field in WRITTEN_COLUMNS + [(None, 0, None)]:
+        if row["dirty_cols"] & bit:
+            run.append((column, row[field]))
+        elif run:
+            row_num = row["row_num"]
+            ranges.append({
+                'range': f'{run[0][0]}{row_num}:{run[-1][0]}{row_num}',
+                'values': [[value for column, value in run]]
+            })
+            run = []
+    return ranges
+
+def report_dropped(records):
+    for record in records:
+        print(
+            f"Warning: {record['Email'] or record['Discord_ID']} is no longer on Master_Roster; "
+            f"dropped their unsynced change (Total_XP {record['Total_XP']}, Rank {record['Rank']})"
+        )
+
+# Master_Roster columns (1-based) that identify a member when rows move
+EMAIL_COLUMN = 2
+DISCORD_ID_COLUMN = 4
+
+def check_roster_rows(client, master_sheet_id, master):
+    # Row numbers in the store are from the last read of the sheet. If the
+    # sheet changed since then (an officer may have deleted, inserted or
+    # sorted rows), the key columns are read again and members are moved to
+    # their current rows before anything is written by row number.
+    modified_time = get_modified_time(client, master_sheet_id)
+    if modified_time is not None and modified_time == roster.rows_checked_time:
+        return
+    emails = master.col_values(EMAIL_COLUMN)
+    discord_ids = master.col_values(DISCORD_ID_COLUMN)
+    keys = [
+        (
+            index + 1,
+            emails[index] if index < len(emails) else "",
+            discord_ids[index] if index < len(discord_ids) else ""
+        )
+        for index in range(HEADER_ROWS, max(len(emails), len(discord_ids)))
+    ]
+    moved = roster.remap_rows(keys)
+    if moved:
+        print(f"Master_Roster rows moved on the sheet; re-mapped {moved} members before writing")
+    roster.rows_checked_time = modified_time
+
+def sync_roster(client, master_sheet_id):
+    # Writes every roster row changed locally back to Master_Roster:
+    # one batch_update for existing rows and one append_rows for new members
+    with sync_lock:
+        return _sync_roster(client, master_sheet_id)
+
+def _sync_roster(client, master_sheet_id):
+    pending = store.pending()
+    if not pending:
+        return 0
+
+    master = open_worksheet(client, master_sheet_id, "Master_Roster")
+    # Both the cell updates and the row numbers given to appended rows rely
+    # on the stored row numbers, so make sure they still match the sheet
+    check_roster_rows(client, master_sheet_id, master)
+    pending = store.pending()
+    if not pending:
+        return 0
+    updates = []
+    new_rows = []
+    for row in pending:
+        if row["row_num"] is None:
+            new_rows.append([row["Name"], row["Email"], row["Year"], row["Discord_ID"], row["Total_XP"], row["Rank"]])
         else:
-            audit_sheet = None
-            
-    except Exception as e:
-        return f"❌ Error accessing Sheet: {e}"
-    
-    for i, row in enumerate(records):
-        # Finds the row matching the user's Discord ID
-        if str(row.get("Discord_ID", "")).strip() == str(discord_id):
-            row_num = i + 2 # Accounts for header and 1-indexing
-            
-            # Calculates new XP
-            try:
-                current_xp = int(row.get("Total_XP", 0))
-            except:
-                current_xp = 0
-            
-            new_xp = current_xp + xp_amount
-            new_rank = calculate_rank(new_xp)
+            updates.extend(changed_cell_ranges(row))
+
+    # batch_update has a request size limit, so big syncs go out in chunks
+    chunk = config.ROSTER_WRITE_CHUNK_RANGES
+    for start in range(0, len(updates), chunk):
+        master.batch_update(updates[start:start + chunk])
+    first_new_row = None
+    if new_rows:
+        response = master.append_rows(new_rows)
+        first_new_row = first_row_of_range(response.get("updates", {}).get("updatedRange"))
+
+    roster.mark_synced(pending, first_new_row)
+    print(f"Synced {len(pending) - len(new_rows)} updated ({len(updates)} ranges) and {len(new_rows)} new roster rows")
+    return len(pending)
+
+def flush_writes(client, master_sheet_id):
+    # Sends everything waiting in the write queue: dirty roster rows as one
+    # batch_update and each log sheet's rows as one append_rows. Journal
+    # entries are acknowledged once their rows are on the sheet.
+    return write_queue.flush(
+        lambda sheet_name: open_worksheet(client, master_sheet_id, sheet_name),
+        lambda: sync_roster(client, master_sheet_id),
+        journal.ack
+    )
 
-            # Updates XP and Rank
-            master.update_cell(row_num, 5, new_xp)
-            master.update_cell(row_num, 6, new_rank)
-            
-            # Log to Audit_Logs if audit parameters are provided
-            if audit_sheet is not None and message_id is not None and officer_id is not None:
-                log_quest_approval(audit_sheet, message_id, officer_id, discord_id, xp_amount, reason or "Manual XP Award")
-
-            return f"Added {xp_amount} XP! New Total: {new_xp} ({new_rank})"
-
-    return "❌ User not found in roster. Please use !join first."
+def award_quest_xp(client, master_sheet_id, discord_id, xp_amount, officer_id=None, message_id=None, reason=None):
+    # Finds a user by Discord ID and adds XP to the local roster
+    # Optional audit logging when officer_id, message_id, and reason are provided
+    audit_ok = False
+    # If message_id is provided, check for duplicate approval (prevents double-dipping)
+    if message_id is not None:
+        try:
+            load_audit_ledger(client, master_sheet_id)
+            audit_ok = True
+            if is_quest_processed(message_id):
+                return "⚠️ Already Approved: This submission has already been verified by an officer."
+        except Exception as e:
+            # If Audit_Logs doesn't exist, continue without duplicate check
+            print(f"Warning: Could not access Audit_Logs: {e}")
+
+    # Log to Audit_Logs if audit parameters are provided
+    appends = []
+    if audit_ok and officer_id is not None:
+        appends.append(("Audit_Logs", audit_row(message_id, officer_id, discord_id, xp_amount, reason or "Manual XP Award")))
+
+    # Updates XP and Rank together with the audit row. Checked again under the
+    # lock in case another officer approved the same submission meanwhile.
+    # The member is looked up under the lock too, so a roster refresh can't
+    # remove them between the lookup and the award.
+    with claim_lock:
+        if audit_ok and is_quest_processed(message_id):
+            return "⚠️ Already Approved: This submission has already been verified by an officer."
+        member = roster.get_by_discord_id(discord_id)
+        results = apply_change(xp=[(member, xp_amount)], appends=appends) if member else None
+    if results is None:
+        return "❌ User not found in roster. Please use !join first."
+    [(new_xp, new_rank)] = results
+
+    return f"Added {xp_amount} XP! New Total: {new_xp} ({new_rank})"
+
+def quest_already_approved(message_id):
+    # Memory-only duplicate check; False when the ledger isn't seeded yet
+    return ledger.loaded and is_quest_processed(message_id)
+
+def check_quest_approval(discord_id, message_id, xp_amount, queued_xp=0):
+    # Memory-only check of a quest approval, made before any Discord fetch or
+    # Sheets call. queued_xp is XP already queued for this member but not on
+    # the roster yet. Returns (status, preview):
+    #   "duplicate": the submission was already approved
+    #   "ready": the award can be queued; preview is the (new_xp, new_rank) it will give
+    #   "unknown": memory can't tell (ledger not seeded yet, or not on the roster)
+    if not ledger.loaded:
+        return "unknown", None
+    if is_quest_processed(message_id):
+        return "duplicate", None
+    member = roster.get_by_discord_id(discord_id)
+    if member is None:
+        return "unknown", None
+    new_xp = parse_xp(member.get("Total_XP", 0)) + queued_xp + xp_amount
+    return "ready", (new_xp, calculate_rank(new_xp))
+
+def quest_catalog(client, master_sheet_id, sheet_name):
+    # The cached catalog for a quest sheet, reloaded with one get_all_values()
+    # once it's older than QUEST_CATALOG_TTL_SECONDS. Returns None if the
+    # sheet has no Last_Used column.
+    with quest_lock:
+        catalog = quest_catalogs.get(sheet_name)
+        if catalog is None:
+            cooldown = config.DAILY_QUEST_COOLDOWN
+            if sheet_name == "Weekly_Quests":
+                cooldown = config.WEEKLY_QUEST_COOLDOWN
+            catalog = quest_catalogs[sheet_name] = QuestCatalog(
+                sheet_name, cooldown, config.QUEST_CATALOG_TTL_SECONDS
+            )
+        if catalog.stale():
+            values = open_worksheet(client, master_sheet_id, sheet_name).get_all_values()
+            # Timestamps still in the write queue win over what the sheet says
+            if catalog.load(values, write_queue.pending_cells(sheet_name)):
+                print(f"Loaded {len(catalog)} quests from {sheet_name}")
+    return catalog if catalog.last_used_col is not None else None
+
+def _use_quest(sheet_name, picked):
+    # Queues the picked quest's new Last_Used timestamp and returns the quest
+    if picked is None:
+        return None
+    record, cell, last_used = picked
+    write_queue.update_cell(sheet_name, cell, last_used)
+    return record
 
 def get_random_quest(client, master_sheet_id, sheet_name):
     # Picks a random quest from the specified sheet and avoids back-to-back repeats
+    # (the most recently used quests sit out a cooldown, see sheets/quests.py)
     try:
-        spreadsheet = client.open_by_key(master_sheet_id)
-        worksheet = spreadsheet.worksheet(sheet_name)
-        records = worksheet.get_all_records()
-        headers = worksheet.row_values(1)
-        
-        # Ensure the 'Last_Used' column exists in your sheet headers
-        if "Last_Used" not in headers:
-            return None
-        last_used_col_idx = headers.index("Last_Used") + 1
-
-        if not records:
+        catalog = quest_catalog(client, master_sheet_id, sheet_name)
+        if catalog is None:
             return None
-
-        # Sort quests by Last_Used timestamp (most recent first)
-        # We add the original row index (i+2) to each record for updating later
-        indexed_records = []
-        for i, r in enumerate(records):
-            indexed_records.append({"data": r, "row_num": i + 2})
-
-        indexed_records.sort(key=lambda x: str(x["data"].get("Last_Used", "")), reverse=True)
-        quest_cooldown = config.DAILY_QUEST_COOLDOWN
-        if(sheet_name == "Weekly_Quests"):
-            quest_cooldown = config.WEEKLY_QUEST_COOLDOWN
-        # Exclude the last 7(daily quest cooldown) recently used quests
-        pool = indexed_records[quest_cooldown:] if len(indexed_records) > 1 else indexed_records
-        #here we're going to create weights, the formula we use is going to be ln(i+1)^2
-        #this is so that quests that haven't shown up in a long time have a drastically higher chance of showing up
-        #basically the higher the distribution constant is, the less skewed the weights
-        distributionConstant = 7
-        weights = []
-        for i in range(len(pool)):
-            weight = math.log(i+distributionConstant)**2
-            #If the weight was in the last 25(dailies)/7(weeklies) the chance of pulling it is cut into thirds
-            if(i<(len(pool)/2)):
-                weight /= 4
-            weights.append(weight)
-        summedweights = sum(weights)
-        #here we normalize the weights so it's easy to understand for testing but this could be removed
-        for i in range(len(pool)):
-            weights[i] = (weights[i]/summedweights)
-        selection = random.choices(range(len(pool)),weights=weights,k=1)[0]
-        selection = (pool[selection])
-        # Update the timestamp in the sheet
-        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        worksheet.update_cell(selection["row_num"], last_used_col_idx, now_str)
-
-        return selection["data"]
+        return _use_quest(sheet_name, catalog.pick_random())
     except Exception as e:
         print(f"Error fetching quest from {sheet_name}: {e}")
         return None
@@ -485,101 +1171,215 @@ def get_random_quest(client, master_sheet_id, sheet_name):
 def get_specific_quest(client, master_sheet_id, sheet_name, quest_name):
     # Fetches a specific quest by its name from the sheet
     try:
-        spreadsheet = client.open_by_key(master_sheet_id)
-        worksheet = spreadsheet.worksheet(sheet_name)
-        records = worksheet.get_all_records()
-        headers = worksheet.row_values(1)
-        
-        if "Last_Used" not in headers:
+        catalog = quest_catalog(client, master_sheet_id, sheet_name)
+        if catalog is None:
             return None
-        last_used_col_idx = headers.index("Last_Used") + 1
-
-        # Searches for the quest by name
-        for i, row in enumerate(records):
-            if str(row.get("Quest Name", "")).strip().lower() == quest_name.strip().lower():
-                # Updates the timestamp 
-                now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                worksheet.update_cell(i + 2, last_used_col_idx, now_str)
-                return row
-        return None
+        return _use_quest(sheet_name, catalog.pick_named(quest_name))
     except Exception as e:
         print(f"Error fetching specific quest: {e}")
         return None
 
+QUEST_SHEETS = ("Daily_Quests", "Weekly_Quests")
+
+def quest_today():
+    # The date the quest loop goes by (QUEST_TIMEZONE, not the server's)
+    return datetime.now(ZoneInfo(config.QUEST_TIMEZONE)).date()
+
+def quest_dates(sheet_name, today):
+    # The posting dates the plan covers: every day, or every Monday for weeklies
+    if sheet_name == "Weekly_Quests":
+        return weekly_dates(today, config.QUEST_PLAN_WEEKS)
+    return daily_dates(today, config.QUEST_PLAN_DAYS)
+
+def _plan_sheet(client, master_sheet_id, sheet_name, today, repick_after=None, pin=None):
+    # Fills in every open date of a sheet's plan. Quests already planned stay
+    # put, except that with repick_after set, unpinned and unposted dates after
+    # it are picked again. pin=(date, quest name) pins a quest to a date first.
+    # Returns how many dates are planned, or None without a usable catalog.
+    catalog = quest_catalog(client, master_sheet_id, sheet_name)
+    if catalog is None:
+        return None
+    with plan_lock:
+        entries = {day: entry for day, entry in quest_plan.entries(sheet_name) if day is not None and day >= today}
+        if pin is not None:
+            day, quest_name = pin
+            entries[day] = {"quest": {"Quest Name": quest_name}, "override": True, "posted": False}
+        dates = sorted(set(quest_dates(sheet_name, today)) | set(entries))
+
+        slots = []
+        for day in dates:
+            entry = entries.get(day)
+            keep = entry is not None and (
+                entry["posted"] or entry["override"] or repick_after is None or day <= repick_after
+            )
+            slots.append(entry["quest"].get("Quest Name", "") if keep else None)
+
+        planned = {}
+        for day, name, record in zip(dates, slots, catalog.schedule(slots)):
+            if record is None:
+                # A planned quest gone from the sheet keeps what was stored
+                if name is not None:
+                    planned[day] = entries[day]
+                continue
+            record.pop("Last_Used", None)
+            entry = entries.get(day) if name is not None else None
+            planned[day] = {
+                "quest": record,
+                "override": bool(entry and entry["override"]),
+                "posted": bool(entry and entry["posted"])
+            }
+        quest_plan.update(sheet_name, planned, today)
+        return len(planned)
+
+def plan_quests(client, master_sheet_id):
+    # Tops up the daily and weekly plans to QUEST_PLAN_DAYS / QUEST_PLAN_WEEKS ahead
+    today = quest_today()
+    planned = {}
+    for sheet_name in QUEST_SHEETS:
+        try:
+            planned[sheet_name] = _plan_sheet(client, master_sheet_id, sheet_name, today)
+        except Exception as e:
+            print(f"Warning: Could not plan quests for {sheet_name}: {e}")
+    print(f"Planned quests: {planned}")
+    return planned
+
+def get_planned_quest(sheet_name, day=None):
+    # The quest planned for today's post (memory only), or None if there isn't
+    # one or it was already posted
+    entry = quest_plan.get(sheet_name, day or quest_today())
+    if entry is None or entry["posted"]:
+        return None
+    return entry["quest"]
+
+def use_planned_quests(client, master_sheet_id, sheet_names, day=None):
+    # After the planned quests went out: marks them posted, queues their
+    # Last_Used timestamps and plans the next open dates
+    day = day or quest_today()
+    for sheet_name in sheet_names:
+        entry = quest_plan.get(sheet_name, day)
+        if entry is None:
+            continue
+        quest_plan.mark_posted(sheet_name, day)
+        catalog = quest_catalog(client, master_sheet_id, sheet_name)
+        if catalog is not None:
+            _use_quest(sheet_name, catalog.pick_named(entry["quest"].get("Quest Name", "")))
+    return plan_quests(client, master_sheet_id)
+
+def get_quest_schedule(client, master_sheet_id, sheet_name):
+    # Officer view of the upcoming plan for one quest sheet
+    _plan_sheet(client, master_sheet_id, sheet_name, quest_today())
+    label = "Weekly" if sheet_name == "Weekly_Quests" else "Daily"
+    entries = quest_plan.entries(sheet_name)
+    if not entries:
+        return f"❌ No {label.lower()} quests could be planned. Check the {sheet_name} sheet."
+    lines = [f"📅 **Upcoming {label} Quests**"]
+    for day, entry in entries:
+        marks = (" 📌" if entry["override"] else "") + (" ✅ posted" if entry["posted"] else "")
+        lines.append(f"`{day.isoformat()}` {day.strftime('%a')} — **{entry['quest'].get('Quest Name', '?')}**{marks}")
+    lines.append("📌 = set by an officer. Use /schedule_quest to change a date.")
+    return "\n".join(lines)
+
+def schedule_quest(client, master_sheet_id, sheet_name, day_text, quest_name):
+    # Pins a quest to a planned date; the unpinned dates after it are picked
+    # again so the cooldown still holds
+    day = parse_date(day_text)
+    today = quest_today()
+    if day is None:
+        return "❌ Use a date like 2025-03-03."
+    if day not in quest_dates(sheet_name, today):
+        if sheet_name == "Weekly_Quests" and day.weekday() != 0:
+            return "❌ Weekly quests go out on Mondays."
+        return "❌ That date isn't in the upcoming plan."
+    entry = quest_plan.get(sheet_name, day)
+    if entry is not None and entry["posted"]:
+        return "⚠️ That quest has already been posted."
+    catalog = quest_catalog(client, master_sheet_id, sheet_name)
+    if catalog is None:
+        return f"❌ Could not read the {sheet_name} sheet."
+    if not catalog.has_quest(quest_name):
+        return f"❌ Error: Could not find a quest named '{quest_name}' in the {sheet_name} sheet."
+    _plan_sheet(client, master_sheet_id, sheet_name, today, repick_after=day, pin=(day, quest_name))
+    return f"✅ '{quest_name}' will be posted on {day.strftime('%a %Y-%m-%d')}. Later unpinned dates were re-planned."
+
+def load_wordle_claims(client, master_sheet_id):
+    # Seeds the Wordle claim index from Wordle_Claims the first time it's needed
+    if not wordle_claims.loaded:
+        wordle_sheet = open_worksheet(client, master_sheet_id, "Wordle_Claims")
+        wordle_claims.load(wordle_sheet.get_all_values()[1:])
+
 # wordle_claim_exists (function to return if the wordle is already claimed 
 def wordle_claim_exists(client, master_sheet_id, puzzle, discord_id):
-    sheet = client.open_by_key(master_sheet_id)
-    wordle_sheet = sheet.worksheet("Wordle_Claims")
+    load_wordle_claims(client, master_sheet_id)
+    return wordle_claims.exists(puzzle, discord_id)
 
-    # converts the puzzle and discord_id to strings
-    puzzle = str(puzzle).strip()
-    discord_id = str(discord_id).strip()
-
-    # loop through each row and see if the puzzle has already been claimed by a corresponding discord id 
-    rows = wordle_sheet.get_all_values()
-    for row in rows[1:]:
-        if len(row) >= 2 and row[0].strip() == puzzle and row[1].strip() == discord_id:
-            return True
-    return False
+# claims the wordle: logs the claim and awards the XP as one journaled change
+def claim_wordle(client, master_sheet_id, puzzle, discord_id, xp_amount):
+    if not roster.get_by_discord_id(discord_id):
+        return "❌ User not found in roster. Please use !join first."
 
-# log the wordle claim 
-def log_wordle_claim(client, master_sheet_id, puzzle, discord_id):
-    sheet = client.open_by_key(master_sheet_id)
-    wordle_sheet = sheet.worksheet("Wordle_Claims")
-
-    # logs the wordle claim 
+    load_wordle_claims(client, master_sheet_id)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    wordle_sheet.append_row([str(puzzle), str(discord_id), timestamp], value_input_option = "RAW")
+    with claim_lock:
+        if wordle_claims.exists(puzzle, discord_id):
+            return "⚠️ You already claimed this Wordle."
+        member = roster.get_by_discord_id(discord_id)
+        results = apply_change(
+            xp=[(member, xp_amount)],
+            appends=[("Wordle_Claims", [str(puzzle), str(discord_id), timestamp])]
+        ) if member else None
+    if results is None:
+        return "❌ User not found in roster. Please use !join first."
+    [(new_xp, new_rank)] = results
+    return f"Added {xp_amount} XP! New Total: {new_xp} ({new_rank})"
 #logs manual xp to audit log
 def grant_manual_xp(client,master_sheet_id,recipient_id,xp_amount,reason,officer_id):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    try:
-        sheet = client.open_by_key(master_sheet_id)
-
-        master = sheet.worksheet("Master_Roster")
-        records = master.get_all_records(expected_headers=MASTER_HEADERS)
-        global master_cache
-        master_cache = records
-        try:
-            audit_sheet = sheet.worksheet("Audit_Logs")
-
-            if not(is_manual_xp_given(audit_sheet,recipient_id,xp_amount,reason,timestamp[:10])):
-                log_quest_approval(audit_sheet,-1,officer_id,recipient_id,xp_amount,reason)
-            else:
-                return f"⚠️ Already Approved: XP has already been granted to this user for {reason}."
-        except Exception as e:
-            print(f"Warning: Could not access Audit_logs: {e}")
-            audit_sheet = None
+    if not roster.get_by_discord_id(recipient_id):
+        return "❌ User not found in roster. Please use !join first."
 
+    appends = []
+    try:
+        load_audit_ledger(client, master_sheet_id)
+        appends.append(("Audit_Logs", audit_row(-1,officer_id,recipient_id,xp_amount,reason)))
     except Exception as e:
-        return f"❌ Error accessing Sheet: {e}"
-    for i, row in enumerate(records):
-
-        if str(row.get("Discord_ID","")).strip() == str(recipient_id):
-            row_num = i+2
-            try:
-                current_xp = int(row.get("Total_XP",0))
-            except:
-                current_xp = 0
-
-            new_xp = current_xp + xp_amount
-            new_rank = calculate_rank(new_xp)
-
-            master.update_cell(row_num,5,new_xp)
-            master.update_cell(row_num,6,new_rank)
-            return f"Added {xp_amount} XP to <@{recipient_id}> for {reason}."
-
-
+        print(f"Warning: Could not access Audit_logs: {e}")
+
+    with claim_lock:
+        if appends and is_manual_xp_given(recipient_id,xp_amount,reason,timestamp[:10]):
+            return f"⚠️ Already Approved: XP has already been granted to this user for {reason}."
+        member = roster.get_by_discord_id(recipient_id)
+        results = apply_change(xp=[(member, xp_amount)], appends=appends) if member else None
+    if results is None:
+        return "❌ User not found in roster. Please use !join first."
+    return f"Added {xp_amount} XP to <@{recipient_id}> for {reason}."
+
+
+
+# recomputes every member's rank from their XP (e.g. after RANK_THRESHOLDS changed)
+# and queues the ones that differ to be written back to the sheet.
+# Not journaled: ranks are derived from Total_XP, so if a crash loses the
+# change, running this again rebuilds it.
+def recompute_ranks(client, master_sheet_id):
+    members = roster.members()
+    new_ranks = ranks.ranks_for([parse_xp(member.get("Total_XP", 0)) for member in members])
+    changed = {
+        member["id"]: rank
+        for member, rank in zip(members, new_ranks)
+        if str(member.get("Rank", "")).strip() != rank
+    }
+    if changed:
+        roster.set_ranks(changed)
+        write_queue.request_flush()
+    return f"🔄 Recomputed ranks for {len(members)} members; {len(changed)} changed."
 
 # compares the two sheets and checks if the member is a board member, if so, add y/n to board member column
 def check_if_board_member(client, master_sheet_id):
-    sheet = client.open_by_key(master_sheet_id)
-    master = sheet.worksheet("Master_Roster")
-    board_members = sheet.worksheet("Board_Roster")
+    master = open_worksheet(client, master_sheet_id, "Master_Roster")
+    board_members = open_worksheet(client, master_sheet_id, "Board_Roster")
 
-    # 1. Retrieve all data from master sheet and board members sheet
-    master_records = master.get_all_records()
+    # 1. Retrieve the board members sheet and the roster (synced first so every member has a sheet row)
+    flush_writes(client, master_sheet_id)
     board_records = board_members.get_all_records()
 
     # 2. Build a lookup set of board member emails
@@ -592,21 +1392,31 @@ def check_if_board_member(client, master_sheet_id):
     # 3. Find the column inded for board_member
     headers = master.row_values(1)
     board_col = headers.index("Board_Member") + 1
-    email_col = headers.index("Email") + 1
 
-    updates = []
+    # Flags are written by row number, so rows an officer moved since the
+    # last read are re-mapped first; the sync lock keeps a flush from
+    # moving them again until the flags are written
+    with sync_lock:
+        check_roster_rows(client, master_sheet_id, master)
+        master_records = roster.members()
 
-    # 4. Decide Y/N for each row
-    for i, row in enumerate(master_records, start=2):
-        email = row.get("Email", "").strip().lower()
+        updates = []
+        flags = {}
 
-        is_board = "Y" if email in board_emails else "N"
+        # 4. Decide Y/N for each row
+        for row in master_records:
+            if row["row_num"] is None:
+                continue
+            email = row.get("Email", "").strip().lower()
 
-        # need to ascii align to get capital letters (get values like D1, D2...DX)
-        updates.append({
-            "range": f"{chr(64 + board_col)}{i}",
-            "values": [[is_board]]
-        })
+            is_board = "Y" if email in board_emails else "N"
+            flags[row["id"]] = is_board
+
+            updates.append({
+                "range": f"{column_letter(board_col)}{row['row_num']}",
+                "values": [[is_board]]
+            })
 
-    # 5. Batch update for efficiency
-    master.batch_update(updates)
+        # 5. Batch update for efficiency
+        master.batch_update(updates)
+        roster.set_board_flags(flags)
@@ -0,0 +1,301 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import metrics
+from sheets import actions
+from sheets.client import get_client, scheduler
+from sheets.scheduler import INTERACTIVE, BACKGROUND
+
+# Every blocking gspread call goes through this bounded pool, so a slow
+# Sheets request only ties up one worker instead of the whole bot
+_executor = ThreadPoolExecutor(
+    max_workers=config.SHEETS_MAX_WORKERS,
+    thread_name_prefix="sheets"
+)
+
+
+# Actions nobody is waiting on; their Sheets requests yield to commands
+BACKGROUND_ACTIONS = {
+    "update_master_cache",
+    "flush_writes",
+    "replay_journal",
+    "plan_quests",
+    "use_planned_quests"
+}
+
+
+# Pass as timeout= to wait for however long the call takes (for background
+# work no interaction deadline applies to)
+NO_TIMEOUT = object()
+
+
+def get_timeout(name):
+    return config.SHEETS_TIMEOUTS.get(name, config.SHEETS_TIMEOUT)
+
+
+async def run(func, *args, timeout=None, **kwargs):
+    # Runs a blocking function on the Sheets pool and awaits the result.
+    # Raises asyncio.TimeoutError if it takes longer than the timeout; the
+    # worker thread still finishes the call in the background.
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    if timeout is None:
+        timeout = get_timeout(getattr(func, "__name__", ""))
+    future = loop.run_in_executor(_executor, call)
+    if timeout is NO_TIMEOUT:
+        return await future
+    return await asyncio.wait_for(future, timeout)
+
+
+async def _action(func, *args, timeout=None, **kwargs):
+    # Calls sheets.actions.<func>(client, SHEET_ID, ...) off the event loop.
+    # get_client() runs in the worker too since the first call authorizes.
+    # Timed in metrics.py from when a worker picks it up; the wait for a
+    # free worker is recorded separately.
+    priority = BACKGROUND if func.__name__ in BACKGROUND_ACTIONS else INTERACTIVE
+    submitted = time.perf_counter()
+    def call():
+        metrics.registry.observe("jsa_sheets_pool_wait_seconds", time.perf_counter() - submitted)
+        with scheduler.priority(priority), metrics.registry.track("action", func.__name__):
+            return func(get_client(), config.SHEET_ID, *args, **kwargs)
+    if timeout is None:
+        timeout = get_timeout(func.__name__)
+    return await run(call, timeout=timeout)
+
+
+def _local(func, *args, **kwargs):
+    # Calls an actions function that only touches memory, right here on the
+    # event loop (still timed like the pool ones)
+    with metrics.registry.track("action", func.__name__):
+        return func(*args, **kwargs)
+
+
+def start_write_queue():
+    # Starts the background thread that flushes queued sheet writes
+    def flush():
+        with scheduler.priority(BACKGROUND), metrics.registry.track("action", "flush_writes"):
+            actions.flush_writes(get_client(), config.SHEET_ID)
+    actions.write_queue.start(flush)
+
+
+# --- Async versions of sheets.actions used by bot.py ---
+
+async def process_event_data(event_sheet_url, xp_amount):
+    return await _action(actions.process_event_data, event_sheet_url, xp_amount)
+
+async def process_events(event_sheet_urls, xp_amount):
+    return await _action(actions.process_events, event_sheet_urls, xp_amount)
+
+async def preview_events(event_sheet_urls, xp_amount):
+    return await _action(actions.preview_events, event_sheet_urls, xp_amount)
+
+async def confirm_event_plan(plan_id):
+    return await _action(actions.confirm_event_plan, plan_id)
+
+async def get_join(email, discord_id):
+    return await _action(actions.get_join, email, discord_id)
+
+async def get_leaderboard(top=10, mode="regular"):
+    return await _action(actions.get_leaderboard, top, mode=mode)
+
+async def get_leaderboard_pages(top=10, mode="regular"):
+    # Served from memory (and usually the response cache), so no pool hop
+    return _local(actions.get_leaderboard_pages, None, config.SHEET_ID, top, mode=mode)
+
+async def get_xp(discord_id):
+    # Served from memory (and usually the response cache), so no pool hop
+    return _local(actions.get_xp, None, config.SHEET_ID, discord_id)
+
+async def update_master_cache(force=False):
+    return await _action(actions.update_master_cache, force=force)
+
+async def flush_writes():
+    return await _action(actions.flush_writes)
+
+async def award_quest_xp(discord_id, xp_amount, officer_id=None, message_id=None, reason=None, timeout=None):
+    return await _action(
+        actions.award_quest_xp,
+        discord_id,
+        xp_amount,
+        officer_id=officer_id,
+        message_id=message_id,
+        reason=reason,
+        timeout=timeout
+    )
+
+# Memory only, so reaction handlers can call these before any fetch
+def quest_already_approved(message_id):
+    return _local(actions.quest_already_approved, message_id)
+
+def check_quest_approval(discord_id, message_id, xp_amount):
+    # The preview counts awards for the same member still waiting in the queue
+    queued_xp = _queued_xp.get(str(discord_id), 0)
+    return _local(actions.check_quest_approval, discord_id, message_id, xp_amount, queued_xp)
+
+async def load_audit_ledger():
+    return await _action(actions.load_audit_ledger)
+
+
+# Quest approvals whose reply already went out are awarded here, one at a
+# time in the order they came in. The Discord reply doesn't wait for the
+# pool; if an award then fails, on_error(result) gets the message to show.
+_award_queue = None
+_award_worker = None
+_queued_approvals = set()  # message IDs waiting in the queue
+_queued_xp = {}  # {discord_id: XP waiting in the queue, not on the roster yet}
+
+def queue_quest_award(discord_id, xp_amount, officer_id, message_id, reason, on_error=None):
+    # Returns False if this submission is already queued
+    global _award_queue, _award_worker
+    if message_id in _queued_approvals:
+        return False
+    if _award_queue is None:
+        _award_queue = asyncio.Queue()
+    if _award_worker is None or _award_worker.done():
+        _award_worker = asyncio.create_task(_award_loop())
+    _queued_approvals.add(message_id)
+    discord_id = str(discord_id)
+    _queued_xp[discord_id] = _queued_xp.get(discord_id, 0) + xp_amount
+    _award_queue.put_nowait((discord_id, xp_amount, officer_id, message_id, reason, on_error))
+    return True
+
+def queued_awards():
+    return len(_queued_approvals)
+
+async def _award_loop():
+    while True:
+        discord_id, xp_amount, officer_id, message_id, reason, on_error = await _award_queue.get()
+        try:
+            # No timeout here: the reply already went out, and giving up while
+            # the worker still finishes the award would tell the officer to
+            # approve again for XP that does get recorded
+            result = await award_quest_xp(
+                discord_id,
+                xp_amount,
+                officer_id=officer_id,
+                message_id=message_id,
+                reason=reason,
+                timeout=NO_TIMEOUT
+            )
+        except Exception as e:
+            print(f"Error awarding queued quest XP for message {message_id}: {e}")
+            result = "❌ Could not record this XP award. An officer will need to approve it again."
+        finally:
+            _queued_approvals.discard(message_id)
+            _queued_xp[discord_id] -= xp_amount
+            if not _queued_xp[discord_id]:
+                del _queued_xp[discord_id]
+        # A duplicate that slipped past the fast check is fine to drop quietly
+        if not result.startswith("Added") and "Already Approved" not in result and on_error is not None:
+            try:
+                await on_error(result)
+            except Exception as e:
+                print(f"Warning: Could not report a failed quest award: {e}")
+
+async def grant_manual_xp(recipient_id, xp_amount, reason, officer_id):
+    return await _action(actions.grant_manual_xp, recipient_id, xp_amount, reason, officer_id)
+
+async def get_random_quest(sheet_name):
+    return await _action(actions.get_random_quest, sheet_name)
+
+async def get_specific_quest(sheet_name, quest_name):
+    return await _action(actions.get_specific_quest, sheet_name, quest_name)
+
+async def plan_quests():
+    return await _action(actions.plan_quests)
+
+def get_planned_quest(sheet_name):
+    # Read from the local plan, so no pool hop (the 08:00 post stays instant)
+    return _local(actions.get_planned_quest, sheet_name)
+
+def quest_today():
+    return actions.quest_today()
+
+async def use_planned_quests(sheet_names):
+    return await _action(actions.use_planned_quests, sheet_names)
+
+async def get_quest_schedule(sheet_name):
+    return await _action(actions.get_quest_schedule, sheet_name)
+
+async def schedule_quest(sheet_name, day_text, quest_name):
+    return await _action(actions.schedule_quest, sheet_name, day_text, quest_name)
+
+async def wordle_claim_exists(puzzle, discord_id):
+    return await _action(actions.wordle_claim_exists, puzzle, discord_id)
+
+async def claim_wordle(puzzle, discord_id, xp_amount):
+    return await _action(actions.claim_wordle, puzzle, discord_id, xp_amount)
+
+async def replay_journal():
+    return await _action(actions.replay_journal)
+
+async def recompute_ranks():
+    return await _action(actions.recompute_ranks)
+
+async def check_if_board_member():
+    return await _action(actions.check_if_board_member)
+
+
+# --- Runtime numbers for /bot_stats and the metrics endpoint ---
+
+def roster_cache_hit_ratio():
+    # Share of roster refreshes where the cached roster was still current
+    # (no re-read); patched refreshes only re-indexed a few rows
+    results = {
+        result: metrics.registry.value("jsa_roster_refresh_total", {"result": result})
+        for result in ("unchanged", "patched", "reloaded", "error")
+    }
+    total = sum(results.values())
+    return (results["unchanged"] / total if total else None), results
+
+def runtime_stats():
+    hit_ratio, refreshes = roster_cache_hit_ratio()
+    responses = actions.responses.stats()
+    lookups = responses["hits"] + responses["misses"]
+    return {
+        "sheets_quota": scheduler.stats(),
+        "write_queue": actions.write_queue.stats(),
+        "responses": responses,
+        "response_hit_ratio": responses["hits"] / lookups if lookups else None,
+        "roster_members": len(actions.roster),
+        "roster_refreshes": refreshes,
+        "roster_hit_ratio": hit_ratio,
+        "wordle_claims": actions.wordle_claims.stats(),
+        "queued_awards": queued_awards()
+    }
+
+def collect_metrics():
+    # Gauges and counters other modules keep, read when /metrics is scraped
+    stats = runtime_stats()
+    samples = []
+    for kind, quota in stats["sheets_quota"].items():
+        labels = {"kind": kind}
+        samples += [
+            ("jsa_sheets_quota_queue_depth", "gauge", "Sheets requests waiting for a quota token", labels, quota["queue_depth"]),
+            ("jsa_sheets_quota_tokens", "gauge", "Tokens left in the Sheets quota bucket", labels, quota["tokens"]),
+            ("jsa_sheets_retries_total", "counter", "Sheets requests retried after a quota or server error", labels, quota["retries"]),
+            ("jsa_sheets_quota_errors_total", "counter", "Sheets requests that got a 429", labels, quota["quota_errors"]),
+            ("jsa_sheets_failed_total", "counter", "Sheets requests that failed after retries", labels, quota["failed"])
+        ]
+    queue = stats["write_queue"]
+    samples += [
+        ("jsa_write_queue_pending_rows", "gauge", "Log rows waiting to be sent", {}, queue["pending_rows"]),
+        ("jsa_write_queue_pending_cells", "gauge", "Cells waiting to be sent", {}, queue["pending_cells"]),
+        ("jsa_write_queue_flushes_total", "counter", "Write queue flushes", {}, queue["flushes"]),
+        ("jsa_write_queue_failed_flushes_total", "counter", "Write queue flushes that failed", {}, queue["failed_flushes"]),
+        ("jsa_response_cache_hits_total", "counter", "Rendered responses served from the cache", {}, stats["responses"]["hits"]),
+        ("jsa_response_cache_misses_total", "counter", "Rendered responses that had to be built", {}, stats["responses"]["misses"]),
+        ("jsa_response_cache_entries", "gauge", "Rendered responses in the cache", {}, stats["responses"]["entries"]),
+        ("jsa_roster_members", "gauge", "Members in the cached roster", {}, stats["roster_members"]),
+        ("jsa_queued_awards", "gauge", "Approved quest awards waiting to be written", {}, stats["queued_awards"])
+    ]
+    if stats["roster_hit_ratio"] is not None:
+        samples.append(("jsa_roster_cache_hit_ratio", "gauge", "Share of roster refreshes that found the cached roster current", {}, stats["roster_hit_ratio"]))
+    if stats["response_hit_ratio"] is not None:
+        samples.append(("jsa_response_cache_hit_ratio", "gauge", "Rendered responses served from the cache over all lookups", {}, stats["response_hit_ratio"]))
+    return samples
+
+metrics.registry.add_collector(collect_metrics)
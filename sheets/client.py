@@ -1,6 +1,15 @@
+import re
+import threading
+from datetime import datetime
+
 import gspread
+from google.auth.transport.requests import Request
 from google.oauth2.service_account import Credentials
 
+import config
+from sheets.scheduler import RequestScheduler, error_status
+from sheets import fake_backend
+
 # Allow R/W operations in google sheets
 # Allow accessing files in GDrive.
 SCOPES = [
@@ -8,11 +17,221 @@ SCOPES = [
     "https://www.googleapis.com/auth/drive"
 ]
 
+CREDENTIALS_FILE = "credentials.json"
+
+# Refresh the access token this many seconds before it expires so no
+# command ever has to wait on a token refresh
+TOKEN_REFRESH_MARGIN = 300
+# How often the background thread wakes up to check the token
+TOKEN_CHECK_INTERVAL = 60
+# Failed refreshes in a row before the client is authorized from scratch
+TOKEN_REFRESH_FAILURES = 3
+
+# Spreadsheet key in a Sheets or Drive API URL
+ENDPOINT_KEY_RE = re.compile(r"(?:spreadsheets|files)/([A-Za-z0-9_-]+)")
+# Errors that mean a cached handle may point at a deleted or renamed
+# spreadsheet or tab (gspread puts the tab title in every range)
+STALE_HANDLE_STATUSES = {400, 404}
+
+
+class ClientManager:
+    # Keeps one authorized gspread client for the whole process.
+    # Also caches Spreadsheet and Worksheet handles so open_by_key() and
+    # .worksheet() don't cost a metadata round trip on every call.
+
+    def __init__(self, credentials_file=CREDENTIALS_FILE, scopes=SCOPES):
+        self.credentials_file = credentials_file
+        self.scopes = scopes
+        self._lock = threading.RLock()
+        self._creds = None
+        self._client = None
+        self._spreadsheets = {}  # {sheet_key: Spreadsheet}
+        self._worksheets = {}    # {(sheet_key, title): Worksheet}
+        self._generation = 0     # bumped whenever cached handles are dropped
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def get_client(self):
+        # Authorizes on first use, then hands back the same client
+        with self._lock:
+            if self._client is None and config.SHEETS_BACKEND == "fake":
+                # Offline stand-in, no credentials needed (see fake_backend.py)
+                self._client = fake_backend.from_config(config)
+                scheduler.install(self._client, on_error=self.request_failed)
+            if self._client is None:
+                self._authorize()
+                self._start_refresher()
+            return self._client
+
+    def _authorize(self):
+        # Caller holds the lock. Handles from an earlier client are dropped
+        # since they'd keep sending requests with it.
+        self._creds = Credentials.from_service_account_file(
+            self.credentials_file,
+            scopes=self.scopes
+        )
+        self._creds.refresh(Request())
+        self._client = gspread.authorize(self._creds)
+        scheduler.install(self._client, on_error=self.request_failed)
+        self.invalidate()
+
+    def use_client(self, client):
+        # Makes an already built client (e.g. a FakeClient in a benchmark or
+        # load test) the shared one, with the scheduler hooked in
+        with self._lock:
+            self._client = client
+            self.invalidate()
+            scheduler.install(client, on_error=self.request_failed)
+
+    def is_shared(self, client):
+        return client is not None and client is self._client
+
+    # The lock only guards the handle caches. Lookups that miss make their
+    # metadata request outside it, so one slow request doesn't hold up every
+    # other lookup or the token refresh. Two threads may both look up the
+    # same handle; the first one cached is kept. A handle isn't cached if
+    # the caches were invalidated while it was being looked up.
+
+    def open_spreadsheet(self, key):
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(key)
+            generation = self._generation
+        if spreadsheet is not None:
+            return spreadsheet
+        spreadsheet = self.get_client().open_by_key(key)
+        with self._lock:
+            if generation == self._generation:
+                spreadsheet = self._spreadsheets.setdefault(key, spreadsheet)
+        return spreadsheet
+
+    def open_worksheet(self, key, title):
+        with self._lock:
+            worksheet = self._worksheets.get((key, title))
+            generation = self._generation
+        if worksheet is not None:
+            return worksheet
+        worksheet = self.open_spreadsheet(key).worksheet(title)
+        with self._lock:
+            if generation == self._generation:
+                worksheet = self._worksheets.setdefault((key, title), worksheet)
+        return worksheet
+
+    def invalidate(self, key=None):
+        # Drops cached handles (all of them, or just one spreadsheet's)
+        # e.g. after a worksheet was renamed or deleted by an officer
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._spreadsheets.clear()
+                self._worksheets.clear()
+                return
+            self._spreadsheets.pop(key, None)
+            for handle_key in [k for k in self._worksheets if k[0] == key]:
+                del self._worksheets[handle_key]
+
+    def request_failed(self, endpoint, error):
+        # Called by the scheduler for every request that failed for good.
+        # A 404 or 400 on a spreadsheet drops its cached handles, so the next
+        # call looks the spreadsheet and tab up again instead of failing the
+        # same way until a restart.
+        if error_status(error) not in STALE_HANDLE_STATUSES:
+            return
+        match = ENDPOINT_KEY_RE.search(str(endpoint))
+        if match is None:
+            return
+        key = match.group(1)
+        with self._lock:
+            cached = key in self._spreadsheets
+        if cached:
+            print(f"Warning: Dropping cached Sheets handles for {key} after error {error_status(error)}")
+            self.invalidate(key)
+
+    def refresh_token(self):
+        with self._lock:
+            if self._creds is not None:
+                self._creds.refresh(Request())
+
+    def close(self):
+        self._stop.set()
+
+    def _token_expires_in(self):
+        expiry = self._creds.expiry if self._creds is not None else None
+        if expiry is None:
+            return 0
+        # google-auth stores expiry as a naive UTC datetime
+        return (expiry - datetime.utcnow()).total_seconds()
+
+    def _start_refresher(self):
+        if self._refresher is not None:
+            return
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            name="sheets-token-refresher",
+            daemon=True
+        )
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        failures = 0
+        while not self._stop.wait(TOKEN_CHECK_INTERVAL):
+            try:
+                if self._token_expires_in() <= TOKEN_REFRESH_MARGIN:
+                    self.refresh_token()
+                failures = 0
+            except Exception as e:
+                # gspread will still refresh on demand if this keeps failing
+                failures += 1
+                print(f"Warning: Could not refresh Sheets token: {e}")
+            if failures >= TOKEN_REFRESH_FAILURES:
+                # Start over with a new client (and new handles)
+                failures = 0
+                try:
+                    with self._lock:
+                        self._authorize()
+                    print("Re-authorized the Sheets client")
+                except Exception as e:
+                    print(f"Warning: Could not re-authorize the Sheets client: {e}")
+
+
+# Every request from the shared client waits here for quota (see scheduler.py)
+scheduler = RequestScheduler(
+    config.SHEETS_READS_PER_MINUTE,
+    config.SHEETS_WRITES_PER_MINUTE,
+    config.SHEETS_QUOTA_BURST,
+    config.SHEETS_RETRIES,
+    config.SHEETS_BACKOFF_BASE_SECONDS,
+    config.SHEETS_BACKOFF_MAX_SECONDS
+)
+manager = ClientManager()
+
+
 def get_client():
-    # Authorize and return a gspread client
-    creds = Credentials.from_service_account_file(
-        "credentials.json", 
-        scopes=SCOPES
-    )
-    client = gspread.authorize(creds)
-    return client
\ No newline at end of file
+    # Returns the process-wide authorized gspread client
+    return manager.get_client()
+
+
+def open_spreadsheet(client, key):
+    # Uses the cached handle when called with the shared client
+    if manager.is_shared(client):
+        return manager.open_spreadsheet(key)
+    return client.open_by_key(key)
+
+
+def open_worksheet(client, key, title):
+    # Uses the cached handle when called with the shared client
+    if manager.is_shared(client):
+        return manager.open_worksheet(key, title)
+    return client.open_by_key(key).worksheet(title)
+
+
+def get_modified_time(client, key):
+    # Drive modifiedTime of a spreadsheet: a cheap "did anything change?" check.
+    # Returns None if Drive metadata isn't available.
+    try:
+        spreadsheet = open_spreadsheet(client, key)
+        if hasattr(spreadsheet, "get_lastUpdateTime"):
+            return spreadsheet.get_lastUpdateTime()
+        return client.get_file_drive_metadata(key)["modifiedTime"]
+    except Exception as e:
+        print(f"Warning: Could not read modifiedTime for {key}: {e}")
+        return None
@@ -0,0 +1,362 @@
+import collections
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+# In-process stand-in for Google Sheets, for running the bot and the
+# benchmarks without a spreadsheet or credentials.json.
+#
+# FakeClient / FakeSpreadsheet / FakeWorksheet implement the part of the
+# gspread API this project uses. Every call goes through FakeClient.request()
+# the same way gspread's HTTP calls do, so the request scheduler hooks into
+# it like it does for the real client. request() adds the configured
+# latency and can fail calls with 429 quota errors, either at random
+# (`quota_error_rate`) or by enforcing per-minute read and write limits.
+#
+# Select it with SHEETS_BACKEND = "fake" in config.py. With
+# FAKE_SHEETS_PATH set, the workbooks are loaded from and saved to that
+# JSON file ({spreadsheet key: {worksheet title: [[cell, ...], ...]}});
+# otherwise the bot starts from an empty workbook with the usual headers.
+
+# Worksheets (and header rows) of a new workbook for SHEET_ID
+DEFAULT_WORKSHEETS = {
+    "Master_Roster": [["Name", "Email", "Year", "Discord_ID", "Total_XP", "Rank", "Board_Member"]],
+    "Attendance_Logs": [["Event_ID", "Timestamp", "XP_Amount"]],
+    "Audit_Logs": [["Message_ID", "Timestamp", "Officer_ID", "Recipient_ID", "XP_Amount", "Reason"]],
+    "Daily_Quests": [["Quest Name", "Description", "Objective", "Verification Method", "Last_Used"]],
+    "Weekly_Quests": [["Quest Name", "Description", "Objective", "Verification Method", "Last_Used"]],
+    "Wordle_Claims": [["Puzzle", "Discord_ID", "Timestamp"]],
+    "Board_Roster": [["Name", "Email"]]
+}
+
+# Rows in a new worksheet's grid (what row_count reports), like Sheets' default
+GRID_ROWS = 1000
+
+RANGE_RE = re.compile(r"^(?:.*!)?([A-Z]+\d+)(?::([A-Z]+\d+))?$")
+
+
+class FakeResponse:
+    # Just enough of a requests.Response for gspread's APIError
+
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.text = message
+        self._error = {"code": status_code, "message": message, "status": "RESOURCE_EXHAUSTED"}
+
+    def json(self):
+        return {"error": self._error}
+
+
+def numericise(value):
+    # get_all_records() turns numeric-looking cells into numbers like gspread does
+    if value == "":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def parse_range(a1_range):
+    # "A2:F10" -> (2, 1, 10, 6); a single cell spans itself
+    match = RANGE_RE.match(a1_range)
+    if match is None:
+        raise ValueError(f"Unsupported range {a1_range!r}")
+    first_row, first_col = a1_to_rowcol(match.group(1))
+    last_row, last_col = a1_to_rowcol(match.group(2) or match.group(1))
+    return first_row, first_col, last_row, last_col
+
+
+class FakeWorksheet:
+
+    def __init__(self, spreadsheet, title, rows):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self._rows = [[str(value) for value in row] for row in rows]
+        self._grid_rows = max(GRID_ROWS, len(self._rows))
+
+    @property
+    def row_count(self):
+        return self._grid_rows
+
+    def _request(self, method, path, op):
+        endpoint = f"spreadsheets/{self.spreadsheet.id}/values/{self.title}!{path}"
+        return self.spreadsheet.client.request(method, endpoint, op=op, name=op.__name__)
+
+    # --- Reads ---
+
+    def get_all_values(self):
+        def get_all_values():
+            with self.spreadsheet.lock:
+                return [list(row) for row in self._rows]
+        return self._request("get", "A1", get_all_values)
+
+    def get_all_records(self, expected_headers=None, **kwargs):
+        values = self.get_all_values()
+        if not values:
+            return []
+        headers = values[0]
+        return [
+            {header: numericise(row[i]) if i < len(row) else "" for i, header in enumerate(headers)}
+            for row in values[1:]
+        ]
+
+    def row_values(self, row):
+        def row_values():
+            with self.spreadsheet.lock:
+                values = list(self._rows[row - 1]) if row <= len(self._rows) else []
+            while values and values[-1] == "":
+                values.pop()
+            return values
+        return self._request("get", f"{row}:{row}", row_values)
+
+    def col_values(self, col):
+        def col_values():
+            with self.spreadsheet.lock:
+                values = [row[col - 1] if col <= len(row) else "" for row in self._rows]
+            while values and values[-1] == "":
+                values.pop()
+            return values
+        letter = rowcol_to_a1(1, col)[:-1]
+        return self._request("get", f"{letter}:{letter}", col_values)
+
+    def get(self, a1_range):
+        first_row, first_col, last_row, last_col = parse_range(a1_range)
+
+        def get():
+            with self.spreadsheet.lock:
+                values = [
+                    [row[c] if c < len(row) else "" for c in range(first_col - 1, last_col)]
+                    for row in self._rows[first_row - 1:last_row]
+                ]
+            # Sheets leaves out trailing empty rows and cells
+            values = [self._trim(row) for row in values]
+            while values and not values[-1]:
+                values.pop()
+            return values
+        return self._request("get", a1_range, get)
+
+    @staticmethod
+    def _trim(row):
+        while row and row[-1] == "":
+            row.pop()
+        return row
+
+    # --- Writes ---
+
+    def _set(self, row, col, value):
+        # Caller holds the spreadsheet lock
+        while len(self._rows) < row:
+            self._rows.append([])
+        cells = self._rows[row - 1]
+        while len(cells) < col:
+            cells.append("")
+        cells[col - 1] = "" if value is None else str(value)
+        self._grid_rows = max(self._grid_rows, len(self._rows))
+
+    def update_cell(self, row, col, value):
+        def update_cell():
+            with self.spreadsheet.lock:
+                self._set(row, col, value)
+                self.spreadsheet.touch()
+            return {"updatedCells": 1}
+        return self._request("put", rowcol_to_a1(row, col), update_cell)
+
+    def batch_update(self, data, **kwargs):
+        def batch_update():
+            cells = 0
+            with self.spreadsheet.lock:
+                for update in data:
+                    first_row, first_col, _, _ = parse_range(update["range"])
+                    for r, values in enumerate(update["values"]):
+                        for c, value in enumerate(values):
+                            self._set(first_row + r, first_col + c, value)
+                            cells += 1
+                self.spreadsheet.touch()
+            return {"totalUpdatedCells": cells}
+        return self._request("post", ":batchUpdate", batch_update)
+
+    def append_rows(self, values, **kwargs):
+        def append_rows():
+            with self.spreadsheet.lock:
+                first = len(self._rows) + 1
+                for row in values:
+                    self._rows.append(["" if value is None else str(value) for value in row])
+                self._grid_rows = max(self._grid_rows, len(self._rows))
+                self.spreadsheet.touch()
+                width = max((len(row) for row in values), default=1)
+                updated = f"{self.title}!A{first}:{rowcol_to_a1(len(self._rows), width)}"
+            return {"updates": {"updatedRange": updated, "updatedRows": len(values)}}
+        return self._request("post", "A1:append", append_rows)
+
+    def append_row(self, values, **kwargs):
+        return self.append_rows([values], **kwargs)
+
+
+class FakeSpreadsheet:
+
+    def __init__(self, client, key, worksheets):
+        self.client = client
+        self.id = key
+        self.lock = threading.RLock()
+        self.version = 0
+        self._worksheets = {title: FakeWorksheet(self, title, rows) for title, rows in worksheets.items()}
+
+    def touch(self):
+        # Caller holds the lock. Bumps what get_lastUpdateTime() reports.
+        self.version += 1
+
+    def worksheet(self, title):
+        def worksheet():
+            with self.lock:
+                sheet = self._worksheets.get(title)
+            if sheet is None:
+                raise WorksheetNotFound(title)
+            return sheet
+        return self.client.request("get", f"spreadsheets/{self.id}", op=worksheet, name="worksheet")
+
+    @property
+    def sheet1(self):
+        # gspread fetches the spreadsheet metadata for this, like worksheet()
+        def sheet1():
+            with self.lock:
+                return next(iter(self._worksheets.values()))
+        return self.client.request("get", f"spreadsheets/{self.id}", op=sheet1, name="sheet1")
+
+    def worksheets(self):
+        with self.lock:
+            return list(self._worksheets.values())
+
+    def add_worksheet(self, title, rows=GRID_ROWS, cols=26, **kwargs):
+        with self.lock:
+            sheet = self._worksheets[title] = FakeWorksheet(self, title, [])
+            self.touch()
+            return sheet
+
+    def get_lastUpdateTime(self):
+        def get_last_update_time():
+            with self.lock:
+                return f"fake-{self.version}"
+        return self.client.request("get", f"files/{self.id}", op=get_last_update_time, name="get_lastUpdateTime")
+
+    def to_dict(self):
+        with self.lock:
+            return {title: [list(row) for row in sheet._rows] for title, sheet in self._worksheets.items()}
+
+
+class FakeClient:
+
+    def __init__(self, workbooks=None, latency=0.0, quota_error_rate=0.0,
+                 reads_per_minute=None, writes_per_minute=None, seed=None, path=None):
+        # workbooks: {spreadsheet key: {worksheet title: rows}}
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.limits = {"read": reads_per_minute, "write": writes_per_minute}
+        self.path = path
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._recent = {"read": collections.deque(), "write": collections.deque()}  # request times
+        self._spreadsheets = {}
+        self._stats = collections.Counter()
+        for key, worksheets in (workbooks or {}).items():
+            self.add_spreadsheet(key, worksheets)
+
+    def add_spreadsheet(self, key, worksheets):
+        spreadsheet = self._spreadsheets[key] = FakeSpreadsheet(self, key, worksheets)
+        return spreadsheet
+
+    # --- Requests ---
+
+    def _over_limit(self, kind, now):
+        # Caller holds the lock. Sliding one-minute window per kind.
+        limit = self.limits[kind]
+        recent = self._recent[kind]
+        while recent and now - recent[0] >= 60:
+            recent.popleft()
+        if limit is not None and len(recent) >= limit:
+            return True
+        recent.append(now)
+        return False
+
+    def request(self, method, endpoint, op=None, name=None):
+        # Every fake API call passes through here: latency first, then
+        # quota checks, then the operation itself
+        kind = "read" if str(method).lower() == "get" else "write"
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self._stats[f"{kind}s"] += 1
+            self._stats[f"calls.{name or method}"] += 1
+            failed = self._over_limit(kind, time.monotonic()) or (
+                self.quota_error_rate and self._random.random() < self.quota_error_rate
+            )
+            if failed:
+                self._stats["quota_errors"] += 1
+        if failed:
+            raise APIError(FakeResponse(429, f"Quota exceeded for {kind} requests (fake backend)"))
+        result = op() if op is not None else None
+        if kind == "write" and self.path:
+            self.save()
+        return result
+
+    # --- gspread Client API ---
+
+    def open_by_key(self, key):
+        def open_by_key():
+            spreadsheet = self._spreadsheets.get(key)
+            if spreadsheet is None:
+                raise SpreadsheetNotFound(key)
+            return spreadsheet
+        return self.request("get", f"spreadsheets/{key}", op=open_by_key, name="open_by_key")
+
+    def get_file_drive_metadata(self, key):
+        spreadsheet = self.open_by_key(key)
+        return {"id": key, "modifiedTime": spreadsheet.get_lastUpdateTime()}
+
+    # --- Persistence and stats ---
+
+    def save(self, path=None):
+        path = path or self.path
+        with self._lock:
+            workbooks = {key: spreadsheet.to_dict() for key, spreadsheet in self._spreadsheets.items()}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(workbooks, f)
+        os.replace(temp_path, path)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def load_workbooks(path):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def from_config(config):
+    # The FakeClient get_client() hands out when SHEETS_BACKEND is "fake"
+    workbooks = load_workbooks(config.FAKE_SHEETS_PATH)
+    if config.SHEET_ID not in workbooks:
+        workbooks[config.SHEET_ID] = {title: [list(row) for row in rows] for title, rows in DEFAULT_WORKSHEETS.items()}
+    return FakeClient(
+        workbooks,
+        latency=config.FAKE_SHEETS_LATENCY_SECONDS,
+        quota_error_rate=config.FAKE_SHEETS_QUOTA_ERROR_RATE,
+        reads_per_minute=config.FAKE_SHEETS_READS_PER_MINUTE,
+        writes_per_minute=config.FAKE_SHEETS_WRITES_PER_MINUTE,
+        seed=config.FAKE_SHEETS_SEED,
+        path=config.FAKE_SHEETS_PATH
+    )
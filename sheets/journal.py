@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+
+# Append-only on-disk journal of sheet mutations.
+# Every change (XP awards, new members, log rows) is written here and
+# fsync'd before it is applied, and acknowledged once it has fully reached
+# the sheet. After a crash the unacknowledged entries are replayed, so
+# writes can be queued and batched without losing or doubling XP.
+#
+# The journal is a directory of JSON-lines segments named after the first
+# sequence number they hold. Entry lines look like {"seq": 12, ...} and
+# acknowledgement lines like {"ack": [12, 13]}. A new segment is started
+# once the current one passes `segment_bytes`, and old segments are deleted
+# (oldest first) once everything in them has been acknowledged.
+
+SEGMENT_SUFFIX = ".log"
+
+
+class Journal:
+
+    def __init__(self, directory, segment_bytes):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._pending = {}   # {seq: entry} not yet acknowledged
+        self._segments = []  # [(first_seq, path, {seqs written to it})], oldest first
+        self._file = None
+        self._next_seq = 1
+        os.makedirs(directory, exist_ok=True)
+        self._read_segments()
+
+    def _segment_path(self, first_seq):
+        return os.path.join(self.directory, f"{first_seq:012d}{SEGMENT_SUFFIX}")
+
+    def _read_segments(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            first_seq = int(name[:-len(SEGMENT_SUFFIX)])
+            path = os.path.join(self.directory, name)
+            seqs = set()
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write; it was never applied
+                        continue
+                    if "ack" in record:
+                        for seq in record["ack"]:
+                            self._pending.pop(seq, None)
+                    else:
+                        self._pending[record["seq"]] = record
+                        seqs.add(record["seq"])
+                        self._next_seq = max(self._next_seq, record["seq"] + 1)
+            self._next_seq = max(self._next_seq, first_seq)
+            self._segments.append((first_seq, path, seqs))
+
+    def _write(self, record):
+        # Caller holds the lock
+        if self._file is None or self._file.tell() >= self.segment_bytes:
+            self._rotate()
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._segments and os.path.getsize(self._segments[-1][1]) < self.segment_bytes:
+            # Keep writing to the last segment left over from a previous run
+            path = self._segments[-1][1]
+        else:
+            path = self._segment_path(self._next_seq)
+            self._segments.append((self._next_seq, path, set()))
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _compact(self):
+        # Deletes fully acknowledged segments from the front, never the current one
+        while len(self._segments) > 1:
+            first_seq, path, seqs = self._segments[0]
+            if any(seq in self._pending for seq in seqs):
+                break
+            os.remove(path)
+            self._segments.pop(0)
+
+    # --- Public API ---
+
+    def record(self, entry):
+        # Durably writes an entry and returns its sequence number
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            record = dict(entry, seq=seq)
+            self._write(record)
+            self._segments[-1][2].add(seq)
+            self._pending[seq] = record
+            return seq
+
+    def ack(self, seqs):
+        seqs = [seq for seq in seqs if seq is not None]
+        if not seqs:
+            return
+        with self._lock:
+            self._write({"ack": sorted(seqs)})
+            for seq in seqs:
+                self._pending.pop(seq, None)
+            self._compact()
+
+    def unacked(self):
+        # Entries that never fully reached the sheet, oldest first
+        with self._lock:
+            return [self._pending[seq] for seq in sorted(self._pending)]
+
+    def oldest_seq(self):
+        # Lowest sequence number that could still be replayed
+        with self._lock:
+            return self._segments[0][0] if self._segments else self._next_seq
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
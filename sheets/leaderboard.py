@@ -0,0 +1,141 @@
+import threading
+from bisect import bisect_left, insort
+
+from sheets.roster_store import parse_xp
+
+# Pre-sorted leaderboard views kept next to the in-memory roster.
+# Each view is a sorted list of (-xp, member_id) keys, updated with bisect
+# whenever a member's XP or board flag changes, so /leaderboard never sorts
+# the roster and "what place am I?" is a binary search.
+#
+# Places use competition ranking ("1224"): members tied on XP share a place
+# and the next place skips ahead by the size of the tie.
+
+MODES = ("regular", "board", "all")
+
+
+def is_board(member):
+    return str(member.get("Board_Member", "N")).strip().upper() == "Y"
+
+
+def modes_for(member):
+    # Views a member appears in
+    return ("board", "all") if is_board(member) else ("regular", "all")
+
+
+class SortedView:
+
+    def __init__(self):
+        self._keys = []  # [(-xp, member_id)] ascending, i.e. highest XP first
+        self._key_of = {}  # {member_id: key}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def load(self, keys):
+        # Fills an empty view from unsorted (-xp, member_id) keys with one sort
+        self._keys = sorted(keys)
+        self._key_of = {key[1]: key for key in keys}
+
+    def put(self, member_id, xp):
+        key = (-xp, member_id)
+        old = self._key_of.get(member_id)
+        if old == key:
+            return
+        if old is not None:
+            del self._keys[bisect_left(self._keys, old)]
+        insort(self._keys, key)
+        self._key_of[member_id] = key
+
+    def remove(self, member_id):
+        old = self._key_of.pop(member_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, old)]
+
+    def place_of_xp(self, xp):
+        # 1 + how many members have strictly more XP
+        return bisect_left(self._keys, (-xp,)) + 1
+
+    def place(self, member_id):
+        key = self._key_of.get(member_id)
+        return None if key is None else self.place_of_xp(-key[0])
+
+    def top(self, n):
+        # [(place, member_id, xp)] for the first n entries, plus anyone tied
+        # with the last of them
+        result = []
+        place = 0
+        last_xp = None
+        for index, (neg_xp, member_id) in enumerate(self._keys):
+            xp = -neg_xp
+            if index >= n and xp != last_xp:
+                break
+            if xp != last_xp:
+                place = index + 1
+                last_xp = xp
+            result.append((place, member_id, xp))
+        return result
+
+
+class Leaderboard:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {mode: SortedView() for mode in MODES}
+        self._members = {}  # {member_id: member dict from the roster}
+
+    def rebuild(self, members):
+        # Replaces every view at once with one sorted pass over the roster
+        keys = {mode: [] for mode in MODES}
+        by_id = {}
+        for member in members:
+            by_id[member["id"]] = member
+            key = (-parse_xp(member.get("Total_XP", 0)), member["id"])
+            for mode in modes_for(member):
+                keys[mode].append(key)
+        views = {mode: SortedView() for mode in MODES}
+        for mode, view in views.items():
+            view.load(keys[mode])
+        with self._lock:
+            self._views = views
+            self._members = by_id
+
+    def update(self, member):
+        # Places (or moves) a member after their XP or board flag changed
+        member_id = member["id"]
+        xp = parse_xp(member.get("Total_XP", 0))
+        modes = modes_for(member)
+        with self._lock:
+            self._members[member_id] = member
+            for mode, view in self._views.items():
+                if mode in modes:
+                    view.put(member_id, xp)
+                else:
+                    view.remove(member_id)
+
+    def remove(self, member_id):
+        with self._lock:
+            self._members.pop(member_id, None)
+            for view in self._views.values():
+                view.remove(member_id)
+
+    def top(self, n, mode="regular"):
+        # [(place, member)] for the top n of a view, including ties at the cutoff
+        with self._lock:
+            view = self._views.get(mode, self._views["all"])
+            return [(place, self._members[member_id]) for place, member_id, xp in view.top(n)]
+
+    def place(self, member_id, mode=None):
+        # (place, out of how many) in a view; defaults to the member's own view
+        with self._lock:
+            member = self._members.get(member_id)
+            if member is None:
+                return None, 0
+            if mode is None:
+                mode = modes_for(member)[0]
+            view = self._views[mode]
+            return view.place(member_id), len(view)
+
+    def size(self, mode="regular"):
+        with self._lock:
+            return len(self._views[mode])
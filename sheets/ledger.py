@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+
+from sheets.roster_store import parse_xp
+
+# Local index of Audit_Logs for duplicate checks.
+# The sheet is read once to seed the ledger; after that every audit row the
+# bot writes is added here as it is queued, so checking "was this submission
+# already approved?" or "was this manual award already given today?" is a
+# set lookup instead of downloading the log. The keys are kept in SQLite so
+# a restart doesn't need to read the sheet again.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_messages (
+    message_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS audit_awards (
+    recipient_id TEXT NOT NULL,
+    xp_amount INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (recipient_id, xp_amount, reason, day)
+);
+CREATE TABLE IF NOT EXISTS ledger_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Message_ID written for manual awards, which have no submission message
+NO_MESSAGE = "-1"
+
+
+def award_key(recipient_id, xp_amount, reason, timestamp):
+    # (recipient, xp, reason, date) - the same award twice on one day is a duplicate
+    return (str(recipient_id).strip(), parse_xp(xp_amount), str(reason).strip(), str(timestamp)[:10])
+
+
+def audit_keys(row):
+    # Message ID and award key of an Audit_Logs row
+    # [Message_ID, Timestamp, Officer_ID, Recipient_ID, XP_Amount, Reason]
+    row = [str(value) for value in row] + [""] * (6 - len(row))
+    return row[0].strip(), award_key(row[3], row[4], row[5], row[1])
+
+
+class AuditLedger:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._messages = {
+            row[0] for row in self._conn.execute("SELECT message_id FROM audit_messages")
+        }
+        self._awards = set(self._conn.execute(
+            "SELECT recipient_id, xp_amount, reason, day FROM audit_awards"
+        ))
+        self.loaded = self._conn.execute(
+            "SELECT 1 FROM ledger_meta WHERE name = 'audit_loaded'"
+        ).fetchone() is not None
+
+    def load(self, rows):
+        # Seeds the ledger from the Audit_Logs values (without the header row)
+        with self._lock, self._conn:
+            for row in rows:
+                self._add(*audit_keys(row))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ledger_meta (name, value) VALUES ('audit_loaded', '1')"
+            )
+            self.loaded = True
+
+    def _add(self, message_id, key):
+        # Caller holds the lock and a transaction
+        if message_id and message_id != NO_MESSAGE and message_id not in self._messages:
+            self._messages.add(message_id)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO audit_messages (message_id) VALUES (?)", (message_id,)
+            )
+        if key not in self._awards:
+            self._awards.add(key)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO audit_awards (recipient_id, xp_amount, reason, day) "
+                "VALUES (?, ?, ?, ?)",
+                key
+            )
+
+    def has_message(self, message_id):
+        return str(message_id).strip() in self._messages
+
+    def has_award(self, recipient_id, xp_amount, reason, timestamp):
+        return award_key(recipient_id, xp_amount, reason, timestamp) in self._awards
+
+    def add(self, row):
+        # Records an audit row the bot is writing
+        with self._lock, self._conn:
+            self._add(*audit_keys(row))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+# Quest rotation planned ahead of time and kept in a local JSON file.
+# Every upcoming daily (and Monday weekly) post has its quest chosen days in
+# advance, so the 08:00 announcement just sends a prepared embed instead of
+# reading the quest sheet right when it goes out. Officers can look at the
+# plan and pin a specific quest to a date.
+#
+# The file looks like
+#   {"Daily_Quests": {"2025-03-03": {"quest": {...}, "override": false, "posted": false}}, ...}
+# with dates in the quest timezone. Past dates are dropped when the plan is
+# topped up.
+
+
+def daily_dates(today, days):
+    return [today + timedelta(days=offset) for offset in range(days)]
+
+
+def weekly_dates(today, weeks):
+    # The next `weeks` Mondays, starting today if today is a Monday
+    monday = today + timedelta(days=(7 - today.weekday()) % 7)
+    return [monday + timedelta(weeks=offset) for offset in range(weeks)]
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+class QuestPlan:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._plans = {}  # {sheet name: {ISO date: entry}}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._plans = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not read the quest plan, starting a new one: {e}")
+
+    def _save(self):
+        # Caller holds the lock. Written to a temp file first so a crash
+        # can't leave half a plan behind.
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._plans, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def entries(self, sheet_name):
+        # [(date, entry)] in date order
+        with self._lock:
+            plan = self._plans.get(sheet_name, {})
+            return [(parse_date(day), dict(plan[day])) for day in sorted(plan)]
+
+    def get(self, sheet_name, day):
+        with self._lock:
+            entry = self._plans.get(sheet_name, {}).get(day.isoformat())
+            return dict(entry) if entry is not None else None
+
+    def update(self, sheet_name, entries, today):
+        # Replaces the plan for a sheet with {date: entry} and drops past dates
+        with self._lock:
+            self._plans[sheet_name] = {
+                day.isoformat(): entry for day, entry in entries.items() if day >= today
+            }
+            self._save()
+
+    def mark_posted(self, sheet_name, day):
+        with self._lock:
+            entry = self._plans.get(sheet_name, {}).get(day.isoformat())
+            if entry is not None:
+                entry["posted"] = True
+                self._save()
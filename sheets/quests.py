@@ -0,0 +1,181 @@
+import math
+import random
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+
+from gspread.utils import rowcol_to_a1
+
+# Cached quest catalogs for Daily_Quests and Weekly_Quests.
+# A catalog is read with one get_all_values() and then kept in memory with
+# its quests ordered by Last_Used (most recent first), a lowercase name index
+# for /post_specific_quest and the cumulative selection weights for each pool
+# size, so picking a quest is one random number and a bisect. Picking a quest
+# moves it to the front of the order; only its Last_Used cell is written
+# back to the sheet, through the write queue.
+
+# Weights are ln(i + DISTRIBUTION_CONSTANT)^2 over the pool (oldest quests
+# last, so they weigh the most). The higher the constant, the less skewed
+# the weights. The more recently used half of the pool gets a quarter of that.
+DISTRIBUTION_CONSTANT = 7
+RECENT_HALF_DIVISOR = 4
+
+LAST_USED_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Other formats Last_Used may have been typed in by hand
+LAST_USED_FORMATS = (LAST_USED_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y")
+
+
+def parse_last_used(value):
+    # Blank or unreadable timestamps count as never used
+    value = str(value).strip()
+    for fmt in LAST_USED_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return datetime.min
+
+
+def cumulative_weights(size):
+    # Running totals of the selection weights for a pool of `size` quests
+    totals = []
+    total = 0.0
+    for i in range(size):
+        weight = math.log(i + DISTRIBUTION_CONSTANT) ** 2
+        if i < size / 2:
+            weight /= RECENT_HALF_DIVISOR
+        total += weight
+        totals.append(total)
+    return totals
+
+
+class Quest:
+
+    __slots__ = ("record", "row", "last_used")
+
+    def __init__(self, record, row, last_used):
+        self.record = record        # {header: value} as posted in the embed
+        self.row = row              # row number on the sheet
+        self.last_used = last_used  # datetime, datetime.min if never used
+
+
+class QuestCatalog:
+
+    def __init__(self, sheet_name, cooldown, ttl_seconds):
+        self.sheet_name = sheet_name
+        self.cooldown = cooldown
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._order = []      # [Quest], most recently used first
+        self._by_name = {}    # {lowercase quest name: Quest}
+        self._weights = {}    # {pool size: cumulative weights}
+        self.last_used_col = None
+        self.loaded_at = None
+
+    def stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl_seconds
+
+    def load(self, values, pending=None):
+        # values: the whole sheet from get_all_values(), header row first.
+        # pending: {A1 cell: value} Last_Used writes not on the sheet yet.
+        # Returns False if the sheet has no Last_Used column.
+        headers = values[0] if values else []
+        if "Last_Used" not in headers:
+            with self._lock:
+                self._order, self._by_name, self.last_used_col = [], {}, None
+                self.loaded_at = time.monotonic()
+            return False
+        last_used_col = headers.index("Last_Used") + 1
+        pending = pending or {}
+        quests = []
+        for offset, row in enumerate(values[1:]):
+            record = {header: row[i] if i < len(row) else "" for i, header in enumerate(headers)}
+            row_number = offset + 2
+            record["Last_Used"] = pending.get(rowcol_to_a1(row_number, last_used_col), record["Last_Used"])
+            quests.append(Quest(record, row_number, parse_last_used(record["Last_Used"])))
+        # Stable sort, so quests used at the same time keep their sheet order
+        quests.sort(key=lambda quest: quest.last_used, reverse=True)
+        by_name = {}
+        for quest in quests:
+            by_name.setdefault(str(quest.record.get("Quest Name", "")).strip().lower(), quest)
+        with self._lock:
+            self._order = quests
+            self._by_name = by_name
+            self.last_used_col = last_used_col
+            self.loaded_at = time.monotonic()
+        return True
+
+    def _pool(self, order=None):
+        # Caller holds the lock. Skips the `cooldown` most recently used quests.
+        order = self._order if order is None else order
+        return order[self.cooldown:] if len(order) > 1 else order
+
+    def _choose(self, order, rng):
+        # Caller holds the lock. A weighted pick from order's pool, or None.
+        pool = self._pool(order)
+        if not pool:
+            return None
+        totals = self._totals(len(pool))
+        index = bisect_right(totals, rng.random() * totals[-1])
+        return pool[min(index, len(pool) - 1)]
+
+    def _totals(self, size):
+        totals = self._weights.get(size)
+        if totals is None:
+            totals = self._weights[size] = cumulative_weights(size)
+        return totals
+
+    def _use(self, quest, now):
+        # Caller holds the lock. Moves the quest to the front of the order.
+        quest.last_used = now
+        quest.record["Last_Used"] = now.strftime(LAST_USED_FORMAT)
+        self._order.remove(quest)
+        self._order.insert(0, quest)
+
+    def pick_random(self, rng=random):
+        # (record, A1 cell, Last_Used text) for a weighted random quest, or None
+        with self._lock:
+            quest = self._choose(self._order, rng)
+            return self._take(quest) if quest is not None else None
+
+    def pick_named(self, quest_name):
+        # Same as pick_random, for the quest with this name
+        with self._lock:
+            quest = self._by_name.get(str(quest_name).strip().lower())
+            return self._take(quest) if quest is not None else None
+
+    def schedule(self, slots, rng=random):
+        # Plans upcoming posts without using anything. slots is a list of
+        # quest names (already decided) or None (to be picked), in posting
+        # order; each None gets a weighted pick as if every earlier slot had
+        # been posted, so the cooldown and weights work as they would live.
+        # Returns a record (or None if nothing can be picked) per slot.
+        with self._lock:
+            order = list(self._order)
+            planned = []
+            for name in slots:
+                quest = self._by_name.get(str(name).strip().lower()) if name is not None else None
+                if quest is None and name is None:
+                    quest = self._choose(order, rng)
+                if quest is None:
+                    planned.append(None)
+                    continue
+                order.remove(quest)
+                order.insert(0, quest)
+                planned.append(dict(quest.record))
+            return planned
+
+    def has_quest(self, quest_name):
+        with self._lock:
+            return str(quest_name).strip().lower() in self._by_name
+
+    def _take(self, quest):
+        # Caller holds the lock
+        self._use(quest, datetime.now().replace(microsecond=0))
+        cell = rowcol_to_a1(quest.row, self.last_used_col)
+        return dict(quest.record), cell, quest.record["Last_Used"]
+
+    def __len__(self):
+        return len(self._order)
+
@@ -0,0 +1,58 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+import config
+
+# Rank table compiled once from config.RANK_THRESHOLDS.
+# The thresholds are validated and turned into two parallel sorted tuples
+# (XP floors and rank names), so every rank question is one bisect instead
+# of re-sorting the config dict on each call.
+
+# Rank of anyone below the lowest threshold
+DEFAULT_RANK = "Newcomer"
+
+# rank: current rank name
+# floor: XP where the current rank starts
+# next_floor / next_rank: the next rank up, or None at max rank
+# progress: 0.0 - 1.0 of the way from floor to next_floor (1.0 at max rank)
+RankInfo = namedtuple("RankInfo", ["rank", "floor", "next_floor", "next_rank", "progress"])
+
+
+def compile_thresholds(thresholds):
+    # {xp: rank name} -> (sorted floors, names in the same order)
+    if not thresholds:
+        raise ValueError("RANK_THRESHOLDS is empty")
+    for floor, name in thresholds.items():
+        if not isinstance(floor, int) or isinstance(floor, bool):
+            raise ValueError(f"RANK_THRESHOLDS key {floor!r} is not an integer XP amount")
+        if not str(name).strip():
+            raise ValueError(f"RANK_THRESHOLDS has a blank rank name at {floor} XP")
+    floors = tuple(sorted(thresholds))
+    return floors, tuple(thresholds[floor] for floor in floors)
+
+
+FLOORS, NAMES = compile_thresholds(config.RANK_THRESHOLDS)
+
+
+def rank_for(xp):
+    index = bisect_right(FLOORS, xp) - 1
+    return NAMES[index] if index >= 0 else DEFAULT_RANK
+
+
+def rank_info(xp):
+    index = bisect_right(FLOORS, xp) - 1
+    rank = NAMES[index] if index >= 0 else DEFAULT_RANK
+    floor = FLOORS[index] if index >= 0 else 0
+    if index + 1 >= len(FLOORS):
+        return RankInfo(rank, floor, None, None, 1.0)
+    next_floor = FLOORS[index + 1]
+    span = next_floor - floor
+    progress = (xp - floor) / span if span > 0 else 0.0
+    return RankInfo(rank, floor, next_floor, NAMES[index + 1], min(max(progress, 0.0), 1.0))
+
+
+def ranks_for(xps):
+    # Ranks for a whole list of XP totals at once (event processing, bulk recompute)
+    floors, names, search = FLOORS, NAMES, bisect_right
+    indexes = [search(floors, xp) - 1 for xp in xps]
+    return [names[index] if index >= 0 else DEFAULT_RANK for index in indexes]
@@ -0,0 +1,47 @@
+import threading
+from collections import OrderedDict
+
+# LRU cache for rendered command responses (/leaderboard pages, /xp text).
+# Every entry remembers the roster version it was built from and is only
+# served while that version is current, so a cached answer can never be
+# older than the roster it describes. The Roster bumps a global version on
+# every change and a per-member version when one member changes, so an XP
+# award only invalidates that member's entries and the leaderboards.
+
+
+class ResponseCache:
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # {key: (version, value)}, least recently used first
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, version):
+        # The cached value for key if it was built at `version`, else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
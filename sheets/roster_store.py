@@ -0,0 +1,376 @@
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Local SQLite copy of Master_Roster.
+# The Roster in actions.py serves lookups from memory and writes through to
+# this store, which keeps rows durable across restarts. Each write bumps the
+# row's `dirty` counter and sets the bits of the columns it changed in
+# `dirty_cols`; flush_writes() in actions.py pushes just those cells to the
+# sheet and clears both.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    row_num INTEGER UNIQUE,
+    name TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    email_key TEXT NOT NULL DEFAULT '',
+    year TEXT NOT NULL DEFAULT '',
+    discord_id TEXT NOT NULL DEFAULT '',
+    total_xp INTEGER NOT NULL DEFAULT 0,
+    rank TEXT NOT NULL DEFAULT '',
+    board_member TEXT NOT NULL DEFAULT '',
+    dirty INTEGER NOT NULL DEFAULT 0,
+    dirty_cols INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS applied_ops (
+    seq INTEGER PRIMARY KEY
+);
+"""
+
+MEMBER_COLUMNS = "id, row_num, name, email, year, discord_id, total_xp, rank, board_member, dirty, dirty_cols"
+
+# dirty_cols bits: the Master_Roster columns the bot writes
+DIRTY_DISCORD_ID = 1  # D
+DIRTY_TOTAL_XP = 2    # E
+DIRTY_RANK = 4        # F
+
+
+def normalize_email(email):
+    return str(email or "").strip().lower()
+
+
+def parse_xp(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def first_row_of_range(a1_range):
+    # "Master_Roster!A120:F122" -> 120
+    match = re.search(r"![A-Z]+(\d+)", a1_range or "")
+    return int(match.group(1)) if match else None
+
+
+def sheet_values(row):
+    # Normalized column values of a roster record, in members-table order
+    return (
+        str(row.get("Name", "")).strip(),
+        str(row.get("Email", "")).strip(),
+        normalize_email(row.get("Email")),
+        str(row.get("Year", "")).strip(),
+        str(row.get("Discord_ID", "")).strip(),
+        parse_xp(row.get("Total_XP", 0)),
+        str(row.get("Rank", "")).strip(),
+        str(row.get("Board_Member", "")).strip()
+    )
+
+
+def to_record(row):
+    # Converts a members row into the same dict shape get_all_records() returns
+    return {
+        "Name": row["name"],
+        "Email": row["email"],
+        "Year": row["year"],
+        "Discord_ID": row["discord_id"],
+        "Total_XP": row["total_xp"],
+        "Rank": row["rank"],
+        "Board_Member": row["board_member"],
+        "id": row["id"],
+        "row_num": row["row_num"],
+        "dirty": row["dirty"],
+        "dirty_cols": row["dirty_cols"]
+    }
+
+
+def member_keys(rows):
+    # {email key: row} and {Discord ID: row} for matching sheet rows to members
+    by_email = {}
+    by_discord = {}
+    for row in rows:
+        email_key = normalize_email(row["email"])
+        if email_key:
+            by_email.setdefault(email_key, row)
+        discord_id = row["discord_id"].strip()
+        if discord_id:
+            by_discord.setdefault(discord_id, row)
+    return by_email, by_discord
+
+
+def match_member(by_email, by_discord, email_key, discord_id, claimed):
+    # The unclaimed member with this email (or else Discord ID); claims it
+    for member in (by_email.get(email_key) if email_key else None,
+                   by_discord.get(discord_id) if discord_id else None):
+        if member is not None and member["id"] not in claimed:
+            claimed.add(member["id"])
+            return member
+    return None
+
+
+class RosterStore:
+
+    def __init__(self, path):
+        self.path = path
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._batch_depth = 0
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(members)")]
+            if "dirty_cols" not in columns:
+                # Stores from before dirty_cols: rewrite every pending column
+                self._conn.execute("ALTER TABLE members ADD COLUMN dirty_cols INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute(
+                    "UPDATE members SET dirty_cols = ? WHERE dirty > 0",
+                    (DIRTY_DISCORD_ID | DIRTY_TOTAL_XP | DIRTY_RANK,)
+                )
+
+    @contextmanager
+    def _write(self):
+        # One transaction per write, unless we're inside batch()
+        with self._lock:
+            if self._batch_depth:
+                yield
+            else:
+                with self._conn:
+                    yield
+
+    @contextmanager
+    def batch(self, op_id=None):
+        # Groups every write made inside it into a single transaction.
+        # op_id (a journal sequence number) is recorded in the same
+        # transaction, so is_applied() tells whether the whole batch landed.
+        with self._lock:
+            outermost = self._batch_depth == 0
+            self._batch_depth += 1
+            try:
+                if outermost:
+                    with self._conn:
+                        yield
+                        self._mark_applied(op_id)
+                else:
+                    yield
+                    self._mark_applied(op_id)
+            finally:
+                self._batch_depth -= 1
+
+    def _mark_applied(self, op_id):
+        if op_id is not None:
+            self._conn.execute("INSERT OR IGNORE INTO applied_ops (seq) VALUES (?)", (op_id,))
+
+    def is_applied(self, op_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM applied_ops WHERE seq = ?", (op_id,)
+            ).fetchone() is not None
+
+    def forget_ops_before(self, op_id):
+        # Journal entries below op_id can never be replayed again
+        with self._write():
+            self._conn.execute("DELETE FROM applied_ops WHERE seq < ?", (op_id,))
+
+    # --- Loading from the sheet ---
+
+    def load(self, rows):
+        # rows: [(row_num, record)] read from the sheet.
+        # Replaces every clean row with the sheet's copy. Rows with unsynced
+        # local writes keep their values but move to the row that holds the
+        # same member now (matched by email, or by Discord ID), and the
+        # sheet's copy of that row isn't added a second time. A pending row
+        # whose member is no longer on the sheet is dropped, since an officer
+        # removed them. Returns the dropped records.
+        with self._write():
+            self._conn.execute("DELETE FROM members WHERE dirty = 0")
+            placed = self._conn.execute(
+                f"SELECT {MEMBER_COLUMNS} FROM members WHERE row_num IS NOT NULL"
+            ).fetchall()
+            # Cleared first so moving rows around can't hit the UNIQUE row_num
+            self._conn.execute("UPDATE members SET row_num = NULL WHERE row_num IS NOT NULL")
+            by_email, by_discord = member_keys(placed)
+            claimed = set()
+            for row_num, row in rows:
+                values = sheet_values(row)
+                member = match_member(by_email, by_discord, values[2], values[4], claimed)
+                if member is not None:
+                    self._conn.execute("UPDATE members SET row_num = ? WHERE id = ?", (row_num, member["id"]))
+                    continue
+                self._conn.execute(
+                    "INSERT INTO members "
+                    "(row_num, name, email, email_key, year, discord_id, total_xp, rank, board_member) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row_num,) + values
+                )
+            dropped = [to_record(row) for row in placed if row["id"] not in claimed]
+            self._conn.executemany("DELETE FROM members WHERE id = ?", [(row["id"],) for row in dropped])
+            self.loaded = True
+        return dropped
+
+    def remap_rows(self, keys):
+        # keys: [(row_num, email, discord_id)] from the sheet's key columns.
+        # Points every member at the row that holds them now, so writes
+        # don't land on the wrong row after an officer deleted, inserted or
+        # sorted rows. Members no longer on the sheet are dropped, along with
+        # any unsynced change. Returns (members moved, dropped pending records).
+        by_email = {}
+        by_discord = {}
+        for row_num, email, discord_id in keys:
+            email_key = normalize_email(email)
+            if email_key:
+                by_email.setdefault(email_key, row_num)
+            discord_id = str(discord_id).strip()
+            if discord_id:
+                by_discord.setdefault(discord_id, row_num)
+        moved = 0
+        dropped = []
+        with self._write():
+            placed = self._conn.execute(
+                f"SELECT {MEMBER_COLUMNS} FROM members WHERE row_num IS NOT NULL ORDER BY row_num"
+            ).fetchall()
+            self._conn.execute("UPDATE members SET row_num = NULL WHERE row_num IS NOT NULL")
+            taken = set()
+            for row in placed:
+                row_num = by_email.get(normalize_email(row["email"]))
+                if row_num is None or row_num in taken:
+                    row_num = by_discord.get(row["discord_id"].strip())
+                if row_num is None or row_num in taken:
+                    self._conn.execute("DELETE FROM members WHERE id = ?", (row["id"],))
+                    if row["dirty"]:
+                        dropped.append(to_record(row))
+                    continue
+                taken.add(row_num)
+                moved += row_num != row["row_num"]
+                self._conn.execute("UPDATE members SET row_num = ? WHERE id = ?", (row_num, row["id"]))
+        return moved, dropped
+
+    def patch(self, rows):
+        # rows: [(row_num, record)] that changed on the sheet.
+        # Updates or inserts just those rows, skipping any with unsynced local
+        # writes. Returns the ids of the members that were touched.
+        touched = []
+        with self._write():
+            for row_num, row in rows:
+                existing = self._conn.execute(
+                    "SELECT id, dirty FROM members WHERE row_num = ?", (row_num,)
+                ).fetchone()
+                if existing is None:
+                    cursor = self._conn.execute(
+                        "INSERT INTO members "
+                        "(row_num, name, email, email_key, year, discord_id, total_xp, rank, board_member) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (row_num,) + sheet_values(row)
+                    )
+                    touched.append(cursor.lastrowid)
+                elif existing["dirty"] == 0:
+                    self._conn.execute(
+                        "UPDATE members SET name = ?, email = ?, email_key = ?, year = ?, discord_id = ?, "
+                        "total_xp = ?, rank = ?, board_member = ? WHERE id = ?",
+                        sheet_values(row) + (existing["id"],)
+                    )
+                    touched.append(existing["id"])
+        return touched
+
+    # --- Reads ---
+
+    def get(self, member_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {MEMBER_COLUMNS} FROM members WHERE id = ?", (member_id,)
+            ).fetchone()
+        return to_record(row) if row else None
+
+    def all_members(self):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {MEMBER_COLUMNS} FROM members ORDER BY row_num IS NULL, row_num, id"
+            ).fetchall()
+        return [to_record(row) for row in rows]
+
+    # --- Local writes (marked dirty for the syncer) ---
+
+    def add_xp(self, member_id, xp_amount, rank_for):
+        # Read-modify-write under the lock so concurrent awards can't lose XP.
+        # rank_for(xp) maps the new total to a rank name.
+        with self._write():
+            row = self._conn.execute(
+                "SELECT total_xp, rank FROM members WHERE id = ?", (member_id,)
+            ).fetchone()
+            if row is None:
+                return None, None
+            new_xp = row["total_xp"] + xp_amount
+            new_rank = rank_for(new_xp)
+            changed = DIRTY_TOTAL_XP | (DIRTY_RANK if new_rank != row["rank"] else 0)
+            self._conn.execute(
+                "UPDATE members SET total_xp = ?, rank = ?, dirty = dirty + 1, dirty_cols = dirty_cols | ? "
+                "WHERE id = ?",
+                (new_xp, new_rank, changed, member_id)
+            )
+            return new_xp, new_rank
+
+    def link_discord(self, member_id, discord_id):
+        with self._write():
+            self._conn.execute(
+                "UPDATE members SET discord_id = ?, dirty = dirty + 1, dirty_cols = dirty_cols | ? "
+                "WHERE id = ?",
+                (str(discord_id).strip(), DIRTY_DISCORD_ID, member_id)
+            )
+
+    def add_member(self, name, email, year, discord_id, total_xp, rank):
+        with self._write():
+            cursor = self._conn.execute(
+                "INSERT INTO members (name, email, email_key, year, discord_id, total_xp, rank, dirty) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                (name, email, normalize_email(email), year, str(discord_id).strip(), total_xp, rank)
+            )
+            return cursor.lastrowid
+
+    def set_ranks(self, ranks):
+        # ranks: {member_id: rank name}, written back to the sheet by the syncer
+        with self._write():
+            self._conn.executemany(
+                "UPDATE members SET rank = ?, dirty = dirty + 1, dirty_cols = dirty_cols | ? "
+                "WHERE id = ?",
+                [(rank, DIRTY_RANK, member_id) for member_id, rank in ranks.items()]
+            )
+
+    def set_board_flags(self, flags):
+        # flags: {member_id: "Y"/"N"}. The sheet column is written by the caller.
+        with self._write():
+            self._conn.executemany(
+                "UPDATE members SET board_member = ? WHERE id = ?",
+                [(flag, member_id) for member_id, flag in flags.items()]
+            )
+
+    # --- Syncing ---
+
+    def pending(self):
+        # Rows with local writes that haven't reached the sheet yet
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {MEMBER_COLUMNS} FROM members WHERE dirty > 0 ORDER BY id"
+            ).fetchall()
+        return [to_record(row) for row in rows]
+
+    def mark_synced(self, records, first_new_row=None):
+        # Clears the dirty counter of rows that weren't written again since
+        # pending() read them. New rows get their sheet row number assigned
+        # in the order they were appended. Returns {member_id: row_num} for those.
+        assigned = {}
+        with self._write():
+            next_row = first_new_row
+            for record in records:
+                if record["row_num"] is None and next_row is not None:
+                    self._conn.execute(
+                        "UPDATE members SET row_num = ? WHERE id = ?", (next_row, record["id"])
+                    )
+                    assigned[record["id"]] = next_row
+                    next_row += 1
+                self._conn.execute(
+                    "UPDATE members SET dirty = 0, dirty_cols = 0 WHERE id = ? AND dirty = ?",
+                    (record["id"], record["dirty"])
+                )
+        return assigned
@@ -0,0 +1,257 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from gspread.exceptions import APIError
+
+import metrics
+
+# Central scheduler for Google Sheets API requests.
+# It is hooked into the gspread client's request method (see install()), so
+# every call the bot makes (values reads, batch updates, appends, Drive
+# metadata) waits here for a token from the read or write bucket first.
+#
+# The buckets model the per-minute Sheets quotas: each refills at
+# `per_minute / 60` tokens a second up to `burst`. Requests waiting on a
+# bucket are served by priority, so a command someone is waiting on goes
+# ahead of the background roster refresh or write flush. Quota errors
+# (429) and server errors are retried with exponential backoff and jitter.
+# Appends aren't retried after a server error, since the rows may already
+# have landed. Token waits and every request attempt are timed in metrics.py.
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def error_status(error):
+    # HTTP status of a gspread APIError (gspread 6 has .code, 5.x only the response)
+    code = getattr(error, "code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code
+
+
+def request_op(method, endpoint):
+    # Short name for a Sheets/Drive request without IDs or ranges, e.g.
+    # "values.get", "values:append", "spreadsheets:batchUpdate", "drive.get"
+    # (the "op" label on the request metrics)
+    path = str(endpoint).split("?")[0]
+    if "/files" in path or path.startswith("files"):
+        resource = "drive"
+    elif "/values" in path:
+        resource = "values"
+    else:
+        resource = "spreadsheets"
+    # Ranges are URL-quoted, so a ":" followed by a lowercase word is the API method
+    last = path.rsplit("/", 1)[-1]
+    method_name = last.rsplit(":", 1)[-1] if ":" in last else ""
+    if method_name[:1].islower():
+        return f"{resource}:{method_name}"
+    return f"{resource}.{str(method).lower()}"
+
+
+class TokenBucket:
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_token(self):
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def drain(self):
+        # After a 429 the quota window is used up no matter what the bucket thinks
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RequestScheduler:
+
+    def __init__(self, reads_per_minute, writes_per_minute, burst, retries, backoff_base, backoff_max):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._cond = threading.Condition()
+        self._buckets = {
+            "read": TokenBucket(reads_per_minute, burst),
+            "write": TokenBucket(writes_per_minute, burst)
+        }
+        self._waiting = {kind: [] for kind in self._buckets}  # heaps of (priority, seq)
+        self._seq = itertools.count()
+        self._local = threading.local()
+        self._stats = {
+            kind: {
+                "requests": 0,
+                "retries": 0,
+                "quota_errors": 0,
+                "server_errors": 0,
+                "failed": 0,
+                "max_queue_depth": 0,
+                "total_wait_seconds": 0.0,
+                "max_wait_seconds": 0.0,
+                "by_priority": {name: 0 for name in PRIORITY_NAMES.values()}
+            }
+            for kind in self._buckets
+        }
+
+    # --- Priorities ---
+
+    @contextmanager
+    def priority(self, level):
+        # Requests made by this thread inside the block get `level`
+        previous = getattr(self._local, "priority", INTERACTIVE)
+        self._local.priority = level
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self):
+        return getattr(self._local, "priority", INTERACTIVE)
+
+    @contextmanager
+    def counting(self):
+        # Counts the requests this thread sends inside the block, retries
+        # included, as {"read": n, "write": n}. Blocks can be nested.
+        outer = getattr(self._local, "counts", None)
+        counts = {kind: 0 for kind in self._buckets}
+        self._local.counts = counts
+        try:
+            yield counts
+        finally:
+            self._local.counts = outer
+            if outer is not None:
+                for kind, count in counts.items():
+                    outer[kind] += count
+
+    # --- Tokens ---
+
+    def _acquire(self, kind):
+        # Blocks until this request is first in line for its bucket and a
+        # token is free. Returns how long it waited.
+        priority = self.current_priority()
+        start = time.monotonic()
+        with self._cond:
+            waiting = self._waiting[kind]
+            ticket = (priority, next(self._seq))
+            heapq.heappush(waiting, ticket)
+            stats = self._stats[kind]
+            stats["max_queue_depth"] = max(stats["max_queue_depth"], len(waiting))
+            bucket = self._buckets[kind]
+            while True:
+                if waiting[0] == ticket and bucket.try_take():
+                    heapq.heappop(waiting)
+                    self._cond.notify_all()
+                    break
+                timeout = bucket.seconds_until_token() if waiting[0] == ticket else None
+                self._cond.wait(timeout)
+            waited = time.monotonic() - start
+            stats["requests"] += 1
+            stats["total_wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+            stats["by_priority"][PRIORITY_NAMES[priority]] += 1
+        counts = getattr(self._local, "counts", None)
+        if counts is not None:
+            counts[kind] += 1
+        metrics.registry.observe("jsa_sheets_quota_wait_seconds", waited, {"kind": kind})
+        return waited
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay + random.uniform(0, self.backoff_base)
+
+    # --- Requests ---
+
+    def call(self, kind, func, *args, retry_server_errors=True, **kwargs):
+        # Runs func once a token is free, retrying quota and server errors
+        for attempt in range(self.retries + 1):
+            self._acquire(kind)
+            try:
+                return func(*args, **kwargs)
+            except APIError as e:
+                status = error_status(e)
+                with self._cond:
+                    stats = self._stats[kind]
+                    if status == 429:
+                        stats["quota_errors"] += 1
+                        self._buckets[kind].drain()
+                    elif status in RETRY_STATUSES:
+                        stats["server_errors"] += 1
+                    retry = attempt < self.retries and (
+                        status == 429 or (status in RETRY_STATUSES and retry_server_errors)
+                    )
+                    if retry:
+                        stats["retries"] += 1
+                    else:
+                        stats["failed"] += 1
+                if not retry:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"Warning: Sheets {kind} request got {status}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def install(self, client, on_error=None):
+        # Routes a gspread client's HTTP requests through the scheduler.
+        # gspread 6 sends them from client.http_client, 5.x from the client itself.
+        # on_error(endpoint, error) is called for a request that finally failed.
+        target = getattr(client, "http_client", client)
+        if getattr(target, "_scheduled", False):
+            return
+        request = target.request
+
+        def scheduled_request(method, endpoint, *args, **kwargs):
+            kind = "read" if str(method).lower() == "get" else "write"
+            op = request_op(method, endpoint)
+
+            def timed_request(*args, **kwargs):
+                with metrics.registry.track("sheets", op):
+                    return request(*args, **kwargs)
+
+            try:
+                return self.call(
+                    kind, timed_request, method, endpoint, *args,
+                    retry_server_errors=":append" not in str(endpoint),
+                    **kwargs
+                )
+            except APIError as e:
+                if on_error is not None:
+                    on_error(endpoint, e)
+                raise
+
+        target.request = scheduled_request
+        target._scheduled = True
+
+    # --- Metrics ---
+
+    def stats(self):
+        with self._cond:
+            result = {}
+            for kind, stats in self._stats.items():
+                kind_stats = dict(stats)
+                kind_stats["by_priority"] = dict(stats["by_priority"])
+                kind_stats["queue_depth"] = len(self._waiting[kind])
+                kind_stats["tokens"] = round(self._buckets[kind].tokens, 2)
+                requests = stats["requests"]
+                kind_stats["avg_wait_seconds"] = stats["total_wait_seconds"] / requests if requests else 0.0
+                result[kind] = kind_stats
+            return result
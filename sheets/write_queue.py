@@ -0,0 +1,187 @@
+import threading
+import time
+
+# Write-behind queue for Google Sheets.
+# XP changes are merged per member in the local roster (a member awarded
+# five times is still one dirty row), and log rows for Audit_Logs,
+# Wordle_Claims and Attendance_Logs are buffered here per worksheet. A
+# flush sends everything at once: one batch_update for the roster and one
+# append_rows per log sheet. Flushes happen every `flush_seconds`, or
+# sooner once `max_pending` log rows are waiting. Rows can carry the journal
+# sequence number they belong to, which is handed back once they're sent.
+# Single cells (quest Last_Used timestamps) can be queued too; a cell written
+# twice before a flush is only sent once, with its newest value, and each
+# sheet's cells go out as one batch_update.
+
+
+class WriteQueue:
+
+    def __init__(self, flush_seconds, max_pending):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rows = {}      # {worksheet title: [(row, seq), ...]} waiting to be sent
+        self._inflight = {}  # {worksheet title: [(row, seq), ...]} being sent right now
+        self._cells = {}     # {worksheet title: {A1 cell: value}} waiting to be sent
+        self._inflight_cells = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "flushes": 0,
+            "failed_flushes": 0,
+            "rows_appended": 0,
+            "cells_written": 0,
+            "roster_rows_written": 0,
+            "last_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+            "last_batch_sizes": {},
+            "max_batch_size": 0
+        }
+
+    # --- Producers ---
+
+    def append(self, sheet_name, row, seq=None):
+        with self._lock:
+            self._rows.setdefault(sheet_name, []).append((row, seq))
+            pending = sum(len(rows) for rows in self._rows.values())
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def pending_rows(self, sheet_name):
+        # Rows not yet confirmed on the sheet (queued or in flight), so
+        # duplicate checks can see them before they land
+        with self._lock:
+            queued = self._inflight.get(sheet_name, []) + self._rows.get(sheet_name, [])
+            return [row for row, seq in queued]
+
+    def update_cell(self, sheet_name, cell, value):
+        with self._lock:
+            self._cells.setdefault(sheet_name, {})[cell] = value
+
+    def pending_cells(self, sheet_name):
+        # {A1 cell: value} not yet confirmed on the sheet, newest value per cell
+        with self._lock:
+            cells = dict(self._inflight_cells.get(sheet_name, {}))
+            cells.update(self._cells.get(sheet_name, {}))
+            return cells
+
+    def pending_count(self):
+        with self._lock:
+            return sum(len(rows) for rows in self._rows.values())
+
+    def request_flush(self):
+        self._wake.set()
+
+    # --- Flushing ---
+
+    def flush(self, open_sheet, flush_roster=None, on_flushed=None):
+        # open_sheet(title) returns the Worksheet to append to.
+        # flush_roster() writes the dirty roster rows and returns how many.
+        # on_flushed(seqs) gets the journal seqs of every row sent, once all
+        # of them made it.
+        with self._flush_lock:
+            start = time.perf_counter()
+            with self._lock:
+                self._inflight = self._rows
+                self._rows = {}
+                self._inflight_cells = self._cells
+                self._cells = {}
+            batch_sizes = {}
+            seqs = set()
+            try:
+                roster_rows = flush_roster() if flush_roster is not None else 0
+                if roster_rows:
+                    batch_sizes["Master_Roster"] = roster_rows
+                for sheet_name in list(self._inflight):
+                    rows = self._inflight[sheet_name]
+                    if rows:
+                        open_sheet(sheet_name).append_rows([row for row, seq in rows])
+                        batch_sizes[sheet_name] = len(rows)
+                        seqs.update(seq for row, seq in rows if seq is not None)
+                    with self._lock:
+                        del self._inflight[sheet_name]
+                for sheet_name in list(self._inflight_cells):
+                    cells = self._inflight_cells[sheet_name]
+                    if cells:
+                        # USER_ENTERED, like update_cell, so timestamps stay dates
+                        open_sheet(sheet_name).batch_update(
+                            [{"range": cell, "values": [[value]]} for cell, value in cells.items()],
+                            value_input_option="USER_ENTERED"
+                        )
+                        batch_sizes[f"{sheet_name} cells"] = len(cells)
+                    with self._lock:
+                        del self._inflight_cells[sheet_name]
+            except Exception:
+                # Put unsent rows back in front of anything queued meanwhile.
+                # Unsent cells go back too, unless they were written again since.
+                with self._lock:
+                    for sheet_name, rows in self._inflight.items():
+                        self._rows[sheet_name] = rows + self._rows.get(sheet_name, [])
+                    self._inflight = {}
+                    for sheet_name, cells in self._inflight_cells.items():
+                        cells.update(self._cells.get(sheet_name, {}))
+                        self._cells[sheet_name] = cells
+                    self._inflight_cells = {}
+                    self._stats["failed_flushes"] += 1
+                raise
+            self._record(time.perf_counter() - start, batch_sizes)
+            if on_flushed is not None and seqs:
+                on_flushed(seqs)
+            return batch_sizes
+
+    def _record(self, seconds, batch_sizes):
+        if not batch_sizes:
+            return
+        with self._lock:
+            stats = self._stats
+            stats["flushes"] += 1
+            stats["roster_rows_written"] += batch_sizes.get("Master_Roster", 0)
+            stats["rows_appended"] += sum(
+                n for name, n in batch_sizes.items() if name != "Master_Roster" and not name.endswith(" cells")
+            )
+            stats["cells_written"] += sum(n for name, n in batch_sizes.items() if name.endswith(" cells"))
+            stats["last_flush_seconds"] = seconds
+            stats["max_flush_seconds"] = max(stats["max_flush_seconds"], seconds)
+            stats["total_flush_seconds"] += seconds
+            stats["last_batch_sizes"] = dict(batch_sizes)
+            stats["max_batch_size"] = max(stats["max_batch_size"], max(batch_sizes.values()))
+        print(f"Flushed sheet writes in {seconds:.2f}s: {batch_sizes}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_rows"] = sum(len(rows) for rows in self._rows.values())
+            stats["pending_cells"] = sum(len(cells) for cells in self._cells.values())
+        return stats
+
+    # --- Background flusher ---
+
+    def start(self, flush):
+        # flush() is called every flush_seconds or when the queue fills up
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(flush,),
+            name="sheets-write-queue",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self, flush):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                flush()
+            except Exception as e:
+                print(f"Warning: Sheet write flush failed, will retry: {e}")
@@ -0,0 +1,177 @@
+import sqlite3
+import threading
+
+# Index of Wordle claims, so "did this member already claim puzzle N?" is a
+# bit test instead of a scan of Wordle_Claims.
+#
+# Every Discord ID that has claimed gets a small ordinal (0, 1, 2...) and
+# each puzzle is a bitset over those ordinals, so a puzzle costs about one
+# byte per eight members no matter how many rows the sheet has. Bitsets for
+# the newest `hot_puzzles` puzzles stay in memory; older ones are only kept
+# in SQLite and read back one row at a time if someone claims a late puzzle.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wordle_members (
+    discord_id TEXT PRIMARY KEY,
+    ordinal INTEGER NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS wordle_claims (
+    puzzle INTEGER PRIMARY KEY,
+    bits BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def puzzle_number(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def has_bit(bits, ordinal):
+    byte = ordinal // 8
+    return byte < len(bits) and bool(bits[byte] & (1 << (ordinal % 8)))
+
+
+def set_bit(bits, ordinal):
+    byte = ordinal // 8
+    if byte >= len(bits):
+        bits.extend(bytes(byte + 1 - len(bits)))
+    bits[byte] |= 1 << (ordinal % 8)
+
+
+class WordleClaimIndex:
+
+    def __init__(self, path, hot_puzzles):
+        self.path = path
+        self.hot_puzzles = hot_puzzles
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._ordinals = dict(self._conn.execute("SELECT discord_id, ordinal FROM wordle_members"))
+        self._hot = {}  # {puzzle: bytearray} for the newest puzzles
+        newest = self._conn.execute("SELECT MAX(puzzle) FROM wordle_claims").fetchone()[0]
+        self._newest = newest if newest is not None else 0
+        for puzzle, bits in self._conn.execute(
+            "SELECT puzzle, bits FROM wordle_claims WHERE puzzle > ?",
+            (self._newest - self.hot_puzzles,)
+        ):
+            self._hot[puzzle] = bytearray(bits)
+        self.loaded = self._conn.execute(
+            "SELECT 1 FROM ledger_meta WHERE name = 'wordle_loaded'"
+        ).fetchone() is not None
+
+    def _ordinal(self, discord_id, create=False):
+        # Caller holds the lock (and a transaction if create is set)
+        discord_id = str(discord_id).strip()
+        ordinal = self._ordinals.get(discord_id)
+        if ordinal is None and create:
+            ordinal = len(self._ordinals)
+            self._ordinals[discord_id] = ordinal
+            self._conn.execute(
+                "INSERT INTO wordle_members (discord_id, ordinal) VALUES (?, ?)",
+                (discord_id, ordinal)
+            )
+        return ordinal
+
+    def _bits(self, puzzle):
+        # Caller holds the lock. Cold puzzles come straight from SQLite.
+        bits = self._hot.get(puzzle)
+        if bits is None and puzzle <= self._newest - self.hot_puzzles:
+            row = self._conn.execute(
+                "SELECT bits FROM wordle_claims WHERE puzzle = ?", (puzzle,)
+            ).fetchone()
+            bits = bytearray(row[0]) if row else None
+        return bits
+
+    def _add(self, puzzle, discord_id):
+        # Caller holds the lock and a transaction. Returns False if already claimed.
+        ordinal = self._ordinal(discord_id, create=True)
+        bits = self._bits(puzzle)
+        if bits is None:
+            bits = bytearray()
+        elif has_bit(bits, ordinal):
+            return False
+        set_bit(bits, ordinal)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO wordle_claims (puzzle, bits) VALUES (?, ?)",
+            (puzzle, bytes(bits))
+        )
+        if puzzle > self._newest - self.hot_puzzles:
+            self._hot[puzzle] = bits
+        if puzzle > self._newest:
+            self._newest = puzzle
+            self._age_out()
+        return True
+
+    def _age_out(self):
+        # Drops bitsets that fell out of the hot window from memory (they stay in SQLite)
+        for puzzle in [p for p in self._hot if p <= self._newest - self.hot_puzzles]:
+            del self._hot[puzzle]
+
+    # --- Public API ---
+
+    def load(self, rows):
+        # Seeds the index from the Wordle_Claims values (without the header row)
+        claims = {}  # {puzzle: bytearray}
+        with self._lock, self._conn:
+            for row in rows:
+                if len(row) < 2:
+                    continue
+                puzzle = puzzle_number(row[0])
+                if puzzle is None:
+                    continue
+                bits = claims.get(puzzle)
+                if bits is None:
+                    bits = claims[puzzle] = self._bits(puzzle) or bytearray()
+                set_bit(bits, self._ordinal(row[1], create=True))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO wordle_claims (puzzle, bits) VALUES (?, ?)",
+                [(puzzle, bytes(bits)) for puzzle, bits in claims.items()]
+            )
+            if claims:
+                self._newest = max(self._newest, max(claims))
+            for puzzle, bits in claims.items():
+                if puzzle > self._newest - self.hot_puzzles:
+                    self._hot[puzzle] = bits
+            self._age_out()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ledger_meta (name, value) VALUES ('wordle_loaded', '1')"
+            )
+            self.loaded = True
+
+    def exists(self, puzzle, discord_id):
+        puzzle = puzzle_number(puzzle)
+        with self._lock:
+            ordinal = self._ordinal(discord_id)
+            if puzzle is None or ordinal is None:
+                return False
+            bits = self._bits(puzzle)
+            return bits is not None and has_bit(bits, ordinal)
+
+    def add(self, puzzle, discord_id):
+        # Records a claim. Returns False if it was already there.
+        puzzle = puzzle_number(puzzle)
+        if puzzle is None:
+            return False
+        with self._lock, self._conn:
+            return self._add(puzzle, discord_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "members": len(self._ordinals),
+                "hot_puzzles": len(self._hot),
+                "hot_bytes": sum(len(bits) for bits in self._hot.values()),
+                "newest_puzzle": self._newest
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()